@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+"""
+Asyncio front-end for BankingSystem transfers.
+"""
+import asyncio
+import time
+from collections import deque
+
+
+class AsyncTransferQueue:  # pylint: disable=too-many-instance-attributes
+    """
+    Bounded queue of transfer requests processed by a pool of consumers.
+    submit() waits while the queue is full (backpressure) and returns a
+    future resolved with the TransferResult of the request.
+
+    Consumers run the transfers in an executor, the loop default one unless
+    given one, so a blocking ledger log (such as a DurableJournal fsync)
+    does not stall the event loop, and up to consumers transfers run at once
+    on the thread-safe Ledger.
+    """
+
+    def __init__(
+        self,
+        banking_system,
+        consumers=4,
+        maxsize=1000,
+        latency_samples=10000,
+        executor=None,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Set the banking system, the number of consumers, the queue size and
+        the executor running the transfers.
+        """
+        if consumers < 1 or maxsize < 1:
+            raise ValueError("Consumers and queue size must be positive")
+
+        self.banking_system = banking_system
+        self.consumers = consumers
+        self.executor = executor
+        self.queue = asyncio.Queue(maxsize)
+        self.tasks = []
+        self.processed = 0
+        self.started = None
+        self.latencies = deque(maxlen=latency_samples)
+
+    async def start(self):
+        """
+        Starts the consumers.
+        """
+        if self.tasks:
+            return
+
+        self.started = time.monotonic()
+        self.tasks = [
+            asyncio.create_task(self._consume()) for _ in range(self.consumers)
+        ]
+
+    async def stop(self):
+        """
+        Processes the queued requests and stops the consumers.
+        """
+        await self.queue.join()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def __aenter__(self):
+        """
+        Starts the consumers when entering the context.
+        """
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """
+        Stops the consumers when leaving the context.
+        """
+        await self.stop()
+
+    async def submit(self, sender, receiver, amount, transaction_type):
+        """
+        Queues a transfer request, waiting while the queue is full.
+        Returns a future resolved with its TransferResult.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(
+            (time.monotonic(), future, (sender, receiver, amount, transaction_type))
+        )
+        return future
+
+    async def _consume(self):
+        """
+        Consumer loop, resolves the future of every request it processes.
+        """
+        queue = self.queue
+        loop = asyncio.get_running_loop()
+        process_transfer = self.banking_system.process_transfer
+        while True:
+            submitted, future, request = await queue.get()
+            try:
+                if not future.cancelled():
+                    transfer = loop.run_in_executor(
+                        self.executor, process_transfer, *request
+                    )
+                    # Waiting without raising keeps this frame out of the
+                    # traceback of a failed transfer: a caller clearing its
+                    # frames, as assertRaises does, would close the consumer.
+                    await asyncio.wait((transfer,))
+                    if not future.cancelled():
+                        error = transfer.exception()
+                        if error is None:
+                            future.set_result(transfer.result())
+                        else:
+                            future.set_exception(error)
+                self.processed += 1
+                self.latencies.append(time.monotonic() - submitted)
+            finally:
+                queue.task_done()
+
+    def depth(self):
+        """
+        Number of requests waiting in the queue.
+        """
+        return self.queue.qsize()
+
+    def throughput(self):
+        """
+        Requests processed per second since the consumers started.
+        """
+        if self.started is None:
+            return 0.0
+
+        elapsed = time.monotonic() - self.started
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def latency_percentiles(self, percentiles=(50, 90, 99)):
+        """
+        Submit-to-result latency percentiles, in seconds, of recent requests.
+        """
+        if not self.latencies:
+            return {percentile: 0.0 for percentile in percentiles}
+
+        latencies = sorted(self.latencies)
+        last = len(latencies) - 1
+        return {
+            percentile: latencies[min(last, int(len(latencies) * percentile / 100))]
+            for percentile in percentiles
+        }
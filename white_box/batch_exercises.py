@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+"""
+Batch versions of the class exercises.
+"""
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+from class_exercises import validate_date
+
+CARD_WIDTH = 16
+
+# Per-row byte sums must not carry into the next row: 28 * 9 <= 255.
+MAX_CARD_WIDTH = 28
+
+# Luhn values of every byte. Non-digits count as 0, so that their rows
+# cannot carry into the next row; _digit_flags rejects those rows.
+CARD_DIGIT_VALUES = bytes(byte - 48 if 48 <= byte <= 57 else 0 for byte in range(256))
+CARD_DOUBLED_VALUES = bytes(
+    (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)[byte - 48] if 48 <= byte <= 57 else 0
+    for byte in range(256)
+)
+CARD_NON_DIGITS = bytes(0 if 48 <= byte <= 57 else 1 for byte in range(256))
+CARD_LENGTH_FLAGS = bytes(1 if 13 <= length <= 16 else 0 for length in range(256))
+LUHN_FLAGS = bytes(1 if total % 10 == 0 else 0 for total in range(256))
+ZERO_FLAGS = bytes(1 if value == 0 else 0 for value in range(256))
+
+
+def pack_card_numbers(card_numbers, width=CARD_WIDTH):
+    """
+    Packs card numbers into one buffer of fixed-width, zero-padded ASCII rows.
+    Leading zeros do not change the Luhn checksum.
+    """
+    return b"".join(
+        number.encode("ascii", "replace").rjust(width, b"0")[-width:]
+        for number in card_numbers
+    )
+
+
+def _column_sums(rows, width, columns):
+    """
+    Adds up the given columns of a fixed-width byte matrix, row by row.
+    Every column is read as one big integer with a byte per row, so a single
+    integer addition adds the whole column, and the byte values never carry.
+    """
+    total = 0
+    for column, values in columns:
+        total += int.from_bytes(values[column::width], "big")
+
+    return total.to_bytes(rows, "big")
+
+
+def _digit_flags(buffer, rows, width):
+    """
+    Returns the flags, packed in an integer, of the rows that are all digits.
+    """
+    if buffer.isdigit():
+        return int.from_bytes(b"\x01" * rows, "big")
+
+    non_digits = buffer.translate(CARD_NON_DIGITS)
+    counts = _column_sums(
+        rows, width, ((column, non_digits) for column in range(width))
+    )
+    return int.from_bytes(counts.translate(ZERO_FLAGS), "big")
+
+
+def luhn_check_packed(buffer, width=CARD_WIDTH):
+    """
+    Checks the Luhn checksum of every row of a packed card number buffer.
+    Returns one flag byte per row: 1 when the row is all digits and its
+    checksum is valid, 0 otherwise.
+    """
+    if not 0 < width <= MAX_CARD_WIDTH:
+        raise ValueError(f"Invalid card width: {width}")
+
+    if len(buffer) % width:
+        raise ValueError("Buffer length is not a multiple of the card width")
+
+    rows = len(buffer) // width
+    if not rows:
+        return b""
+
+    values = buffer.translate(CARD_DIGIT_VALUES)
+    doubled = buffer.translate(CARD_DOUBLED_VALUES)
+    sums = _column_sums(
+        rows,
+        width,
+        (
+            (column, doubled if (width - column) % 2 == 0 else values)
+            for column in range(width)
+        ),
+    )
+    flags = int.from_bytes(sums.translate(LUHN_FLAGS), "big")
+    flags &= _digit_flags(buffer, rows, width)
+    return flags.to_bytes(rows, "big")
+
+
+def validate_credit_cards(card_numbers, luhn=False):
+    """
+    Batch version of validate_credit_card.
+    Returns one flag byte per card number, 1 for "Valid Card" and 0 for
+    "Invalid Card".
+    """
+    card_numbers = list(card_numbers)
+    if not card_numbers:
+        return b""
+
+    buffer = pack_card_numbers(card_numbers)
+    # Non-ASCII numbers get length 0, so that they are rejected like in
+    # validate_credit_card.
+    lengths = bytes(
+        min(len(number), 255) if number.isascii() else 0 for number in card_numbers
+    )
+    flags = int.from_bytes(lengths.translate(CARD_LENGTH_FLAGS), "big")
+
+    if luhn:
+        flags &= int.from_bytes(luhn_check_packed(buffer), "big")
+    else:
+        flags &= _digit_flags(buffer, len(card_numbers), CARD_WIDTH)
+
+    return flags.to_bytes(len(card_numbers), "big")
+
+
+# Categorical codes written by score_loans, indexed by code.
+LOAN_CATEGORIES = ("Not Eligible", "Secured Loan", "Standard Loan", "Premium Loan")
+NOT_ELIGIBLE, SECURED_LOAN, STANDARD_LOAN, PREMIUM_LOAN = range(4)
+
+# Inputs smaller than this are scored in-process even if workers are requested.
+MIN_PARALLEL_ROWS = 1_000_000
+
+
+def score_loans(incomes, credit_scores):
+    """
+    Batch version of check_loan_eligibility.
+    Returns one categorical code byte per customer, see LOAN_CATEGORIES.
+    """
+    return bytes(
+        (
+            NOT_ELIGIBLE
+            if income < 30000
+            else (
+                (STANDARD_LOAN if score > 700 else SECURED_LOAN)
+                if income <= 60000
+                else (PREMIUM_LOAN if score > 750 else STANDARD_LOAN)
+            )
+        )
+        for income, score in zip(incomes, credit_scores)
+    )
+
+
+def loan_categories(codes):
+    """
+    Decodes score_loans codes back to check_loan_eligibility strings.
+    """
+    return [LOAN_CATEGORIES[code] for code in codes]
+
+
+def _score_loans_shard(args):
+    """
+    Process pool entry point, scores rows [start, stop) of a shared block laid
+    out as rows incomes, rows credit scores (both doubles) and rows codes.
+    """
+    name, rows, start, stop = args
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        buffer = block.buf
+        incomes = buffer[: 8 * rows].cast("d")
+        credit_scores = buffer[8 * rows : 16 * rows].cast("d")
+        buffer[16 * rows + start : 16 * rows + stop] = score_loans(
+            incomes[start:stop], credit_scores[start:stop]
+        )
+        incomes.release()
+        credit_scores.release()
+        del buffer
+    finally:
+        block.close()
+
+
+def score_loans_parallel(
+    incomes, credit_scores, workers=None, min_rows=MIN_PARALLEL_ROWS
+):
+    """
+    Scores the customers across a process pool, one shard per worker.
+    The columns are copied once into a shared memory block that every worker
+    reads its shard from and writes its codes to, so no rows are pickled.
+    """
+    incomes = array("d", incomes)
+    credit_scores = array("d", credit_scores)
+    rows = len(incomes)
+    if rows != len(credit_scores):
+        raise ValueError("Income and credit score columns differ in length")
+
+    if workers == 0 or rows < min_rows:
+        return score_loans(incomes, credit_scores)
+
+    workers = workers or os.cpu_count() or 1
+    shard_rows = max(1, -(-rows // workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        block = shared_memory.SharedMemory(create=True, size=17 * rows)
+        try:
+            block.buf[: 8 * rows] = incomes.tobytes()
+            block.buf[8 * rows : 16 * rows] = credit_scores.tobytes()
+            shards = [
+                (block.name, rows, start, min(start + shard_rows, rows))
+                for start in range(0, rows, shard_rows)
+            ]
+            list(executor.map(_score_loans_shard, shards))
+            return bytes(block.buf[16 * rows : 17 * rows])
+        finally:
+            block.close()
+            block.unlink()
+
+
+@lru_cache(maxsize=None)
+def valid_dates(calendar=False):
+    """
+    Every (year, month, day) accepted by validate_date, built once per mode.
+    """
+    return frozenset(
+        (year, month, day)
+        for year in range(1900, 2101)
+        for month in range(1, 13)
+        for day in range(1, 32)
+        if validate_date(year, month, day, calendar) == "Valid Date"
+    )
+
+
+@lru_cache(maxsize=None)
+def valid_iso_dates(calendar=False):
+    """
+    Every valid date as an ISO-8601 "YYYY-MM-DD" string, built once per mode.
+    """
+    return frozenset(
+        f"{year:04d}-{month:02d}-{day:02d}"
+        for year, month, day in valid_dates(calendar)
+    )
+
+
+def validate_date_columns(years, months, days, calendar=False):
+    """
+    Batch version of validate_date over integer columns.
+    Returns one flag byte per row, 1 for "Valid Date" and 0 for "Invalid Date".
+    """
+    dates = valid_dates(calendar)
+    return bytes(date in dates for date in zip(years, months, days))
+
+
+def validate_iso_dates(date_strings, calendar=False):
+    """
+    Validates ISO-8601 "YYYY-MM-DD" date strings with validate_date rules.
+    Each row is a single set lookup, no row is parsed or turned into a datetime.
+    Returns one flag byte per row, 1 for "Valid Date" and 0 for "Invalid Date".
+    """
+    dates = valid_iso_dates(calendar)
+    return bytes(date in dates for date in date_strings)
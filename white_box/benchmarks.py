@@ -0,0 +1,1020 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=too-many-lines
+
+"""
+Benchmarks for the batch and optimized versions of the class exercises.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import pickle
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import ROUND_HALF_UP, Decimal
+
+import class_exercises
+import memoization
+from batch_exercises import (
+    luhn_check_packed,
+    pack_card_numbers,
+    score_loans,
+    score_loans_parallel,
+    validate_iso_dates,
+)
+from book_store import Book
+from cart_codec import decode_cart, encode_cart
+from checkout_pricing import price_carts
+from class_exercises import (
+    BankAccount,
+    CredentialStore,
+    ElevatorSystem,
+    Product,
+    ProductCatalog,
+    SessionStore,
+    ShoppingCart,
+    TrafficLight,
+    VendingMachine,
+    calculate_items_shipping_cost,
+    calculate_order_total,
+    calculate_order_total_cents,
+    calculate_total_discount,
+    check_loan_eligibility,
+    get_weather_advisory,
+    is_luhn_valid,
+)
+from durable_journal import DURABILITY_LEVELS, DURABILITY_NONE, DurableJournal, replay
+from fleet import MachineFleet
+from inventory import StockTable
+from ledger import Ledger
+from money import from_cents, to_cents
+from settlement import NO_FEES, AccountTable, FeeSchedule, schedule_fee
+from traffic_simulation import DEFAULT_PHASE_SECONDS, TrafficSimulation
+from weather_stream import SensorReading, WeatherAdvisoryEngine
+
+
+def timed(function, *args):
+    """
+    Calls the function once, returning the elapsed seconds and its result.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def report(name, rows, seconds):
+    """
+    Prints one benchmark line with the throughput.
+    """
+    rate = rows / seconds if seconds > 0 else float("inf")
+    print(f"{name:<32} {seconds:>9.3f}s {rate:>16,.0f} rows/s")
+
+
+def benchmark_luhn(rows=1_000_000):
+    """
+    Luhn checksum: scalar loop against the packed batch implementation.
+    """
+    rng = random.Random(0)
+    card_numbers = [str(rng.randrange(10**15, 10**16)) for _ in range(rows)]
+
+    scalar_seconds, scalar = timed(
+        lambda: bytes(is_luhn_valid(number) for number in card_numbers)
+    )
+    pack_seconds, buffer = timed(pack_card_numbers, card_numbers)
+    batch_seconds, batch = timed(luhn_check_packed, buffer)
+
+    assert scalar == batch
+    report("is_luhn_valid loop", rows, scalar_seconds)
+    report("pack_card_numbers", rows, pack_seconds)
+    report("luhn_check_packed", rows, batch_seconds)
+
+
+def benchmark_loans(rows=10_000_000):
+    """
+    Loan eligibility: scalar loop against the batch and sharded scorers.
+    """
+    rng = random.Random(0)
+    incomes = array("d", (rng.randrange(10000, 120000) for _ in range(rows)))
+    credit_scores = array("d", (rng.randrange(300, 850) for _ in range(rows)))
+
+    scalar_seconds, scalar = timed(
+        lambda: [
+            check_loan_eligibility(income, score)
+            for income, score in zip(incomes, credit_scores)
+        ]
+    )
+    batch_seconds, batch = timed(score_loans, incomes, credit_scores)
+    parallel_seconds, parallel = timed(score_loans_parallel, incomes, credit_scores)
+
+    assert batch == parallel
+    report("check_loan_eligibility loop", rows, scalar_seconds)
+    report("score_loans", rows, batch_seconds)
+    report("score_loans_parallel", rows, parallel_seconds)
+    print(
+        f"memory: {sys.getsizeof(scalar):,} bytes of list (plus shared strings)"
+        f" against {sys.getsizeof(batch):,} bytes of codes"
+    )
+
+
+def benchmark_weather(rows=1_000_000, sensors=5000):
+    """
+    Weather advisories: per-reading calls against the streaming engine.
+    """
+    rng = random.Random(0)
+    readings = [
+        SensorReading(
+            rng.randrange(sensors), rng.uniform(-5, 40), rng.uniform(40, 95), 0.0
+        )
+        for _ in range(rows)
+    ]
+
+    scalar_seconds, _ = timed(
+        lambda: [get_weather_advisory(r.temperature, r.humidity) for r in readings]
+    )
+    engine = WeatherAdvisoryEngine(window=4)
+    stream_seconds, changes = timed(lambda: list(engine.process(readings)))
+
+    report("get_weather_advisory loop", rows, scalar_seconds)
+    report("WeatherAdvisoryEngine window=4", rows, stream_seconds)
+    print(
+        f"emitted {len(changes):,} of {rows:,} readings,"
+        f" engine throughput {engine.metrics.throughput():,.0f} readings/s"
+    )
+
+
+def _parse_iso_date(date_string):
+    """
+    Per-row baseline: parses the string into a datetime.date.
+    """
+    try:
+        date = datetime.date.fromisoformat(date_string)
+    except ValueError:
+        return False
+
+    return len(date_string) == 10 and 1900 <= date.year <= 2100
+
+
+def benchmark_dates(rows=1_000_000):
+    """
+    ISO-8601 dates: datetime parsing per row against the lookup table.
+    """
+    rng = random.Random(0)
+    date_strings = [
+        f"{rng.randrange(1890, 2110)}-{rng.randrange(1, 13):02d}"
+        f"-{rng.randrange(1, 32):02d}"
+        for _ in range(rows)
+    ]
+
+    scalar_seconds, scalar = timed(
+        lambda: bytes(_parse_iso_date(date) for date in date_strings)
+    )
+    validate_iso_dates(["2000-01-01"], calendar=True)
+    batch_seconds, batch = timed(validate_iso_dates, date_strings, True)
+
+    assert scalar == batch
+    report("datetime.date.fromisoformat loop", rows, scalar_seconds)
+    report("validate_iso_dates", rows, batch_seconds)
+
+
+def call_all(function, calls):
+    """
+    Calls the function once per argument tuple.
+    """
+    return [function(*args) for args in calls]
+
+
+def call_each(methods):
+    """
+    Calls every method, without arguments.
+    """
+    return [method() for method in methods]
+
+
+def zipf_sample(rng, values, rows, exponent=1.2):
+    """
+    Draws rows values with Zipfian weights, the first values being the hottest.
+    """
+    weights = [1 / rank**exponent for rank in range(1, len(values) + 1)]
+    return rng.choices(values, weights, k=rows)
+
+
+def benchmark_memoization(rows=1_000_000):
+    """
+    Memoization: uncached calls against LRU caches on Zipfian inputs.
+    """
+    rng = random.Random(0)
+    cases = {
+        "categorize_product": [(price,) for price in range(0, 300)],
+        "check_loan_eligibility": [
+            (income, score)
+            for income in range(20000, 100001, 5000)
+            for score in range(300, 851, 10)
+        ],
+        "is_triangle": [
+            (a, b, c) for a in range(1, 11) for b in range(1, 11) for c in range(1, 11)
+        ],
+        "validate_password": [(f"Passw0rd!{index}",) for index in range(5000)],
+    }
+
+    for name, values in cases.items():
+        calls = zipf_sample(rng, values, rows)
+        function = getattr(class_exercises, name)
+        cached = getattr(memoization, name)
+        for maxsize in (16, 256):
+            memoization.resize_cache(name, maxsize)
+            cached.cache_clear()
+            plain_seconds, plain = timed(call_all, function, calls)
+            cached_seconds, results = timed(call_all, cached, calls)
+            assert plain == results
+
+            info = cached.cache_info()
+            report(f"{name}", rows, plain_seconds)
+            report(f"  cached maxsize={maxsize}", rows, cached_seconds)
+            print(f"  hit rate {info.hit_rate:.1%}, {info.evictions:,} evictions")
+
+        memoization.resize_cache(name, memoization.DEFAULT_MAXSIZE)
+
+
+def decimal_order_total(items):
+    """
+    Decimal baseline of calculate_order_total_cents, rounding every discount.
+    """
+    cent = Decimal("0.01")
+    total = Decimal(0)
+    for item in items:
+        quantity = item["quantity"]
+        line = quantity * item["price"]
+        if 6 <= quantity <= 10:
+            line -= (line * Decimal("0.05")).quantize(cent, ROUND_HALF_UP)
+        elif quantity > 10:
+            line -= (line * Decimal("0.1")).quantize(cent, ROUND_HALF_UP)
+        total += line
+
+    return total
+
+
+def benchmark_money(rows=1_000_000):
+    """
+    Money: float, Decimal and integer cents order totals.
+    """
+    rng = random.Random(0)
+    cents = [rng.randrange(1, 100000) for _ in range(rows)]
+    quantities = [rng.randrange(1, 20) for _ in range(rows)]
+    float_items = [
+        {"quantity": quantity, "price": price / 100}
+        for quantity, price in zip(quantities, cents)
+    ]
+    decimal_items = [
+        {"quantity": quantity, "price": Decimal(price).scaleb(-2)}
+        for quantity, price in zip(quantities, cents)
+    ]
+    cents_items = [
+        {"quantity": quantity, "price_cents": price}
+        for quantity, price in zip(quantities, cents)
+    ]
+
+    float_seconds, float_total = timed(calculate_order_total, float_items)
+    decimal_seconds, decimal_total = timed(decimal_order_total, decimal_items)
+    cents_seconds, cents_total = timed(calculate_order_total_cents, cents_items)
+
+    assert decimal_total == Decimal(cents_total).scaleb(-2)
+    report("calculate_order_total (float)", rows, float_seconds)
+    report("Decimal order total", rows, decimal_seconds)
+    report("calculate_order_total_cents", rows, cents_seconds)
+    print(f"float total {float_total!r}, exact total {decimal_total}")
+
+
+def benchmark_ledger(rows=1_000_000, accounts=100_000):
+    """
+    Ledger: journaled transfers between random accounts.
+    """
+    rng = random.Random(0)
+    ledger = Ledger(opening_balance=1_000_000)
+    for account in range(accounts):
+        ledger.open_account(account)
+    transfers = [
+        (rng.randrange(accounts), rng.randrange(accounts), rng.randrange(1, 10000))
+        for _ in range(rows)
+    ]
+
+    def run():
+        transfer = ledger.transfer
+        for sender, receiver, amount in transfers:
+            transfer(sender, receiver, amount, amount // 50, 0)
+
+    seconds, _ = timed(run)
+    report("Ledger.transfer", rows, seconds)
+    journal = ledger.journal
+    columns = (
+        journal.senders,
+        journal.receivers,
+        journal.amounts,
+        journal.fees,
+        journal.types,
+    )
+    print(
+        f"{len(journal):,} journaled transfers in"
+        f" {sum(map(sys.getsizeof, columns)):,} bytes"
+    )
+
+
+def benchmark_ledger_threads(rows=400_000, accounts=10_000):
+    """
+    Ledger: concurrent transfers across thread counts.
+    """
+    rng = random.Random(0)
+    transfers = [
+        (rng.randrange(accounts), rng.randrange(accounts), rng.randrange(1, 10000))
+        for _ in range(rows)
+    ]
+
+    for thread_count in (1, 2, 4, 8, 16):
+        ledger = Ledger(opening_balance=1_000_000)
+        for account in range(accounts):
+            ledger.open_account(account)
+        total = sum(ledger.balances)
+
+        def worker(chunk, ledger=ledger):
+            for sender, receiver, amount in chunk:
+                ledger.transfer(sender, receiver, amount, amount // 50, 0)
+
+        threads = [
+            threading.Thread(target=worker, args=(transfers[index::thread_count],))
+            for index in range(thread_count)
+        ]
+
+        def run(threads=threads):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        seconds, _ = timed(run)
+        assert sum(ledger.balances) + ledger.fees_cents == total
+        report(f"Ledger.transfer, {thread_count} threads", rows, seconds)
+
+
+def benchmark_journal(rows=100_000, accounts=1000):
+    """
+    Durable journal: journaled transfers by durability and batch size.
+    """
+    rng = random.Random(0)
+    transfers = [
+        (rng.randrange(accounts), rng.randrange(accounts), rng.randrange(1, 10000))
+        for _ in range(rows)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for durability in DURABILITY_LEVELS:
+            for batch_size in (1, 100, 10000):
+                if durability != DURABILITY_NONE and batch_size == 1 and rows > 10000:
+                    # One fsync per transfer takes minutes at full size.
+                    count = 10000
+                else:
+                    count = rows
+                path = os.path.join(directory, f"{durability}-{batch_size}.bin")
+                with DurableJournal(path, batch_size, durability) as journal:
+                    ledger = Ledger(opening_balance=1_000_000, log=journal)
+                    for account in range(accounts):
+                        ledger.open_account(account)
+
+                    def run(ledger=ledger, count=count):
+                        for sender, receiver, amount in transfers[:count]:
+                            ledger.transfer(sender, receiver, amount, amount // 50, 0)
+
+                    seconds, _ = timed(run)
+                report(f"{durability}, batch {batch_size}", count, seconds)
+
+        path = os.path.join(directory, "fsync-10000.bin")
+        seconds, records = timed(replay, path, Ledger())
+        report("replay", records, seconds)
+        print(f"{os.path.getsize(path) / records:.1f} bytes per record")
+
+
+def benchmark_sessions(rows=1_000_000):
+    """
+    Session store: logins, lookups and expiry of millions of sessions.
+    """
+    now = [0.0]
+    sessions = SessionStore(ttl=600, clock=lambda: now[0])
+    usernames = [f"user{index}" for index in range(rows)]
+
+    def login_all():
+        for index, username in enumerate(usernames):
+            now[0] = index * 0.001
+            sessions.login(username)
+
+    login_seconds, _ = timed(login_all)
+    lookup_seconds, active = timed(
+        lambda: sum(username in sessions for username in usernames)
+    )
+    now[0] += 300
+    expire_seconds, expired = timed(sessions.expire)
+
+    report("SessionStore.login", rows, login_seconds)
+    report("SessionStore.__contains__", rows, lookup_seconds)
+    report("SessionStore.expire", max(expired, 1), expire_seconds)
+    print(f"{active:,} active, {expired:,} expired, {len(sessions):,} left")
+
+
+def percentiles(latencies, points=(50, 99)):
+    """
+    Formats latency percentiles, in milliseconds.
+    """
+    latencies = sorted(latencies)
+    return ", ".join(
+        f"p{point} {latencies[min(len(latencies) - 1, len(latencies) * point // 100)] * 1000:.1f}ms"
+        for point in points
+    )
+
+
+def benchmark_credentials(rows=100, users=1_000_000):
+    """
+    Credential store: cold, cached and offloaded password verification.
+    """
+    credentials = CredentialStore(cache_size=rows)
+    record = credentials.make_record("password")
+    seconds, _ = timed(
+        call_all,
+        credentials.add_record,
+        [(f"user{index}", record) for index in range(users)],
+    )
+    report("CredentialStore.add_record", users, seconds)
+
+    usernames = [f"user{index}" for index in range(rows)]
+    cold_seconds, _ = timed(
+        call_all, credentials.verify, [(user, "password") for user in usernames]
+    )
+    cached_seconds, _ = timed(
+        call_all, credentials.verify, [(user, "password") for user in usernames * 100]
+    )
+    report("CredentialStore.verify, cold", rows, cold_seconds)
+    report("CredentialStore.verify, cached", rows * 100, cached_seconds)
+
+    async def login_storm(executor):
+        credentials.executor = executor
+        credentials.cache_clear()
+        loop = asyncio.get_running_loop()
+        lag = []
+
+        async def heartbeat():
+            # Event loop responsiveness while the storm is verified.
+            while True:
+                start = loop.time()
+                await asyncio.sleep(0.001)
+                lag.append(loop.time() - start - 0.001)
+
+        async def login(user):
+            start = loop.time()
+            await credentials.averify(user, "password")
+            return loop.time() - start
+
+        beat = asyncio.ensure_future(heartbeat())
+        latencies = await asyncio.gather(*map(login, usernames))
+        beat.cancel()
+        return latencies, lag
+
+    for name, executor_class in (
+        ("threads", ThreadPoolExecutor),
+        ("processes", ProcessPoolExecutor),
+    ):
+        with executor_class(os.cpu_count()) as executor:
+            seconds, (latencies, lag) = timed(asyncio.run, login_storm(executor))
+        report(f"CredentialStore.averify, {name}", rows, seconds)
+        print(f"login {percentiles(latencies)}, loop lag {percentiles(lag or [0])}")
+
+
+def benchmark_settlement(rows=1_000_000, accounts=1_000_000):
+    """
+    End-of-day settlement: BankAccount objects against the account table.
+    """
+    rng = random.Random(0)
+    ledger = Ledger(opening_balance=1_000_000)
+    for account in range(accounts):
+        ledger.open_account(account)
+    table = AccountTable.from_ledger(ledger)
+    for account in range(0, accounts, 3):
+        table.tiers[account] = 1
+    for _ in range(rows):
+        amount = rng.randrange(1, 10000)
+        ledger.transfer(
+            rng.randrange(accounts), rng.randrange(accounts), amount, amount // 50, 0
+        )
+    schedules = [NO_FEES, FeeSchedule(500, 10, 100_000_000)]
+    journal = ledger.journal
+
+    def settle_objects():
+        bank_accounts = [
+            BankAccount(account, from_cents(balance))
+            for account, balance in enumerate(table.balances)
+        ]
+        for sender, receiver, amount, fee in zip(
+            journal.senders, journal.receivers, journal.amounts, journal.fees
+        ):
+            bank_accounts[sender].balance -= from_cents(amount + fee)
+            bank_accounts[receiver].balance += from_cents(amount)
+        for bank_account, tier in zip(bank_accounts, table.tiers):
+            bank_account.balance -= from_cents(
+                schedule_fee(to_cents(bank_account.balance), schedules[tier])
+            )
+        return bank_accounts
+
+    objects_seconds, bank_accounts = timed(settle_objects)
+    table_seconds, result = timed(table.settle, journal, schedules)
+    report("BankAccount objects", rows + accounts, objects_seconds)
+    report("AccountTable.settle", rows + accounts, table_seconds)
+    mismatched = table.reconcile(bank_accounts)
+    print(
+        f"{result.transfers:,} transfers, {from_cents(result.fees_cents):,} fees,"
+        f" {len(mismatched):,} mismatched BankAccount balances"
+    )
+
+
+def scan_add_product(items, product, quantity):
+    """
+    The list scan ShoppingCart.add_product used before lines were indexed.
+    """
+    for item in items:
+        if item["product"] == product:
+            item["quantity"] += quantity
+            break
+    else:
+        items.append({"product": product, "quantity": quantity})
+
+
+def benchmark_cart(rows=5000):
+    """
+    Shopping cart: adding to and totalling a cart of rows lines.
+    """
+    products = [
+        Product(f"Product {index}", index % 100 + 0.99) for index in range(rows)
+    ]
+    rng = random.Random(0)
+    updates = [(rng.choice(products), rng.randrange(1, 5)) for _ in range(rows)]
+
+    def scan():
+        items = []
+        for product in products:
+            scan_add_product(items, product, 1)
+        for product, quantity in updates:
+            scan_add_product(items, product, quantity)
+        return sum(to_cents(item["product"].price) * item["quantity"] for item in items)
+
+    def indexed():
+        cart = ShoppingCart()
+        for product in products:
+            cart.add_product(product, 1)
+        for product, quantity in updates:
+            cart.add_product(product, quantity)
+        return cart.total_cents()
+
+    scan_seconds, scan_total = timed(scan)
+    indexed_seconds, indexed_total = timed(indexed)
+    assert scan_total == indexed_total
+    report("list scan add_product", 2 * rows, scan_seconds)
+    report("ShoppingCart.add_product", 2 * rows, indexed_seconds)
+
+    guest_cart = ShoppingCart()
+    guest_cart.add_products(updates)
+    cart = ShoppingCart()
+    cart.add_products((product, 1) for product in products)
+    seconds, _ = timed(cart.merge, guest_cart)
+    report("ShoppingCart.merge", len(guest_cart.quantities), seconds)
+    assert cart.total_cents() == indexed_total
+
+
+class DictProduct:  # pylint: disable=too-few-public-methods
+    """
+    A Product with a __dict__, like the ones carts held before the catalog.
+    """
+
+    def __init__(self, name, price):
+        """
+        Set the product details.
+        """
+        self.name = name
+        self.price = price
+
+
+def traced_bytes(function):
+    """
+    Calls the function, returning the bytes still allocated by its result.
+    """
+    tracemalloc.start()
+    try:
+        result = function()
+        return tracemalloc.get_traced_memory()[0], result
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_cart_memory(rows=100_000, lines=5, products=1000):
+    """
+    Shopping cart memory: per-cart products against a shared catalog.
+    """
+    rng = random.Random(0)
+    carts = [
+        [(rng.randrange(products), rng.randrange(1, 5)) for _ in range(lines)]
+        for _ in range(rows)
+    ]
+
+    def copied_carts():
+        return [
+            [
+                {"product": DictProduct(f"Product {index}", 9.99), "quantity": quantity}
+                for index, quantity in cart
+            ]
+            for cart in carts
+        ]
+
+    def catalog_carts():
+        catalog = ProductCatalog()
+        shared = [catalog.intern(f"Product {index}", 9.99) for index in range(products)]
+        shopping_carts = []
+        for cart in carts:
+            shopping_cart = ShoppingCart(catalog)
+            shopping_cart.add_products(
+                (shared[index], quantity) for index, quantity in cart
+            )
+            shopping_carts.append(shopping_cart)
+        return shopping_carts
+
+    for name, function in (
+        ("copied products", copied_carts),
+        ("catalog ShoppingCart", catalog_carts),
+    ):
+        seconds, (size, _) = timed(traced_bytes, function)
+        report(name, rows, seconds)
+        print(f"{size:,} bytes, {size / rows:,.0f} bytes per cart")
+
+
+def random_carts(rows, lines, products):
+    """
+    Returns a catalog of products and rows carts of random lines.
+    """
+    rng = random.Random(0)
+    catalog = ProductCatalog()
+    shared = [catalog.intern(f"Product {index}", 9.99) for index in range(products)]
+    carts = []
+    for _ in range(rows):
+        cart = ShoppingCart(catalog)
+        cart.add_products(
+            (rng.choice(shared), rng.randrange(1, 10)) for _ in range(lines)
+        )
+        carts.append(cart)
+    return catalog, carts
+
+
+def benchmark_cart_codec(rows=100_000, lines=8, products=1000):
+    """
+    Cart persistence: varint encoding against pickle and JSON.
+    """
+    catalog, carts = random_carts(rows, lines, products)
+    items = [cart.items for cart in carts]
+    formats = (
+        ("pickle", pickle.dumps, pickle.loads, items),
+        (
+            "json",
+            json.dumps,
+            json.loads,
+            [
+                [
+                    [item["product"].name, item["product"].price, item["quantity"]]
+                    for item in cart_items
+                ]
+                for cart_items in items
+            ],
+        ),
+        ("varint", encode_cart, lambda data: decode_cart(data, catalog), carts),
+    )
+    for name, encode, decode, values in formats:
+        encode_seconds, encoded = timed(list, map(encode, values))
+        decode_seconds, _ = timed(list, map(decode, encoded))
+        report(f"{name} encode", rows, encode_seconds)
+        report(f"{name} decode", rows, decode_seconds)
+        print(f"{sum(map(len, encoded)) / rows:,.1f} bytes per cart")
+
+
+def benchmark_checkout(rows=100_000, lines=8, products=1000):
+    """
+    Checkout pricing: step by step functions against the one-pass pipeline.
+    """
+    _, carts = random_carts(rows, lines, products)
+    weights = {product: 0.25 for product in carts[0].catalog.names.values()}
+
+    def step_by_step():
+        totals = []
+        for cart in carts:
+            cart.total_cents()
+            items = [
+                {
+                    "price": item["product"].price,
+                    "quantity": item["quantity"],
+                    "weight": weights[item["product"]] * item["quantity"],
+                }
+                for item in cart.items
+            ]
+            order_total = calculate_order_total(items)
+            discounted = order_total - calculate_total_discount(order_total)
+            totals.append(
+                [
+                    discounted + calculate_items_shipping_cost(items, method)
+                    for method in ("standard", "express")
+                ]
+            )
+        return totals
+
+    steps_seconds, _ = timed(step_by_step)
+    pipeline_seconds, _ = timed(price_carts, carts, weights)
+    report("step by step functions", rows, steps_seconds)
+    report("price_carts", rows, pipeline_seconds)
+
+
+def benchmark_inventory(rows=200_000, titles=10_000, hot=10):
+    """
+    Inventory: concurrent reservations with most lines on a few hot books.
+    """
+    rng = random.Random(0)
+    orders = [
+        [
+            (
+                f"Book {rng.randrange(hot) if rng.random() < 0.8 else rng.randrange(titles)}",
+                rng.randrange(1, 3),
+            )
+            for _ in range(3)
+        ]
+        for _ in range(rows)
+    ]
+
+    for thread_count in (1, 4, 16):
+        stock = StockTable()
+        books = [
+            Book(f"Book {index}", "Author", 9.99, rows // 2) for index in range(titles)
+        ]
+        for book in books:
+            stock.add_book(book)
+        sold = array("q", [0]) * thread_count
+
+        def worker(index, stock=stock, sold=sold, thread_count=thread_count):
+            for lines in orders[index::thread_count]:
+                reservation = stock.reserve(lines)
+                if reservation.reservation_id is not None:
+                    stock.fulfill(reservation)
+                    sold[index] += sum(quantity for _, quantity in reservation.lines)
+
+        def run(worker=worker, thread_count=thread_count):
+            threads = [
+                threading.Thread(target=worker, args=(index,))
+                for index in range(thread_count)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        seconds, _ = timed(run)
+        on_hand = sum(book.quantity for book in books)
+        assert min(book.quantity for book in books) >= 0
+        assert on_hand == titles * (rows // 2) - sum(sold)
+        report(f"StockTable, {thread_count} threads", rows, seconds)
+
+
+def benchmark_cart_threads(rows=400_000, products=16):
+    """
+    Shopping cart: concurrent updates of one cart, checking none is lost.
+    """
+    catalog = ProductCatalog()
+    shared = [catalog.intern(f"Product {index}", 1.5) for index in range(products)]
+
+    for thread_count in (1, 4, 16, 64):
+        cart = ShoppingCart(catalog)
+        chunk = rows // thread_count
+
+        def worker(index, cart=cart, chunk=chunk):
+            product = shared[index % products]
+            for _ in range(chunk // 2):
+                cart.add_product(product, 2)
+                cart.remove_product(product, 1)
+
+        def run(worker=worker, thread_count=thread_count):
+            threads = [
+                threading.Thread(target=worker, args=(index,))
+                for index in range(thread_count)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        previous_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+        try:
+            seconds, _ = timed(run)
+        finally:
+            sys.setswitchinterval(previous_interval)
+        expected = thread_count * (chunk // 2)
+        lost = expected - sum(cart.snapshot().values())
+        assert lost == 0 and cart.total_cents() == 150 * expected
+        report(f"ShoppingCart, {thread_count} threads", rows, seconds)
+
+
+class StringElevator:
+    """
+    ElevatorSystem as it was before the transition table, with string states.
+    """
+
+    def __init__(self):
+        """
+        Defines the elevator initial state.
+        """
+        self.state = "Idle"
+
+    def move_up(self):
+        """
+        Function to move up the elevator.
+        """
+        if self.state == "Idle":
+            self.state = "Moving Up"
+            return "Elevator moving up"
+
+        return "Invalid operation in current state"
+
+    def move_down(self):
+        """
+        Function to move down the elevator.
+        """
+        if self.state == "Idle":
+            self.state = "Moving Down"
+            return "Elevator moving down"
+
+        return "Invalid operation in current state"
+
+    def stop(self):
+        """
+        Function to stop the elevator.
+        """
+        if self.state in ["Moving Up", "Moving Down"]:
+            self.state = "Idle"
+            return "Elevator stopped"
+
+        return "Invalid operation in current state"
+
+
+def benchmark_fsm(rows=1_000_000):
+    """
+    State machines: string if chains against the compiled transition table.
+    """
+    rng = random.Random(0)
+    events = [rng.choice(("move_up", "move_down", "stop")) for _ in range(rows)]
+    codes = [ElevatorSystem.MACHINE.event_codes[event] for event in events]
+
+    for name, elevator in (
+        ("string if chain", StringElevator()),
+        ("ElevatorSystem", ElevatorSystem()),
+    ):
+        methods = [getattr(elevator, event) for event in events]
+        seconds, _ = timed(call_each, methods)
+        report(name, rows, seconds)
+
+    elevator = ElevatorSystem()
+    seconds, _ = timed(call_all, elevator.fire, [(code,) for code in codes])
+    report("TableDrivenMachine.fire", rows, seconds)
+
+    machine = ElevatorSystem.MACHINE
+    table, event_count = machine.table, machine.event_count
+
+    def raw_table():
+        state = 0
+        for event in codes:
+            next_state = table[state * event_count + event]
+            if next_state >= 0:
+                state = next_state
+        return state
+
+    seconds, _ = timed(raw_table)
+    report("StateMachine.table lookup", rows, seconds)
+
+
+def benchmark_fleet(rows=2_000_000, instances=1_000_000):
+    """
+    Event replay over many vending machines: objects against a MachineFleet.
+    """
+    rng = random.Random(0)
+    instance_ids = array("q", (rng.randrange(instances) for _ in range(rows)))
+    events = array("b", (rng.randrange(2) for _ in range(rows)))
+
+    machine_bytes, machines = traced_bytes(
+        lambda: [VendingMachine() for _ in range(instances)]
+    )
+    print(
+        f"{machine_bytes:,} bytes, {machine_bytes / instances:,.0f} bytes per machine"
+    )
+    seconds, _ = timed(
+        call_all,
+        lambda instance_id, event: machines[instance_id].fire(event),
+        zip(instance_ids, events),
+    )
+    report("VendingMachine.fire", rows, seconds)
+    seconds, histogram = timed(Counter, (machine.state for machine in machines))
+    report("Counter of object states", instances, seconds)
+
+    fleet = MachineFleet(VendingMachine, instances)
+    size = len(fleet.states) * fleet.states.itemsize
+    print(f"{size:,} bytes, {size / instances:,.0f} bytes per fleet instance")
+    seconds, _ = timed(fleet.apply, instance_ids, events)
+    report("MachineFleet.apply", rows, seconds)
+    seconds, _ = timed(fleet.replay, zip(instance_ids, events))
+    report("MachineFleet.replay of pairs", rows, seconds)
+    seconds, _ = timed(fleet.broadcast, VendingMachine.INSERT_COIN)
+    report("MachineFleet.broadcast", instances, seconds)
+    seconds, fleet_histogram = timed(fleet.histogram)
+    report("MachineFleet.histogram", instances, seconds)
+    assert sum(fleet_histogram.values()) == sum(histogram.values())
+
+
+def tick_lights(lights, phase_seconds, seconds):
+    """
+    Baseline: counts down the phase of every light every simulated second.
+    """
+    remaining = [phase_seconds[light.state_code] for light in lights]
+    events = 0
+    for _ in range(seconds):
+        for index, light in enumerate(lights):
+            remaining[index] -= 1
+            if not remaining[index]:
+                light.change_state()
+                remaining[index] = phase_seconds[light.state_code]
+                events += 1
+
+    return events
+
+
+def benchmark_traffic(rows=20_000, seconds=600):
+    """
+    Traffic lights: ticking every second against the discrete-event scheduler.
+    """
+    lights = [TrafficLight() for _ in range(rows)]
+    tick_seconds, events = timed(tick_lights, lights, DEFAULT_PHASE_SECONDS, seconds)
+    report("ticking every second", events, tick_seconds)
+
+    simulation = TrafficSimulation()
+    for corridor in range(rows // 100):
+        simulation.add_green_wave(100, 5 + corridor % 10)
+    run = simulation.run(seconds)
+    report("TrafficSimulation.run", run.events, run.wall_seconds)
+    print(f"{run.events_per_second():,.0f} events/s, {simulation.histogram()}")
+
+
+BENCHMARKS = {
+    "cart": benchmark_cart,
+    "cart_codec": benchmark_cart_codec,
+    "cart_memory": benchmark_cart_memory,
+    "cart_threads": benchmark_cart_threads,
+    "checkout": benchmark_checkout,
+    "credentials": benchmark_credentials,
+    "dates": benchmark_dates,
+    "fleet": benchmark_fleet,
+    "fsm": benchmark_fsm,
+    "inventory": benchmark_inventory,
+    "journal": benchmark_journal,
+    "ledger": benchmark_ledger,
+    "ledger_threads": benchmark_ledger_threads,
+    "loans": benchmark_loans,
+    "luhn": benchmark_luhn,
+    "memoization": benchmark_memoization,
+    "sessions": benchmark_sessions,
+    "settlement": benchmark_settlement,
+    "traffic": benchmark_traffic,
+    "money": benchmark_money,
+    "weather": benchmark_weather,
+}
+
+
+def main(argv=None):
+    """
+    Application entrypoint.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS) + ["all"])
+    parser.add_argument("--rows", type=int, help="defaults to each benchmark's size")
+    args = parser.parse_args(argv)
+
+    names = sorted(BENCHMARKS) if args.benchmark == "all" else [args.benchmark]
+    for name in names:
+        print(f"# {name}: {BENCHMARKS[name].__doc__.strip()}")
+        if args.rows is None:
+            BENCHMARKS[name]()
+        else:
+            BENCHMARKS[name](args.rows)
+
+
+if __name__ == "__main__":
+    main()
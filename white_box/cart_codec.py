@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compact binary encoding of shopping carts for session persistence.
+"""
+from class_exercises import PRODUCT_CATALOG, Product, ShoppingCart
+from money import from_cents, to_cents
+
+# An encoded cart is the format byte, the number of lines and then the product
+# name and quantity of every line. Numbers are unsigned LEB128 varints and a
+# name is its UTF-8 length followed by its UTF-8 bytes. Names are stable
+# across processes, unlike catalog ids, which depend on the order products
+# were first used: carts are decoded against the interned products of a
+# catalog, whichever process built it.
+# Products that are not interned in the cart catalog have their price, in
+# cents, stored after the quantity. The quantity varint holds quantity << 1,
+# its low bit being set on those lines.
+CART_FORMAT = 3
+
+VARINT_LIMIT = 0x80
+
+
+def encode_varint(value, out):
+    """
+    Appends an unsigned varint to a bytearray.
+    """
+    if value < 0:
+        raise ValueError(f"Negative varint: {value}")
+
+    while value >= VARINT_LIMIT:
+        out.append(value & 0x7F | VARINT_LIMIT)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(view, position):
+    """
+    Reads an unsigned varint at a position of a memoryview.
+    Returns the value and the position after it.
+    """
+    result = shift = 0
+    while True:
+        try:
+            byte = view[position]
+        except IndexError:
+            raise ValueError("Truncated cart data") from None
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if byte < VARINT_LIMIT:
+            return result, position
+        shift += 7
+
+
+def encode_cart(cart):
+    """
+    Encodes the lines of a cart as bytes. Products interned in the cart
+    catalog are stored by name, other products by name and price.
+    """
+    names = cart.catalog.names
+    out = bytearray((CART_FORMAT,))
+    quantities = cart.snapshot()
+    encode_varint(len(quantities), out)
+    for product, quantity in quantities.items():
+        name = product.name.encode("utf-8")
+        encode_varint(len(name), out)
+        out += name
+        if names.get(product.name) is product:
+            encode_varint(quantity << 1, out)
+        else:
+            encode_varint(quantity << 1 | 1, out)
+            encode_varint(to_cents(product.price), out)
+    return bytes(out)
+
+
+def iter_lines(data):
+    """
+    Yields the (product name, quantity, price in cents) lines of an encoded
+    cart, the price being None for the products interned in the catalog.
+    Data may be any bytes-like object, such as a memoryview slice of a
+    larger buffer, and is read in place.
+    """
+    view = memoryview(data).cast("B")
+    if not view or view[0] != CART_FORMAT:
+        raise ValueError("Unknown cart format")
+
+    count, position = decode_varint(view, 1)
+    size = len(view)
+    for _ in range(count):
+        # Names shorter than 128 bytes and quantities below 64 are the
+        # common case, their varints being one byte.
+        length = view[position] if position < size else VARINT_LIMIT
+        if length < VARINT_LIMIT:
+            position += 1
+        else:
+            length, position = decode_varint(view, position)
+        end = position + length
+        if end >= size:
+            raise ValueError("Truncated cart data")
+        try:
+            name = str(view[position:end], "utf-8")
+        except UnicodeDecodeError:
+            raise ValueError("Invalid product name") from None
+        quantity = view[end]
+        if quantity < VARINT_LIMIT:
+            position = end + 1
+        else:
+            quantity, position = decode_varint(view, end)
+        price_cents = None
+        if quantity & 1:
+            price_cents, position = decode_varint(view, position)
+        yield name, quantity >> 1, price_cents
+
+    if position != len(view):
+        raise ValueError("Trailing cart data")
+
+
+def decode_cart(data, catalog=None):
+    """
+    Decodes an encoded cart against the interned products of its catalog.
+    Lines stored with a price are decoded to new products of the catalog,
+    which are not interned. The subtotal is computed the first time the cart
+    total is needed.
+    """
+    catalog = PRODUCT_CATALOG if catalog is None else catalog
+    names = catalog.names
+    quantities = {}
+    for name, quantity, price_cents in iter_lines(data):
+        if price_cents is not None:
+            product = Product(name, from_cents(price_cents), catalog)
+        else:
+            product = names.get(name)
+            if product is None:
+                raise ValueError(f"Unknown product: {name}")
+        if quantity < 1 or product in quantities:
+            raise ValueError("Invalid cart line")
+
+        quantities[product] = quantity
+
+    cart = ShoppingCart(catalog)
+    cart.quantities = quantities
+    # Catalog price versions never go below 0, so the cart is repriced.
+    cart.priced_version = -1
+    return cart
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""
+Checkout pricing pipeline: line tiers, order discount and shipping in one pass.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+from class_exercises import (
+    calculate_total_discount_cents,
+    quantity_discount_basis_points,
+)
+from money import percent_of_cents, to_cents
+
+# Shipping, in cents, of calculate_items_shipping_cost by method, for orders
+# weighing up to 5, up to 10 and over 10.
+SHIPPING_RATES_CENTS = {"standard": (1000, 1500, 2000), "express": (2000, 3000, 4000)}
+
+LinePrice = namedtuple(
+    "LinePrice",
+    ["product", "quantity", "unit_cents", "line_cents", "discount_cents"],
+)
+
+
+class PriceBreakdown(
+    namedtuple(
+        "PriceBreakdown",
+        [
+            "lines",
+            "subtotal_cents",
+            "line_discount_cents",
+            "order_discount_cents",
+            "total_cents",
+            "weight",
+            "shipping_cents",
+        ],
+    )
+):
+    """
+    Price of a cart: its priced lines, the subtotal, the quantity tier and
+    order discounts, the discounted total, and the shipping of every method.
+    """
+
+    __slots__ = ()
+
+    def grand_total_cents(self, shipping_method):
+        """
+        Discounted total plus the shipping of a method.
+        """
+        try:
+            return self.total_cents + self.shipping_cents[shipping_method]
+        except KeyError:
+            raise ValueError("Invalid shipping method") from None
+
+
+# Read-only shipping of every method, by weight band.
+SHIPPING_BANDS = tuple(
+    MappingProxyType(
+        {method: rates[band] for method, rates in SHIPPING_RATES_CENTS.items()}
+    )
+    for band in range(3)
+)
+
+
+def shipping_cents(weight):
+    """
+    Shipping, in cents, of an order weight for every shipping method.
+    """
+    return SHIPPING_BANDS[0 if weight <= 5 else 1 if weight <= 10 else 2]
+
+
+def price_line(product, quantity, unit_cents):
+    """
+    Prices a line, with its quantity tier discount.
+    """
+    price_cents = unit_cents.get(product)
+    if price_cents is None:
+        price_cents = unit_cents[product] = to_cents(product.price)
+
+    line_cents = price_cents * quantity
+    return LinePrice(
+        product,
+        quantity,
+        price_cents,
+        line_cents,
+        percent_of_cents(line_cents, quantity_discount_basis_points(quantity)),
+    )
+
+
+def price_lines(lines, weights=None, unit_cents=None, line_prices=None):
+    """
+    Prices (product, quantity) lines in one pass. weights maps products to
+    their unit weight (0 if missing). unit_cents caches product prices in
+    cents and line_prices the priced lines, so that carts priced with the
+    same caches, as price_carts does, price each distinct line once.
+    """
+    unit_cents = {} if unit_cents is None else unit_cents
+    line_prices = {} if line_prices is None else line_prices
+    priced = []
+    subtotal_cents = line_discount_cents = 0
+    weight = 0
+    for line in lines:
+        line_price = line_prices.get(line)
+        if line_price is None:
+            line_price = line_prices[line] = price_line(*line, unit_cents)
+
+        priced.append(line_price)
+        subtotal_cents += line_price.line_cents
+        line_discount_cents += line_price.discount_cents
+        if weights:
+            weight += weights.get(line[0], 0) * line[1]
+
+    discounted_cents = subtotal_cents - line_discount_cents
+    order_discount_cents = calculate_total_discount_cents(discounted_cents)
+    return PriceBreakdown(
+        tuple(priced),
+        subtotal_cents,
+        line_discount_cents,
+        order_discount_cents,
+        discounted_cents - order_discount_cents,
+        weight,
+        shipping_cents(weight),
+    )
+
+
+def cart_lines(cart):
+    """
+    The (product, quantity) lines of a ShoppingCart, in order.
+    """
+    return cart.snapshot().items()
+
+
+def price_cart(cart, weights=None):
+    """
+    Prices a ShoppingCart.
+    """
+    return price_lines(cart_lines(cart), weights)
+
+
+def price_carts(carts, weights=None, prices=None):
+    """
+    Prices many carts, such as for a price change simulation: prices maps
+    products to the price, in dollars, to use instead of their own. Product
+    prices are converted to cents, and each distinct line priced, once for
+    the whole batch.
+    """
+    unit_cents = {}
+    if prices is not None:
+        unit_cents = {product: to_cents(price) for product, price in prices.items()}
+
+    line_prices = {}
+    return [
+        price_lines(cart_lines(cart), weights, unit_cents, line_prices)
+        for cart in carts
+    ]
@@ -1,9 +1,33 @@
 # -*- coding: utf-8 -*-
+# pylint: disable=too-many-lines
 
 """
 White-box code examples.
 """
+import asyncio
+import hashlib
+import heapq
+import hmac
+import itertools
+import operator
+import os
 import re
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from ledger import (
+    TRANSFER_INSUFFICIENT_FUNDS,
+    TRANSFER_MESSAGES,
+    TRANSFER_OK,
+    Ledger,
+    TransferResult,
+    apply_transfer_batch,
+    check_transfer,
+    transfer_entry,
+)
+from money import from_cents, percent_of_cents, to_cents
 
 
 def is_even(num):
@@ -98,6 +122,19 @@ def calculate_total_discount(total_amount):
     return 0.2 * total_amount
 
 
+def calculate_total_discount_cents(total_cents):
+    """
+    Integer cents version of calculate_total_discount.
+    """
+    if total_cents < 10000:
+        return 0
+
+    if total_cents <= 50000:
+        return percent_of_cents(total_cents, 1000)
+
+    return percent_of_cents(total_cents, 2000)
+
+
 # 4
 def calculate_order_total(items):
     """
@@ -122,6 +159,35 @@ def calculate_order_total(items):
     return total_price
 
 
+# Quantity discount, in basis points, of calculate_order_total.
+def quantity_discount_basis_points(quantity):
+    """
+    Returns the calculate_order_total line discount for a quantity.
+    """
+    if 1 <= quantity <= 5:
+        return 0
+
+    if 6 <= quantity <= 10:
+        return 500
+
+    return 1000
+
+
+def calculate_order_total_cents(items):
+    """
+    Integer cents version of calculate_order_total.
+    Each item has a "price_cents" instead of a "price"; every line discount
+    is rounded to the cent, half cents in favor of the customer.
+    """
+    total_cents = 0
+    for item in items:
+        line_cents = item["quantity"] * item["price_cents"]
+        discount = quantity_discount_basis_points(item["quantity"])
+        total_cents += line_cents - percent_of_cents(line_cents, discount)
+
+    return total_cents
+
+
 # 5
 def calculate_items_shipping_cost(items, shipping_method):
     """
@@ -214,23 +280,58 @@ def celsius_to_fahrenheit(celsius):
 
 
 # 11
-def validate_credit_card(card_number):
+def validate_credit_card(card_number, luhn=False):
     """
-    Validates credit card numbers.
+    Validates credit card numbers of ASCII digits, optionally checking the
+    Luhn checksum.
     """
-    if 13 <= len(card_number) <= 16 and card_number.isdigit():
-        return "Valid Card"
+    if 13 <= len(card_number) <= 16 and card_number.isascii() and card_number.isdigit():
+        if not luhn or is_luhn_valid(card_number):
+            return "Valid Card"
 
     return "Invalid Card"
 
 
+# Digit values after the Luhn doubling (2 * d, minus 9 when above 9).
+LUHN_DOUBLED_DIGITS = str.maketrans("0123456789", "0246813579")
+
+
+def is_luhn_valid(card_number):
+    """
+    Checks the Luhn checksum of a string of digits.
+    """
+    total = sum(map(int, card_number[-1::-2]))
+    total += sum(map(int, card_number[-2::-2].translate(LUHN_DOUBLED_DIGITS)))
+    return total % 10 == 0
+
+
 # 12
-def validate_date(year, month, day):
+# Days per month in common and leap years, indexed by month (0 is unused).
+DAYS_IN_MONTH = (
+    (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31),
+    (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31),
+)
+
+# Leap year flag of every year from 1900 to 2100, indexed by year - 1900.
+LEAP_YEARS = bytes(
+    year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) for year in range(1900, 2101)
+)
+
+
+def validate_date(year, month, day, calendar=False):
     """
     Validates dates.
+    The calendar mode also checks the month length, including leap years,
+    and that every part is a whole number: 2024.0 is the year 2024, while
+    fractional parts are invalid.
     """
     if 1900 <= year <= 2100 and 1 <= month <= 12 and 1 <= day <= 31:
-        return "Valid Date"
+        if not calendar:
+            return "Valid Date"
+
+        if year % 1 == month % 1 == day % 1 == 0:
+            if day <= DAYS_IN_MONTH[LEAP_YEARS[int(year) - 1900]][int(month)]:
+                return "Valid Date"
 
     return "Invalid Date"
 
@@ -247,11 +348,20 @@ def check_flight_eligibility(age, frequent_flyer):
 
 
 # 14
-def validate_url(url):
+def validate_url(url, strict=False):
     """
     Validates URLs.
+    By default the length limit only applies to "http://" URLs (operator
+    precedence of the original check); strict mode applies it to both schemes.
     """
-    if len(url) <= 255 and url.startswith("http://") or url.startswith("https://"):
+    if strict:
+        valid = len(url) <= 255 and url.startswith(("http://", "https://"))
+    else:
+        valid = (
+            len(url) <= 255 and url.startswith("http://") or url.startswith("https://")
+        )
+
+    if valid:
         return "Valid URL"
 
     return "Invalid URL"
@@ -336,12 +446,18 @@ def grade_quiz(correct_answers, incorrect_answers):
 
 
 # 20
-def authenticate_user(username, password):
+def authenticate_user(username, password, credentials=None):
     """
     Authenticates users based on their username and password.
+    With a CredentialStore, the admin password is checked against its hash.
     """
-    if username == "admin" and password == "admin123":
-        return "Admin"
+    if username == "admin":
+        if credentials is None:
+            is_admin = password == "admin123"
+        else:
+            is_admin = credentials.verify(username, password)
+        if is_admin:
+            return "Admin"
 
     if len(username) >= 5 and len(password) >= 8:
         return "User"
@@ -363,62 +479,162 @@ def get_weather_advisory(temperature, humidity):
     return "No Specific Advisory"
 
 
-# 22
-class VendingMachine:
+class StateMachine:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
     """
-    A simple vending machine that dispenses drinks.
-    It has two states: "Ready" and "Dispensing."
+    Transition table compiled to integer codes. States and events are
+    numbered in the order given, the first state being the initial one, and
+    table[state * number of events + event] is the next state, or -1 when the
+    event is invalid in that state. results holds what each transition
+    returns, the invalid result for invalid events. transitions[event] binds
+    the row of an event up front: the (next state, result) pair of every
+    state, invalid events keeping the state, which event_method() turns
+    into a method doing one tuple lookup.
     """
 
-    def __init__(self):
+    def __init__(self, states, events, transitions, invalid=None):
         """
-        Defines the vending machine initial state.
+        Compile {(state, event): (next state, result)} transitions.
         """
-        self.state = "Ready"
+        if not 0 < len(states) <= 127:
+            raise ValueError("A machine has between 1 and 127 states")
+
+        self.states = tuple(states)
+        self.events = tuple(events)
+        self.state_codes = {state: code for code, state in enumerate(self.states)}
+        self.event_codes = {event: code for code, event in enumerate(self.events)}
+        self.event_count = len(self.events)
+        self.table = array("b", [-1]) * (len(self.states) * self.event_count)
+        self.results = [invalid] * len(self.table)
+        for (state, event), (next_state, result) in transitions.items():
+            index = self.state_codes[state] * self.event_count + self.event_codes[event]
+            self.table[index] = self.state_codes[next_state]
+            self.results[index] = result
+        self.transitions = [
+            tuple(
+                (
+                    state if self.table[index] < 0 else self.table[index],
+                    self.results[index],
+                )
+                for state, index in enumerate(
+                    range(event, len(self.table), self.event_count)
+                )
+            )
+            for event in range(self.event_count)
+        ]
 
-    def insert_coin(self):
+    def event_method(self, event, doc=None):
         """
-        Function called when a coin is inserted.
+        Returns a method applying an event to a TableDrivenMachine, its
+        transitions bound in the method instead of looked up by fire().
         """
-        if self.state == "Ready":
-            self.state = "Dispensing"
-            return "Coin Inserted. Select your drink."
+        transitions = self.transitions[self.event_codes[event]]
 
-        return "Invalid operation in current state."
+        def apply_event(machine):
+            machine.state_code, result = transitions[machine.state_code]
+            return result
 
-    def select_drink(self):
+        apply_event.__name__ = event
+        apply_event.__doc__ = doc
+        return apply_event
+
+    def state_code(self, state):
         """
-        Function called after selecting a drink.
+        Returns the code of a state.
         """
-        if self.state == "Dispensing":
-            self.state = "Ready"
-            return "Drink Dispensed. Thank you!"
-
-        return "Invalid operation in current state."
+        try:
+            return self.state_codes[state]
+        except KeyError:
+            raise ValueError(f"Unknown state: {state}") from None
 
 
-# 23
-class TrafficLight:
+class TableDrivenMachine:  # pylint: disable=too-few-public-methods
     """
-    A traffic light system with three states: "Green," "Yellow," and "Red."
+    Base class of the state machines running on a StateMachine table.
+    The state is kept as its integer code, state exposes its name.
     """
 
+    MACHINE = None
+
     def __init__(self):
         """
-        Defines the traffic light initial state.
+        Defines the initial state.
+        """
+        self.state_code = 0
+
+    @property
+    def state(self):
+        """
+        The name of the current state.
         """
-        self.state = "Red"
+        return self.MACHINE.states[self.state_code]
 
-    def change_state(self):
+    @state.setter
+    def state(self, state):
         """
-        Function that changes the traffic light state.
+        Changes the current state by name.
         """
-        if self.state == "Red":
-            self.state = "Green"
-        elif self.state == "Green":
-            self.state = "Yellow"
-        elif self.state == "Yellow":
-            self.state = "Red"
+        self.state_code = self.MACHINE.state_code(state)
+
+    def fire(self, event_code):
+        """
+        Applies an event, returns the result of the transition.
+        """
+        self.state_code, result = self.MACHINE.transitions[event_code][self.state_code]
+        return result
+
+
+# 22
+class VendingMachine(TableDrivenMachine):
+    """
+    A simple vending machine that dispenses drinks.
+    It has two states: "Ready" and "Dispensing."
+    """
+
+    INSERT_COIN, SELECT_DRINK = range(2)
+
+    MACHINE = StateMachine(
+        ("Ready", "Dispensing"),
+        ("insert_coin", "select_drink"),
+        {
+            ("Ready", "insert_coin"): (
+                "Dispensing",
+                "Coin Inserted. Select your drink.",
+            ),
+            ("Dispensing", "select_drink"): ("Ready", "Drink Dispensed. Thank you!"),
+        },
+        "Invalid operation in current state.",
+    )
+
+    insert_coin = MACHINE.event_method(
+        "insert_coin", "Function called when a coin is inserted."
+    )
+
+    select_drink = MACHINE.event_method(
+        "select_drink", "Function called after selecting a drink."
+    )
+
+
+# 23
+class TrafficLight(TableDrivenMachine):
+    """
+    A traffic light system with three states: "Green," "Yellow," and "Red."
+    """
+
+    CHANGE = 0
+
+    MACHINE = StateMachine(
+        ("Red", "Green", "Yellow"),
+        ("change",),
+        {
+            ("Red", "change"): ("Green", None),
+            ("Green", "change"): ("Yellow", None),
+            ("Yellow", "change"): ("Red", None),
+        },
+    )
+
+    change_state = MACHINE.event_method(
+        "change", "Function that changes the traffic light state."
+    )
 
     def get_current_state(self):
         """
@@ -428,132 +644,407 @@ class TrafficLight:
 
 
 # 24
-class UserAuthentication:
+class UserAuthentication(TableDrivenMachine):
     """
     A user authentication system with states "Logged Out" and "Logged In."
     """
 
-    def __init__(self):
+    LOGIN, LOGOUT = range(2)
+
+    MACHINE = StateMachine(
+        ("Logged Out", "Logged In"),
+        ("login", "logout"),
+        {
+            ("Logged Out", "login"): ("Logged In", "Login successful"),
+            ("Logged In", "logout"): ("Logged Out", "Logout successful"),
+        },
+        "Invalid operation in current state",
+    )
+
+    login = MACHINE.event_method("login", "Function to login a user.")
+
+    logout = MACHINE.event_method("logout", "Function to logout a user.")
+
+
+# 25
+class DocumentEditingSystem(TableDrivenMachine):
+    """
+    A document editing system with states "Editing" and "Saved."
+    """
+
+    SAVE, EDIT = range(2)
+
+    MACHINE = StateMachine(
+        ("Editing", "Saved"),
+        ("save", "edit"),
+        {
+            ("Editing", "save"): ("Saved", "Document saved successfully"),
+            ("Saved", "edit"): ("Editing", "Editing resumed"),
+        },
+        "Invalid operation in current state",
+    )
+
+    save_document = MACHINE.event_method("save", "Function to save a document.")
+
+    edit_document = MACHINE.event_method("edit", "Function to edit a document.")
+
+
+# 26
+class ElevatorSystem(TableDrivenMachine):
+    """
+    An elevator system with states "Idle," "Moving Up," and "Moving Down."
+    """
+
+    MOVE_UP, MOVE_DOWN, STOP = range(3)
+
+    MACHINE = StateMachine(
+        ("Idle", "Moving Up", "Moving Down"),
+        ("move_up", "move_down", "stop"),
+        {
+            ("Idle", "move_up"): ("Moving Up", "Elevator moving up"),
+            ("Idle", "move_down"): ("Moving Down", "Elevator moving down"),
+            ("Moving Up", "stop"): ("Idle", "Elevator stopped"),
+            ("Moving Down", "stop"): ("Idle", "Elevator stopped"),
+        },
+        "Invalid operation in current state",
+    )
+
+    move_up = MACHINE.event_method("move_up", "Function to move up the elevator.")
+
+    move_down = MACHINE.event_method("move_down", "Function to move down the elevator.")
+
+    stop = MACHINE.event_method("stop", "Function to stop the elevator.")
+
+
+# 27
+class BankAccount:  # pylint: disable=too-few-public-methods
+    """
+    Bank account class.
+    """
+
+    def __init__(self, account_number, balance):
         """
-        Defines the user initial state.
+        Set the bank account details.
         """
-        self.state = "Logged Out"
+        self.account_number = account_number
+        self.balance = balance
 
-    def login(self):
+    def view_account(self):
         """
-        Function to login a user.
+        Function to display the account details.
         """
-        if self.state == "Logged Out":
-            self.state = "Logged In"
-            return "Login successful"
+        print(f"The account {self.account_number} has a balance of {self.balance}")
 
-        return "Invalid operation in current state"
 
-    def logout(self):
+# Seconds a session stays active after login.
+DEFAULT_SESSION_TTL = 1800
+
+
+class SessionStore:
+    """
+    Thread-safe store of logged in users whose sessions expire after a TTL.
+    Expirations are kept in a min-heap, so expired sessions are dropped by
+    popping the heap top instead of scanning every session. Refreshed and
+    logged out sessions leave stale heap entries that are skipped on pop and
+    compacted away once they outnumber the live ones.
+    """
+
+    def __init__(self, ttl=DEFAULT_SESSION_TTL, clock=time.monotonic):
         """
-        Function to logout a user.
+        Set the default session TTL, in seconds, and the clock.
         """
-        if self.state == "Logged In":
-            self.state = "Logged Out"
-            return "Logout successful"
+        self.ttl = ttl
+        self.clock = clock
+        self.expirations = {}
+        self.heap = []
+        self.lock = threading.Lock()
 
-        return "Invalid operation in current state"
+    def _expire(self, now):
+        """
+        Drops the sessions expired at now, the lock being held.
+        Returns the number of dropped sessions.
+        """
+        heap = self.heap
+        expirations = self.expirations
+        expired = 0
+        while heap and heap[0][0] <= now:
+            expiration, username = heapq.heappop(heap)
+            if expirations.get(username) == expiration:
+                del expirations[username]
+                expired += 1
+
+        return expired
+
+    def _push(self, username, expiration):
+        """
+        Sets the expiration of a session, the lock being held.
+        """
+        self.expirations[username] = expiration
+        heapq.heappush(self.heap, (expiration, username))
+        if len(self.heap) > 2 * len(self.expirations) + 64:
+            self.heap = [
+                (expiration, user) for user, expiration in self.expirations.items()
+            ]
+            heapq.heapify(self.heap)
+
+    def login(self, username, ttl=None):
+        """
+        Starts a session. Returns False if the user already has an active one.
+        """
+        with self.lock:
+            now = self.clock()
+            self._expire(now)
+            if username in self.expirations:
+                return False
 
+            self._push(username, now + (self.ttl if ttl is None else ttl))
+            return True
 
-# 25
-class DocumentEditingSystem:
-    """
-    A document editing system with states "Editing" and "Saved."
-    """
+    def add(self, username):
+        """
+        Starts or refreshes a session, like adding to a set of users.
+        """
+        self.refresh(username)
 
-    def __init__(self):
+    def refresh(self, username, ttl=None):
         """
-        Defines the initial state.
+        Extends a session by its TTL from now, starting it if needed.
         """
-        self.state = "Editing"
+        with self.lock:
+            now = self.clock()
+            self._expire(now)
+            self._push(username, now + (self.ttl if ttl is None else ttl))
 
-    def save_document(self):
+    def logout(self, username):
         """
-        Function to save a document.
+        Ends a session. Returns False if the user had no active session.
         """
-        if self.state == "Editing":
-            self.state = "Saved"
-            return "Document saved successfully"
+        with self.lock:
+            self._expire(self.clock())
+            return self.expirations.pop(username, None) is not None
 
-        return "Invalid operation in current state"
+    def discard(self, username):
+        """
+        Ends a session if there is one, like discarding from a set.
+        """
+        self.logout(username)
 
-    def edit_document(self):
+    def expires_in(self, username):
         """
-        Function to edit a document.
+        Seconds left in a session, None if the user has no active session.
         """
-        if self.state == "Saved":
-            self.state = "Editing"
-            return "Editing resumed"
+        with self.lock:
+            now = self.clock()
+            expiration = self.expirations.get(username)
+            if expiration is None or expiration <= now:
+                return None
 
-        return "Invalid operation in current state"
+            return expiration - now
 
+    def expire(self):
+        """
+        Drops the expired sessions, returns how many were dropped.
+        """
+        with self.lock:
+            return self._expire(self.clock())
 
-# 26
-class ElevatorSystem:
+    def __contains__(self, username):
+        """
+        Checks if a user has an active session.
+        """
+        expiration = self.expirations.get(username)
+        return expiration is not None and expiration > self.clock()
+
+    def __len__(self):
+        """
+        Number of active sessions.
+        """
+        with self.lock:
+            self._expire(self.clock())
+            return len(self.expirations)
+
+
+# Passwords are stored as a random salt followed by their PBKDF2 hash.
+PASSWORD_HASH = "sha256"
+PASSWORD_SALT_BYTES = 16
+DEFAULT_HASH_ITERATIONS = 100_000
+
+# Successful verifications remembered, and for how many seconds.
+DEFAULT_VERIFY_CACHE_SIZE = 4096
+DEFAULT_VERIFY_CACHE_TTL = 60
+
+
+def hash_password(password, salt, iterations=DEFAULT_HASH_ITERATIONS):
     """
-    An elevator system with states "Idle," "Moving Up," and "Moving Down."
+    Salted PBKDF2 hash of a password, a module function so process pools can
+    run it.
     """
+    return hashlib.pbkdf2_hmac(
+        PASSWORD_HASH, password.encode("utf-8"), salt, iterations
+    )
 
-    def __init__(self):
+
+class CredentialStore:  # pylint: disable=too-many-instance-attributes
+    """
+    Thread-safe store of salted password hashes, one bytes record per user.
+    Successful verifications are remembered in a bounded LRU cache for a short
+    TTL, keyed by a keyed digest of the password rather than the password, so
+    repeated logins skip the deliberately slow hash. averify() runs the hash
+    on an executor (the loop default thread pool, or a given thread or process
+    pool) so a login storm does not block the event loop.
+    """
+
+    def __init__(
+        self,
+        iterations=DEFAULT_HASH_ITERATIONS,
+        cache_size=DEFAULT_VERIFY_CACHE_SIZE,
+        cache_ttl=DEFAULT_VERIFY_CACHE_TTL,
+        executor=None,
+        clock=time.monotonic,
+    ):  # pylint: disable=too-many-arguments
         """
-        Defines the elevator initial state.
+        Set the hash iterations, the verification cache size and TTL, the
+        executor used by averify() and the clock.
         """
-        self.state = "Idle"
+        if iterations < 1:
+            raise ValueError("Hash iterations must be positive")
+
+        self.iterations = iterations
+        self.records = {}
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.cache_key = os.urandom(32)
+        # Unknown users are checked against this record, which no password
+        # matches, so they cost one hash too and timing does not tell them.
+        self.dummy_record = os.urandom(
+            PASSWORD_SALT_BYTES + hashlib.new(PASSWORD_HASH).digest_size
+        )
+        self.executor = executor
+        self.clock = clock
+        self.lock = threading.Lock()
 
-    def move_up(self):
+    def make_record(self, password):
         """
-        Function to move up the elevator.
+        Returns the record of a password: a new salt and the salted hash.
         """
-        if self.state == "Idle":
-            self.state = "Moving Up"
-            return "Elevator moving up"
+        salt = os.urandom(PASSWORD_SALT_BYTES)
+        return salt + hash_password(password, salt, self.iterations)
 
-        return "Invalid operation in current state"
+    def set_password(self, username, password):
+        """
+        Adds a user or changes their password.
+        """
+        self.add_record(username, self.make_record(password))
 
-    def move_down(self):
+    def add_record(self, username, record):
         """
-        Function to move down the elevator.
+        Adds a user from a record made with the same iterations, to load users
+        without hashing their passwords again.
         """
-        if self.state == "Idle":
-            self.state = "Moving Down"
-            return "Elevator moving down"
+        with self.lock:
+            self.records[username] = record
+            self.cache.pop(username, None)
 
-        return "Invalid operation in current state"
+    def remove_user(self, username):
+        """
+        Removes a user. Returns False if there was no such user.
+        """
+        with self.lock:
+            self.cache.pop(username, None)
+            return self.records.pop(username, None) is not None
 
-    def stop(self):
+    def _token(self, password):
         """
-        Function to stop the elevator.
+        Keyed digest of a password, what the verification cache stores.
         """
-        if self.state in ["Moving Up", "Moving Down"]:
-            self.state = "Idle"
-            return "Elevator stopped"
+        return hmac.new(
+            self.cache_key, password.encode("utf-8"), PASSWORD_HASH
+        ).digest()
 
-        return "Invalid operation in current state"
+    def _cached(self, username, token):
+        """
+        Checks if a verification of the password is cached and fresh.
+        """
+        with self.lock:
+            entry = self.cache.get(username)
+            if entry is None or entry[1] <= self.clock():
+                return False
 
+            self.cache.move_to_end(username)
+            return hmac.compare_digest(entry[0], token)
 
-# 27
-class BankAccount:  # pylint: disable=too-few-public-methods
-    """
-    Bank account class.
-    """
+    def _check(self, username, record, token, digest):
+        """
+        Compares a computed hash with the record, caching a match.
+        """
+        if not hmac.compare_digest(record[PASSWORD_SALT_BYTES:], digest):
+            return False
 
-    def __init__(self, account_number, balance):
+        with self.lock:
+            # The password may have changed while it was being hashed.
+            if self.records.get(username) is record:
+                self.cache[username] = (token, self.clock() + self.cache_ttl)
+                self.cache.move_to_end(username)
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+        return True
+
+    def verify(self, username, password):
         """
-        Set the bank account details.
+        Checks a password, hashing it in the calling thread on a cache miss,
+        against the dummy record for an unknown user.
         """
-        self.account_number = account_number
-        self.balance = balance
+        record = self.records.get(username, self.dummy_record)
+        token = self._token(password)
+        if self._cached(username, token):
+            return True
+
+        digest = hash_password(password, record[:PASSWORD_SALT_BYTES], self.iterations)
+        return self._check(username, record, token, digest) and (
+            record is not self.dummy_record
+        )
 
-    def view_account(self):
+    async def averify(self, username, password):
         """
-        Function to display the account details.
+        Checks a password, hashing it on the executor on a cache miss,
+        against the dummy record for an unknown user.
         """
-        print(f"The account {self.account_number} has a balance of {self.balance}")
+        record = self.records.get(username, self.dummy_record)
+        token = self._token(password)
+        if self._cached(username, token):
+            return True
+
+        digest = await asyncio.get_running_loop().run_in_executor(
+            self.executor,
+            hash_password,
+            password,
+            record[:PASSWORD_SALT_BYTES],
+            self.iterations,
+        )
+        return self._check(username, record, token, digest) and (
+            record is not self.dummy_record
+        )
+
+    def cache_clear(self):
+        """
+        Forgets every cached verification.
+        """
+        with self.lock:
+            self.cache.clear()
+
+    def __contains__(self, username):
+        """
+        Checks if a user exists.
+        """
+        return username in self.records
+
+    def __len__(self):
+        """
+        Number of users.
+        """
+        return len(self.records)
 
 
 class BankingSystem:
@@ -561,20 +1052,24 @@ class BankingSystem:
     Banking system class.
     """
 
-    def __init__(self):
+    def __init__(self, ledger=None, users=None):
         """
-        Mock users.
+        Users (a CredentialStore with a mock user by default), and the account
+        ledger (a new in-memory one by default).
         """
-        self.users = {"user123": "pass123"}  # Simplified user database
-        self.logged_in_users = set()
+        if users is None:
+            users = CredentialStore()
+            users.set_password("user123", "pass123")
+        self.users = users
+        self.logged_in_users = SessionStore()
+        self.ledger = Ledger() if ledger is None else ledger
 
     def authenticate(self, username, password):
         """
         User authentication function.
         """
-        if username in self.users and self.users[username] == password:
-            if username not in self.logged_in_users:
-                self.logged_in_users.add(username)
+        if self.users.verify(username, password):
+            if self.logged_in_users.login(username):
                 print(f"User {username} authenticated successfully.")
                 return True
 
@@ -584,28 +1079,21 @@ class BankingSystem:
 
         return False
 
+    def logout(self, username):
+        """
+        User logout function.
+        """
+        return self.logged_in_users.logout(username)
+
     def transfer_money(self, sender, receiver, amount, transaction_type):
         """
         Function to perform a money transfer.
         """
-        if sender not in self.logged_in_users:
-            print("Sender not authenticated.")
-            return False
-
-        # Simulate transaction processing logic
-        if transaction_type == "regular":
-            fee = 0.02 * amount
-        elif transaction_type == "express":
-            fee = 0.05 * amount
-        elif transaction_type == "scheduled":
-            fee = 0.01 * amount
-        else:
-            print("Invalid transaction type.")
-            return False
-
-        # Simulate checking for sufficient funds
-        if BankAccount(sender, 1000).balance < (amount + fee):
-            print("Insufficient funds.")
+        status = self.process_transfer(
+            sender, receiver, amount, transaction_type
+        ).status
+        if status != TRANSFER_OK:
+            print(TRANSFER_MESSAGES[status])
             return False
 
         print(
@@ -614,19 +1102,84 @@ class BankingSystem:
         )
         return True
 
+    def process_transfer(self, sender, receiver, amount, transaction_type):
+        """
+        Function to perform a money transfer without printing.
+        Returns its TransferResult.
+        """
+        amount_cents = to_cents(amount)
+        status = self.transfer_status(sender, amount_cents, transaction_type)
+        fee_cents = 0
+        if status == TRANSFER_OK:
+            entry = transfer_entry(sender, receiver, amount_cents, transaction_type)
+            fee_cents = entry[3]
+            if not self.ledger.transfer(*entry):
+                status = TRANSFER_INSUFFICIENT_FUNDS
+
+        return TransferResult(sender, receiver, amount_cents, fee_cents, status)
+
+    def transfer_status(self, sender, amount_cents, transaction_type):
+        """
+        Function to check a transfer without applying it, returns its status.
+        """
+        return check_transfer(
+            sender in self.logged_in_users, amount_cents, transaction_type
+        )
+
+    def transfer_batch(self, transfers):
+        """
+        Function to perform many (sender, receiver, amount, transaction_type)
+        money transfers at once, all-or-nothing, checking once per sender
+        that it is logged in.
+        Returns a TransferBatchResult with one TransferResult per transfer.
+        """
+        return apply_transfer_batch(
+            self.ledger, transfers, lambda sender: sender in self.logged_in_users
+        )
+
 
 # 28
 class Product:  # pylint: disable=too-few-public-methods
     """
     Product class.
+    Products have no __dict__. The catalog of a product, the one it was
+    interned in or the one of the first cart it was added to, gets a new
+    price_version on every price change, so its carts know when to reprice
+    their lines.
     """
 
-    def __init__(self, name, price):
+    __slots__ = ("name", "_price", "catalog")
+
+    def __init__(self, name, price, catalog=None):
         """
         Set the product details.
         """
         self.name = name
-        self.price = price
+        self._price = price
+        self.catalog = catalog
+
+    @property
+    def price(self):
+        """
+        The product price, in dollars.
+        """
+        return self._price
+
+    @price.setter
+    def price(self, price):
+        """
+        Changes the product price, repricing every cart holding it.
+        """
+        self._price = price
+        if self.catalog is not None:
+            self.catalog.price_changed()
+
+    def __reduce__(self):
+        """
+        Pickles the name and price only, an unpickled product having no
+        catalog.
+        """
+        return Product, (self.name, self._price)
 
     def view_product(self):
         """
@@ -637,39 +1190,233 @@ class Product:  # pylint: disable=too-few-public-methods
         return msg
 
 
-class ShoppingCart:
+class ProductCatalog:
     """
-    Shopping cart class.
+    Registry of the products shared by carts. Products interned by name are
+    created once, so a price set in the catalog is seen by every cart.
+    The catalog only holds its interned products: other products added to
+    its carts just point back to it, so that their price changes reprice
+    those carts, and are freed with the carts.
     """
 
     def __init__(self):
+        """
+        Initialize an empty catalog.
+        """
+        self.names = {}
+        self.price_versions = itertools.count(1)
+        self.price_version = 0
+        self.lock = threading.Lock()
+
+    def intern(self, name, price):
+        """
+        Returns the shared product of a name, creating it with the price on
+        first use.
+        """
+        product = self.names.get(name)
+        if product is None:
+            with self.lock:
+                product = self.names.setdefault(name, Product(name, price, self))
+
+        return product
+
+    def price_changed(self):
+        """
+        Gives the catalog a new price version, after one of its products
+        changed price.
+        """
+        self.price_version = next(self.price_versions)
+
+    def set_price(self, name, price):
+        """
+        Changes the price of an interned product.
+        """
+        self.names[name].price = price
+
+    def __getitem__(self, name):
+        """
+        Returns the interned product of a name.
+        """
+        return self.names[name]
+
+    def __len__(self):
+        """
+        Number of interned products.
+        """
+        return len(self.names)
+
+
+# Catalog of the carts created without one.
+PRODUCT_CATALOG = ProductCatalog()
+
+
+class ShoppingCart:
+    """
+    Shopping cart class.
+    A cart maps products to quantities, in the order the products were first
+    added, so products are shared rather than copied into every cart. The
+    subtotal is kept up to date on every change and only recomputed after
+    the catalog price version moved. A cart holding products of another
+    catalog, whose price changes it cannot see, reprices on every total.
+
+    Carts are thread-safe: every change is applied under the cart lock, and
+    prices are looked up before taking it, so the lock is only held while
+    updating the quantities and the subtotal.
+    """
+
+    __slots__ = (
+        "catalog",
+        "quantities",
+        "subtotal_cents",
+        "priced_version",
+        "untracked",
+        "lock",
+    )
+
+    def __init__(self, catalog=None):
         """
         Initialize the shopping cart.
         """
-        self.items = []
+        self.catalog = PRODUCT_CATALOG if catalog is None else catalog
+        self.quantities = {}
+        self.subtotal_cents = 0
+        self.priced_version = self.catalog.price_version
+        self.untracked = False
+        self.lock = threading.Lock()
+
+    def snapshot(self):
+        """
+        Copy of the product quantities, taken atomically.
+        """
+        with self.lock:
+            return self.quantities.copy()
+
+    @property
+    def items(self):
+        """
+        The cart lines, {"product", "quantity"} dicts in order.
+        """
+        return [
+            {"product": product, "quantity": quantity}
+            for product, quantity in self.snapshot().items()
+        ]
+
+    def _tracks(self, product):
+        """
+        Whether the cart catalog sees the price changes of a product, the
+        product joining the catalog if it has none yet.
+        """
+        if product.catalog is None:
+            product.catalog = self.catalog
+        return product.catalog is self.catalog
+
+    @staticmethod
+    def _price_line(product, quantity):
+        """
+        Checks and prices a (product, quantity) line before the cart is
+        changed, so a bad line raises with the cart left as it was. Returns
+        (product, quantity, price in cents).
+        """
+        quantity = operator.index(quantity)
+        if quantity < 1:
+            raise ValueError(f"Invalid quantity: {quantity}")
+
+        return product, quantity, to_cents(product.price)
+
+    def _add_line(self, product, quantity, price_cents):
+        """
+        Adds to the line of a product, the lock being held. Returns the
+        subtotal change in cents.
+        """
+        quantities = self.quantities
+        quantities[product] = quantities.get(product, 0) + quantity
+        return price_cents * quantity
+
+    def _remove_line(self, product, quantity, price_cents):
+        """
+        Removes from the line of a product, the lock being held. Returns the
+        subtotal change in cents.
+        """
+        quantities = self.quantities
+        current = quantities.get(product)
+        if current is None:
+            return 0
+
+        if current <= quantity:
+            del quantities[product]
+            quantity = current
+        else:
+            quantities[product] = current - quantity
+
+        return -price_cents * quantity
+
+    def _update_subtotal(self, change_cents, price_version):
+        """
+        Adds a change priced at a catalog price version to the subtotal, the
+        lock being held. The cart is repriced if the prices moved meanwhile,
+        and always once it holds untracked products, priced at version None.
+        """
+        self.subtotal_cents += change_cents
+        if price_version is None:
+            self.untracked = True
+        if price_version != self.priced_version:
+            self.priced_version = -1
 
     def add_product(self, product, quantity=1):
         """
         Function to add a product to the shopping cart.
         """
-        for item in self.items:
-            if item["product"] == product:
-                item["quantity"] += quantity
-                break
-        else:
-            self.items.append({"product": product, "quantity": quantity})
+        price_version = self.catalog.price_version
+        line = self._price_line(product, quantity)
+        if not self._tracks(product):
+            price_version = None
+        with self.lock:
+            self._update_subtotal(self._add_line(*line), price_version)
 
     def remove_product(self, product, quantity=1):
         """
         Function to remove a product from the shopping cart.
         """
-        for item in self.items:
-            if item["product"] == product:
-                if item["quantity"] <= quantity:
-                    self.items.remove(item)
-                else:
-                    item["quantity"] -= quantity
-                break
+        price_version = self.catalog.price_version
+        line = self._price_line(product, quantity)
+        with self.lock:
+            self._update_subtotal(self._remove_line(*line), price_version)
+
+    def add_products(self, lines):
+        """
+        Function to add (product, quantity) lines to the shopping cart.
+        """
+        price_version = self.catalog.price_version
+        tracks = self._tracks
+        price_line = self._price_line
+        # Every line is checked before the first one changes the cart.
+        lines = [price_line(product, quantity) for product, quantity in lines]
+        tracked = [tracks(product) for product, _, _ in lines]
+        if not all(tracked):
+            price_version = None
+        add_line = self._add_line
+        with self.lock:
+            self._update_subtotal(sum(add_line(*line) for line in lines), price_version)
+
+    def remove_products(self, lines):
+        """
+        Function to remove (product, quantity) lines from the shopping cart.
+        """
+        price_version = self.catalog.price_version
+        price_line = self._price_line
+        lines = [price_line(product, quantity) for product, quantity in lines]
+        remove_line = self._remove_line
+        with self.lock:
+            self._update_subtotal(
+                sum(remove_line(*line) for line in lines), price_version
+            )
+
+    def merge(self, other_cart):
+        """
+        Function to add the lines of another shopping cart to this one, such
+        as a guest cart on login. The other cart is left unchanged.
+        """
+        self.add_products(other_cart.snapshot().items())
 
     def view_cart(self):
         """
@@ -681,10 +1428,26 @@ class ShoppingCart:
                 f" - ${item['product'].price * item['quantity']}"
             )
 
+    def total_cents(self):
+        """
+        Function to get the shopping cart total in integer cents.
+        """
+        price_version = self.catalog.price_version
+        if self.priced_version == price_version:
+            return self.subtotal_cents
+
+        with self.lock:
+            # A price changed since the cart was priced: reprice every line.
+            self.priced_version = -1 if self.untracked else price_version
+            self.subtotal_cents = sum(
+                to_cents(product.price) * quantity
+                for product, quantity in self.quantities.items()
+            )
+            return self.subtotal_cents
+
     def checkout(self):
         """
         Function to checkout the items from the shopping cart.
         """
-        total = sum(item["product"].price * item["quantity"] for item in self.items)
-        print(f"Total: ${total}")
+        print(f"Total: ${from_cents(self.total_cents())}")
         print("Checkout completed. Thank you for shopping!")
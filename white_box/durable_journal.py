@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+
+"""
+Durable, append-only binary journal of ledger accounts and transfers.
+"""
+import os
+import struct
+import threading
+import zlib
+
+# Frame header: payload length and CRC-32 of the payload.
+FRAME = struct.Struct("<II")
+
+# Records: a kind byte followed by the record fields. Opened accounts store
+# their account number as UTF-8 text, whose kind tells its type.
+OPEN_RECORD = 1
+TRANSFER_RECORD = 2
+OPEN_INT_RECORD = 3
+OPEN = struct.Struct("<BqqH")  # kind, account id, balance cents, name length
+TRANSFER = struct.Struct("<Bqqqqb")  # kind, sender, receiver, amount, fee, type
+
+# Durability of a commit: left in the process buffer, written to the OS, or
+# written and fsynced to disk.
+DURABILITY_NONE = "none"
+DURABILITY_FLUSH = "flush"
+DURABILITY_FSYNC = "fsync"
+DURABILITY_LEVELS = (DURABILITY_NONE, DURABILITY_FLUSH, DURABILITY_FSYNC)
+
+# Seconds a record may wait in the buffer before it is committed.
+DEFAULT_MAX_DELAY = 0.05
+
+
+class DurableJournal:  # pylint: disable=too-many-instance-attributes
+    """
+    Journal that group-commits records: they are buffered in memory and
+    written as one CRC-checked frame per batch, with one fsync per batch.
+    Pass it as the log of a Ledger to journal every account and transfer.
+
+    A batch is committed when it is full, on commit() or close(), and by a
+    background thread at most max_delay seconds after its first record.
+    Recording only buffers: a Ledger transfer that returned True is lost
+    if the process crashes before its batch is committed, up to max_delay
+    seconds later. Call commit() when an acknowledgement must be durable.
+
+    The buffer lock is only held to add records or take the pending batch:
+    batches are written and fsynced under a separate write lock, so callers
+    holding Ledger locks keep recording while a batch is being synced. With
+    a background thread, full batches are handed to it rather than written
+    by the recording thread. Recording after close() raises a ValueError.
+    """
+
+    def __init__(
+        self,
+        path,
+        batch_size=1000,
+        durability=DURABILITY_FSYNC,
+        max_delay=DEFAULT_MAX_DELAY,
+    ):
+        """
+        Open the journal for appending, with the number of records per commit,
+        the durability of every commit and the seconds records may stay
+        buffered, None to only commit full batches.
+        """
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Invalid durability: {durability}")
+
+        if batch_size < 1:
+            raise ValueError("Batch size must be positive")
+
+        if max_delay is not None and max_delay <= 0:
+            raise ValueError("Maximum delay must be positive")
+
+        self.path = path
+        self.batch_size = batch_size
+        self.durability = durability
+        # A torn frame left by a crash is cut off before appending new ones.
+        length = valid_length(path)
+        self.file = open(path, "ab")  # pylint: disable=consider-using-with
+        self.file.truncate(length)
+        self.pending = bytearray()
+        self.pending_records = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.closing = threading.Event()
+        self.batch_full = threading.Event()
+        self.flusher = None
+        if max_delay is not None:
+            self.flusher = threading.Thread(
+                target=self._flush_pending, args=(max_delay,), daemon=True
+            )
+            self.flusher.start()
+
+    def _flush_pending(self, max_delay):
+        """
+        Commits the buffered records every max_delay seconds, and as soon as
+        a batch is full, until closed.
+        """
+        while not self.closing.is_set():
+            self.batch_full.wait(max_delay)
+            self.batch_full.clear()
+            if self.pending_records:
+                self.commit()
+
+    def __enter__(self):
+        """
+        Returns the journal when entering the context.
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Commits and closes the journal when leaving the context.
+        """
+        self.close()
+
+    def _append(self, records, count=1):
+        """
+        Buffers count records at once, committing the batch when it is full.
+        Raises a ValueError once the journal is closed.
+        """
+        with self.lock:
+            if self.closed:
+                raise ValueError("The journal is closed")
+
+            self.pending += records
+            self.pending_records += count
+            full = self.pending_records >= self.batch_size
+
+        if full:
+            if self.flusher is None:
+                self.commit()
+            else:
+                self.batch_full.set()
+
+    def record_open(self, account_id, account_number, balance_cents):
+        """
+        Journals an opened account. Account numbers are strings or integers,
+        replayed as the same type; other types raise TypeError.
+        """
+        if isinstance(account_number, str):
+            kind = OPEN_RECORD
+        elif isinstance(account_number, int) and not isinstance(account_number, bool):
+            kind = OPEN_INT_RECORD
+        else:
+            raise TypeError(
+                f"Cannot journal account number of type {type(account_number)}"
+            )
+
+        name = str(account_number).encode("utf-8")
+        self._append(OPEN.pack(kind, account_id, balance_cents, len(name)) + name)
+
+    def record_transfer(
+        self, sender_id, receiver_id, amount_cents, fee_cents, type_code
+    ):  # pylint: disable=too-many-arguments
+        """
+        Journals an applied transfer.
+        """
+        self._append(
+            TRANSFER.pack(
+                TRANSFER_RECORD,
+                sender_id,
+                receiver_id,
+                amount_cents,
+                fee_cents,
+                type_code,
+            )
+        )
+
+    def record_transfers(self, transfers):
+        """
+        Journals (sender id, receiver id, amount, fee, type code) transfers
+        applied together, all of them or, if the journal is closed, none.
+        """
+        records = b"".join(
+            TRANSFER.pack(TRANSFER_RECORD, *transfer) for transfer in transfers
+        )
+        self._append(records, len(records) // TRANSFER.size)
+
+    def commit(self):
+        """
+        Writes the pending records as one frame and makes them as durable as
+        configured. Batches are taken and written in order under the write
+        lock; the buffer lock is released before writing.
+        """
+        with self.write_lock:
+            with self.lock:
+                payload = bytes(self.pending)
+                self.pending.clear()
+                self.pending_records = 0
+
+            if self.file.closed:
+                return
+
+            if payload:
+                frame = FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+                self.file.write(frame)
+
+            if self.durability != DURABILITY_NONE:
+                self.file.flush()
+                if self.durability == DURABILITY_FSYNC:
+                    os.fsync(self.file.fileno())
+
+    def close(self):
+        """
+        Commits the pending records and closes the journal file. Records
+        cannot be added afterwards.
+        """
+        with self.lock:
+            self.closed = True
+        self.closing.set()
+        self.batch_full.set()
+        if self.flusher is not None and self.flusher is not threading.current_thread():
+            self.flusher.join()
+        self.commit()
+        with self.write_lock:
+            self.file.close()
+
+
+def iter_frames(data):
+    """
+    Yields (end offset, payload) for the frames of journal data.
+    Reading stops at the first torn or corrupt frame, which is what a crash
+    in the middle of a commit leaves behind.
+    """
+    view = memoryview(data)
+    offset = 0
+    while offset + FRAME.size <= len(data):
+        length, checksum = FRAME.unpack_from(data, offset)
+        payload = view[offset + FRAME.size : offset + FRAME.size + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        offset += FRAME.size + length
+        yield offset, payload
+
+
+def valid_length(path):
+    """
+    Returns the length of the readable prefix of a journal file.
+    """
+    if not os.path.exists(path):
+        return 0
+
+    with open(path, "rb") as file:
+        data = file.read()
+
+    end = 0
+    for end, _ in iter_frames(data):
+        pass
+    return end
+
+
+def iter_records(path):
+    """
+    Yields the records of a journal file as tuples:
+    (OPEN_RECORD, account id, account number, balance cents), the account
+    number being a string or an integer, or
+    (TRANSFER_RECORD, sender id, receiver id, amount, fee, type code).
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    for _, payload in iter_frames(data):
+        position = 0
+        while position < len(payload):
+            if payload[position] in (OPEN_RECORD, OPEN_INT_RECORD):
+                kind, account_id, balance, name_length = OPEN.unpack_from(
+                    payload, position
+                )
+                position += OPEN.size
+                name = bytes(payload[position : position + name_length])
+                position += name_length
+                account_number = name.decode("utf-8")
+                if kind == OPEN_INT_RECORD:
+                    account_number = int(account_number)
+                yield (OPEN_RECORD, account_id, account_number, balance)
+            else:
+                yield TRANSFER.unpack_from(payload, position)
+                position += TRANSFER.size
+
+
+def replay(path, ledger):
+    """
+    Rebuilds the accounts and balances of an empty ledger from a journal.
+    Returns the number of replayed records. Replay before attaching a log to
+    the ledger, so the replayed records are not journaled again.
+    """
+    account_numbers = {}
+    transfers = []
+    records = 0
+    if not os.path.exists(path):
+        return records
+
+    for record in iter_records(path):
+        records += 1
+        if record[0] == OPEN_RECORD:
+            _, account_id, account_number, balance = record
+            account_numbers[account_id] = account_number
+            ledger.open_account_cents(account_number, balance)
+        else:
+            _, sender_id, receiver_id, amount, fee, type_code = record
+            transfers.append(
+                (
+                    account_numbers[sender_id],
+                    account_numbers[receiver_id],
+                    amount,
+                    fee,
+                    type_code,
+                )
+            )
+
+    ledger.restore_transfers(transfers)
+    return records
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+"""
+Fleets of state machines stored as one compact array of state codes.
+"""
+from array import array
+from collections.abc import Sequence
+
+
+class MachineFleet:
+    """
+    Many instances of a TableDrivenMachine class, such as VendingMachine or
+    UserAuthentication, whose states are kept as one byte each in an array
+    indexed by instance id instead of one Python object per instance.
+    Events are applied through the class transition table; invalid events
+    leave an instance in its state, as they do on a single machine.
+    """
+
+    def __init__(self, machine_class, size):
+        """
+        Create size instances, all in the initial state.
+        """
+        machine = machine_class.MACHINE
+        self.machine_class = machine_class
+        self.machine = machine
+        self.states = array("B", bytes(size))
+        # Next state by state * number of events + event, the same state for
+        # invalid events, so applying an event needs no branch.
+        self.steps = bytes(
+            next_state if next_state >= 0 else index // machine.event_count
+            for index, next_state in enumerate(machine.table)
+        )
+        # bytes.translate() tables of every event: next state by state.
+        self.translations = [
+            self.steps[event :: machine.event_count]
+            + bytes(range(len(machine.states), 256))
+            for event in range(machine.event_count)
+        ]
+
+    def __len__(self):
+        """
+        Number of instances.
+        """
+        return len(self.states)
+
+    def event_code(self, event):
+        """
+        Returns the code of an event name.
+        """
+        try:
+            return self.machine.event_codes[event]
+        except KeyError:
+            raise ValueError(f"Unknown event: {event}") from None
+
+    def _check_event(self, event):
+        """
+        Raises a ValueError for an out of range event code.
+        """
+        if not 0 <= event < self.machine.event_count:
+            raise ValueError(f"Invalid event code: {event}")
+
+    def _check_instance(self, instance_id):
+        """
+        Raises a ValueError for an out of range instance id, instead of
+        letting a negative id wrap around to the end of the array.
+        """
+        if not 0 <= instance_id < len(self.states):
+            raise ValueError(f"Invalid instance id: {instance_id}")
+
+    def state(self, instance_id):
+        """
+        Returns the state name of an instance.
+        """
+        self._check_instance(instance_id)
+        return self.machine.states[self.states[instance_id]]
+
+    def set_state(self, instance_id, state):
+        """
+        Changes the state of an instance by name.
+        """
+        self._check_instance(instance_id)
+        self.states[instance_id] = self.machine.state_code(state)
+
+    def instance(self, instance_id):
+        """
+        Returns a machine object with the state of an instance.
+        """
+        self._check_instance(instance_id)
+        machine = self.machine_class()
+        machine.state_code = self.states[instance_id]
+        return machine
+
+    def apply(self, instance_ids, events):
+        """
+        Applies a batch of events, events[n] going to instance_ids[n], in
+        order. Both are iterables of integers, such as arrays or generators,
+        of the same length. Nothing is applied if an instance id or an event
+        code is out of range.
+        """
+        # Generators are read once, into lists; sequences are used as is.
+        if not isinstance(instance_ids, Sequence):
+            instance_ids = list(instance_ids)
+        if not isinstance(events, Sequence):
+            events = list(events)
+        if len(instance_ids) != len(events):
+            raise ValueError("instance_ids and events differ in length")
+        if events:
+            self._check_instance(min(instance_ids))
+            self._check_instance(max(instance_ids))
+            self._check_event(min(events))
+            self._check_event(max(events))
+        states = self.states
+        steps = self.steps
+        event_count = self.machine.event_count
+        for instance_id, event in zip(instance_ids, events):
+            states[instance_id] = steps[states[instance_id] * event_count + event]
+
+    def broadcast(self, event):
+        """
+        Applies an event to every instance at once.
+        """
+        self._check_event(event)
+        self.states = array(
+            "B", self.states.tobytes().translate(self.translations[event])
+        )
+
+    def replay(self, pairs):
+        """
+        Applies a stream of (instance id, event code) pairs, in order.
+        Returns the number of applied events, stopping with a ValueError at
+        the first out of range instance id or event code.
+        """
+        states = self.states
+        steps = self.steps
+        size = len(states)
+        event_count = self.machine.event_count
+        applied = 0
+        for applied, (instance_id, event) in enumerate(pairs, 1):
+            if not 0 <= event < event_count:
+                self._check_event(event)
+            if not 0 <= instance_id < size:
+                self._check_instance(instance_id)
+            states[instance_id] = steps[states[instance_id] * event_count + event]
+
+        return applied
+
+    def histogram(self):
+        """
+        Number of instances in every state, by state name.
+        """
+        states = self.states
+        return {
+            state: states.count(code) for code, state in enumerate(self.machine.states)
+        }
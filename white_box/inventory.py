@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""
+Inventory reservations of shopping cart lines against book store stock.
+"""
+import itertools
+import threading
+from collections import namedtuple
+
+from ledger import lock_stripes
+
+INVENTORY_LOCK_STRIPES = 64
+
+# A reservation holds stock for (stock id, quantity) lines. When some titles
+# are missing or short, nothing is reserved: the id is None and the titles
+# are in the shortfall.
+Reservation = namedtuple("Reservation", ["reservation_id", "lines", "shortfall"])
+
+
+def cart_lines(cart):
+    """
+    The (title, quantity) lines of a ShoppingCart, titles being the product
+    names.
+    """
+    return [(product.name, quantity) for product, quantity in cart.snapshot().items()]
+
+
+class StockTable:
+    """
+    Stock of the books of a BookStore, indexed by case-insensitive title.
+    Books sharing a title, which a BookStore allows, are stocked together.
+    Every title has an available quantity: its quantity on hand (the sum of
+    its Book quantities) less the quantity reserved for checkouts in
+    progress.
+
+    reserve() holds the stock of every line of an order, all-or-nothing,
+    fulfill() takes it out of the Book quantities and release() makes it
+    available again. Books are striped over a fixed set of locks, taken in
+    stripe order, so concurrent checkouts of different books run in
+    parallel and checkouts of the same book cannot oversell it.
+    """
+
+    def __init__(self, bookstore=None, stripes=INVENTORY_LOCK_STRIPES):
+        """
+        Index the books of a book store, if given one.
+        """
+        self.stock_ids = {}
+        self.books = []
+        self.available = []
+        self.reservations = {}
+        self.reservation_ids = itertools.count(1)
+        self.locks = [threading.Lock() for _ in range(stripes)]
+        self.books_lock = threading.Lock()
+        if bookstore is not None:
+            for book in bookstore.books:
+                self.add_book(book)
+
+    def add_book(self, book):
+        """
+        Indexes a book, its whole quantity being available, adding it to the
+        stock of its title if already stocked. Returns the title stock id.
+        """
+        title = book.title.lower()
+        with self.books_lock:
+            stock_id = self.stock_ids.get(title)
+            if stock_id is not None:
+                with self.locked((stock_id,)):
+                    self.books[stock_id].append(book)
+                    self.available[stock_id] += book.quantity
+                return stock_id
+
+            # The id is published last, once its stock can be read.
+            stock_id = len(self.books)
+            self.books.append([book])
+            self.available.append(book.quantity)
+            self.stock_ids[title] = stock_id
+
+        return stock_id
+
+    def available_quantity(self, title):
+        """
+        Quantity of a title that can still be reserved, 0 if not stocked.
+        """
+        stock_id = self.stock_ids.get(title.lower())
+        return 0 if stock_id is None else self.available[stock_id]
+
+    def locked(self, stock_ids):
+        """
+        Context manager holding the locks of the given titles.
+        """
+        return lock_stripes(self.locks, stock_ids)
+
+    def reserve(self, lines):
+        """
+        Reserves (title, quantity) lines all-or-nothing. Returns the
+        Reservation, whose shortfall has the missing or short titles. Raises
+        a ValueError, reserving nothing, for a quantity below 1.
+        """
+        quantities = {}
+        missing = set()
+        for title, quantity in lines:
+            if quantity < 1:
+                raise ValueError(f"Invalid quantity for {title}: {quantity}")
+
+            stock_id = self.stock_ids.get(title.lower())
+            if stock_id is None:
+                missing.add(title)
+            else:
+                quantities[stock_id] = quantities.get(stock_id, 0) + quantity
+
+        if missing:
+            return Reservation(None, (), frozenset(missing))
+
+        available = self.available
+        with self.locked(quantities):
+            short = [
+                stock_id
+                for stock_id, quantity in quantities.items()
+                if available[stock_id] < quantity
+            ]
+            if short:
+                return Reservation(
+                    None,
+                    (),
+                    frozenset(self.books[stock_id][0].title for stock_id in short),
+                )
+
+            for stock_id, quantity in quantities.items():
+                available[stock_id] -= quantity
+
+        reservation_id = next(self.reservation_ids)
+        lines = tuple(quantities.items())
+        self.reservations[reservation_id] = lines
+        return Reservation(reservation_id, lines, frozenset())
+
+    def fulfill(self, reservation):
+        """
+        Takes the reserved stock out of the Book quantities, from the first
+        books of a title on. Returns False if the reservation was already
+        fulfilled or released.
+        """
+        lines = self.reservations.pop(reservation.reservation_id, None)
+        if lines is None:
+            return False
+
+        books = self.books
+        with self.locked(stock_id for stock_id, _ in lines):
+            for stock_id, quantity in lines:
+                for book in books[stock_id]:
+                    taken = min(book.quantity, quantity)
+                    book.quantity -= taken
+                    quantity -= taken
+                    if not quantity:
+                        break
+
+        return True
+
+    def release(self, reservation):
+        """
+        Makes the reserved stock available again. Returns False if the
+        reservation was already fulfilled or released.
+        """
+        lines = self.reservations.pop(reservation.reservation_id, None)
+        if lines is None:
+            return False
+
+        available = self.available
+        with self.locked(stock_id for stock_id, _ in lines):
+            for stock_id, quantity in lines:
+                available[stock_id] += quantity
+
+        return True
+
+    def checkout(self, cart):
+        """
+        Reserves and fulfills the lines of a ShoppingCart. Returns the
+        Reservation, nothing being taken from stock if it has a shortfall.
+        """
+        reservation = self.reserve(cart_lines(cart))
+        if reservation.reservation_id is not None:
+            self.fulfill(reservation)
+
+        return reservation
@@ -0,0 +1,480 @@
+# -*- coding: utf-8 -*-
+
+"""
+Thread-safe account ledger, its transfer journal and batched transfers.
+"""
+import threading
+from array import array
+from collections import namedtuple
+from contextlib import ExitStack
+
+from money import from_cents, percent_of_cents, to_cents
+
+# Transfer fee, in basis points, by transaction type.
+TRANSFER_FEE_BASIS_POINTS = {"regular": 200, "express": 500, "scheduled": 100}
+
+# Transaction type codes stored in the transfer journal.
+TRANSACTION_TYPES = tuple(TRANSFER_FEE_BASIS_POINTS)
+TRANSACTION_TYPE_CODES = {name: code for code, name in enumerate(TRANSACTION_TYPES)}
+
+# Balance, in dollars, of the accounts the ledger opens on first use.
+DEFAULT_OPENING_BALANCE = 1000
+
+# Number of locks the ledger accounts are striped over.
+LEDGER_LOCK_STRIPES = 64
+
+# Outcomes of a transfer in a batch.
+TRANSFER_OK = "ok"
+TRANSFER_NOT_AUTHENTICATED = "not_authenticated"
+TRANSFER_INVALID_TYPE = "invalid_type"
+TRANSFER_INVALID_AMOUNT = "invalid_amount"
+TRANSFER_INSUFFICIENT_FUNDS = "insufficient_funds"
+TRANSFER_NOT_APPLIED = "not_applied"
+
+TRANSFER_MESSAGES = {
+    TRANSFER_NOT_AUTHENTICATED: "Sender not authenticated.",
+    TRANSFER_INVALID_TYPE: "Invalid transaction type.",
+    TRANSFER_INVALID_AMOUNT: "Invalid amount.",
+    TRANSFER_INSUFFICIENT_FUNDS: "Insufficient funds.",
+}
+
+TransferResult = namedtuple(
+    "TransferResult", ["sender", "receiver", "amount_cents", "fee_cents", "status"]
+)
+TransferBatchResult = namedtuple("TransferBatchResult", ["applied", "results"])
+
+# Balance of an account, in dollars, with the fields of a BankAccount.
+AccountBalance = namedtuple("AccountBalance", ["account_number", "balance"])
+
+
+def transfer_fee_cents(amount_cents, transaction_type):
+    """
+    Returns the fee, in cents, of a transfer.
+    """
+    return percent_of_cents(amount_cents, TRANSFER_FEE_BASIS_POINTS[transaction_type])
+
+
+def transfer_entry(sender, receiver, amount_cents, transaction_type):
+    """
+    Returns the (sender, receiver, amount_cents, fee_cents, type_code)
+    arguments of Ledger.transfer for a checked transfer.
+    """
+    return (
+        sender,
+        receiver,
+        amount_cents,
+        transfer_fee_cents(amount_cents, transaction_type),
+        TRANSACTION_TYPE_CODES[transaction_type],
+    )
+
+
+class TransferJournal:
+    """
+    Append-only transfer journal stored as one typed array per column.
+    """
+
+    def __init__(self):
+        """
+        Initialize the empty columns.
+        """
+        self.senders = array("q")
+        self.receivers = array("q")
+        self.amounts = array("q")
+        self.fees = array("q")
+        self.types = array("b")
+
+    def __len__(self):
+        """
+        Number of journaled transfers.
+        """
+        return len(self.amounts)
+
+    def __getitem__(self, index):
+        """
+        Returns a transfer as (sender id, receiver id, amount, fee, type code).
+        """
+        return (
+            self.senders[index],
+            self.receivers[index],
+            self.amounts[index],
+            self.fees[index],
+            self.types[index],
+        )
+
+    def append(
+        self, sender_id, receiver_id, amount_cents, fee_cents, type_code
+    ):  # pylint: disable=too-many-arguments
+        """
+        Records a transfer.
+        """
+        self.senders.append(sender_id)
+        self.receivers.append(receiver_id)
+        self.amounts.append(amount_cents)
+        self.fees.append(fee_cents)
+        self.types.append(type_code)
+
+
+def lock_stripes(locks, ids):
+    """
+    Context manager holding the locks striping the given ids, id % number
+    of locks, taken in stripe order so that concurrent holders of
+    overlapping stripes cannot deadlock.
+    """
+    stack = ExitStack()
+    stripes = len(locks)
+    for stripe in sorted({item_id % stripes for item_id in ids}):
+        stack.enter_context(locks[stripe])
+
+    return stack
+
+
+class Ledger:  # pylint: disable=too-many-instance-attributes
+    """
+    In-memory account ledger keyed by account number.
+    Account numbers are interned to integer ids that index an array of
+    balances in cents, and every transfer is recorded in a TransferJournal.
+    Accounts are opened explicitly, or by the first transfer applied to
+    them; reading a balance never opens one.
+
+    The ledger is thread-safe: accounts are striped over a fixed set of
+    locks, and a transfer holds the locks of its two accounts, taken in
+    stripe order so that concurrent transfers cannot deadlock. Transfers
+    between accounts on different stripes run concurrently; the journal
+    lock is only held while appending.
+
+    An optional log (see durable_journal.DurableJournal) is told about every
+    opened account and applied transfer, in the order they happen, before
+    the change is applied: an error raised by the log leaves the ledger
+    unchanged. A transfer returning True is applied in memory; how soon it
+    is durable is up to the log.
+    """
+
+    def __init__(
+        self,
+        opening_balance=DEFAULT_OPENING_BALANCE,
+        stripes=LEDGER_LOCK_STRIPES,
+        log=None,
+    ):
+        """
+        Set the balance, in dollars, of the accounts opened on first use, the
+        number of account lock stripes and the optional log.
+        """
+        self.opening_balance_cents = to_cents(opening_balance)
+        self.account_ids = {}
+        self.account_numbers = []
+        self.balances = array("q")
+        self.opening_balances = array("q")
+        self.fees_cents = 0
+        self.journal = TransferJournal()
+        self.locks = [threading.Lock() for _ in range(stripes)]
+        self.accounts_lock = threading.Lock()
+        self.journal_lock = threading.Lock()
+        self.log = log
+
+    def __contains__(self, account_number):
+        """
+        Checks if an account is open.
+        """
+        return account_number in self.account_ids
+
+    def __len__(self):
+        """
+        Number of open accounts.
+        """
+        return len(self.account_numbers)
+
+    def open_account(self, account_number, balance=None):
+        """
+        Opens an account, with the default opening balance unless given one.
+        Returns the account id.
+        """
+        if balance is None:
+            return self.open_account_cents(account_number, self.opening_balance_cents)
+
+        return self.open_account_cents(account_number, to_cents(balance))
+
+    def open_account_cents(self, account_number, balance_cents):
+        """
+        Opens an account with a balance in cents. Returns the account id.
+        """
+        with self.accounts_lock:
+            if account_number in self.account_ids:
+                raise ValueError(f"Account {account_number} already exists")
+
+            # The account is logged first, so that an account the log refuses
+            # is not opened, and its id published last, once its balance can
+            # be read.
+            account_id = len(self.account_numbers)
+            if self.log is not None:
+                self.log.record_open(account_id, account_number, balance_cents)
+            self.account_numbers.append(account_number)
+            self.balances.append(balance_cents)
+            self.opening_balances.append(balance_cents)
+            self.account_ids[account_number] = account_id
+
+        return account_id
+
+    def account_id(self, account_number):
+        """
+        Returns the id of an account. Raises a KeyError for an account that
+        is not open.
+        """
+        try:
+            return self.account_ids[account_number]
+        except KeyError:
+            raise KeyError(f"Account {account_number} is not open") from None
+
+    def _open_on_use(self, account_number):
+        """
+        Returns the id of an account, opening it on first use by a transfer.
+        """
+        account_id = self.account_ids.get(account_number)
+        if account_id is None:
+            try:
+                account_id = self.open_account(account_number)
+            except ValueError:
+                # Opened by another thread in the meantime.
+                account_id = self.account_ids[account_number]
+
+        return account_id
+
+    def locked(self, account_ids):
+        """
+        Context manager holding the locks of the given accounts, taken in
+        stripe order.
+        """
+        return lock_stripes(self.locks, account_ids)
+
+    def balance_cents(self, account_number):
+        """
+        Returns the balance of an account in cents. Raises a KeyError for an
+        account that is not open.
+        """
+        return self.balances[self.account_id(account_number)]
+
+    def transfer_batch(self, transfers):
+        """
+        Applies (sender, receiver, amount_cents, fee_cents, type_code)
+        transfers all-or-nothing. Funds are checked against the net change of
+        every account over the whole batch, so a sender may spend money it
+        receives in the same batch. Returns the set of account numbers that
+        would be overdrawn, in which case nothing is applied. Accounts are
+        opened on first use, once the batch passes a first funds check at
+        their opening balance; the balances are then checked again under the
+        account locks.
+        """
+        transfers = list(transfers)
+        overdrawn = self._overdrawn_numbers(transfers)
+        if overdrawn:
+            return overdrawn
+
+        account_id = self._open_on_use
+        entries = [
+            (account_id(sender), account_id(receiver), amount, fee, type_code)
+            for sender, receiver, amount, fee, type_code in transfers
+        ]
+
+        deltas = {}
+        for sender_id, receiver_id, amount, fee, _ in entries:
+            deltas[sender_id] = deltas.get(sender_id, 0) - amount - fee
+            deltas[receiver_id] = deltas.get(receiver_id, 0) + amount
+
+        balances = self.balances
+        with self.locked(deltas):
+            overdrawn = {
+                self.account_numbers[account]
+                for account, delta in deltas.items()
+                if balances[account] + delta < 0
+            }
+            if overdrawn:
+                return overdrawn
+
+            # The batch is logged first, so that a batch the log refuses is
+            # not applied.
+            with self.journal_lock:
+                if self.log is not None:
+                    self.log.record_transfers(entries)
+                journal = self.journal
+                for entry in entries:
+                    self.fees_cents += entry[3]
+                    journal.append(*entry)
+
+            for account, delta in deltas.items():
+                balances[account] += delta
+
+        return overdrawn
+
+    def _overdrawn_numbers(self, transfers):
+        """
+        Account numbers a batch of transfers would overdraw, read without
+        the account locks, accounts that are not open counting with the
+        opening balance.
+        """
+        deltas = {}
+        for sender, receiver, amount, fee, _ in transfers:
+            deltas[sender] = deltas.get(sender, 0) - amount - fee
+            deltas[receiver] = deltas.get(receiver, 0) + amount
+
+        account_ids = self.account_ids
+        balances = self.balances
+        opening_balance_cents = self.opening_balance_cents
+        overdrawn = set()
+        for account_number, delta in deltas.items():
+            account_id = account_ids.get(account_number)
+            balance = (
+                opening_balance_cents if account_id is None else balances[account_id]
+            )
+            if balance + delta < 0:
+                overdrawn.add(account_number)
+
+        return overdrawn
+
+    def restore_transfers(self, transfers):
+        """
+        Applies (sender, receiver, amount_cents, fee_cents, type_code)
+        transfers that were already validated, such as the ones replayed from
+        a journal, without checking funds.
+        """
+        account_id = self._open_on_use
+        entries = [
+            (account_id(sender), account_id(receiver), amount, fee, type_code)
+            for sender, receiver, amount, fee, type_code in transfers
+        ]
+        balances = self.balances
+        account_ids = {entry[0] for entry in entries}
+        account_ids.update(entry[1] for entry in entries)
+        with self.locked(account_ids):
+            with self.journal_lock:
+                for sender_id, receiver_id, amount, fee, type_code in entries:
+                    balances[sender_id] -= amount + fee
+                    balances[receiver_id] += amount
+                    self.fees_cents += fee
+                    self.journal.append(sender_id, receiver_id, amount, fee, type_code)
+
+    def get_account(self, account_number):
+        """
+        Returns the AccountBalance of an account, in dollars. Raises a
+        KeyError for an account that is not open.
+        """
+        return AccountBalance(
+            account_number, from_cents(self.balance_cents(account_number))
+        )
+
+    def transfer(
+        self, sender, receiver, amount_cents, fee_cents, type_code
+    ):  # pylint: disable=too-many-arguments
+        """
+        Debits amount plus fee from the sender, credits the amount to the
+        receiver and keeps the fee. Returns False on insufficient funds,
+        without opening the accounts a transfer opens on first use.
+        """
+        total_cents = amount_cents + fee_cents
+        if sender not in self.account_ids and self.opening_balance_cents < total_cents:
+            return False
+
+        sender_id = self._open_on_use(sender)
+        receiver_id = self._open_on_use(receiver)
+        locks = self.locks
+        first = locks[sender_id % len(locks)]
+        second = locks[receiver_id % len(locks)]
+        if sender_id % len(locks) > receiver_id % len(locks):
+            first, second = second, first
+
+        balances = self.balances
+        with first:
+            if second is not first:
+                second.acquire()
+            try:
+                if balances[sender_id] < total_cents:
+                    return False
+
+                # The transfer is logged first, so that a transfer the log
+                # refuses is not applied.
+                with self.journal_lock:
+                    if self.log is not None:
+                        self.log.record_transfer(
+                            sender_id, receiver_id, amount_cents, fee_cents, type_code
+                        )
+                    self.fees_cents += fee_cents
+                    self.journal.append(
+                        sender_id, receiver_id, amount_cents, fee_cents, type_code
+                    )
+                balances[sender_id] -= total_cents
+                balances[receiver_id] += amount_cents
+            finally:
+                if second is not first:
+                    second.release()
+
+        return True
+
+
+def check_transfer(authenticated, amount_cents, transaction_type):
+    """
+    Checks a transfer without applying it, returns its status. authenticated
+    tells if the sender is logged in.
+    """
+    if not authenticated:
+        return TRANSFER_NOT_AUTHENTICATED
+
+    if transaction_type not in TRANSFER_FEE_BASIS_POINTS:
+        return TRANSFER_INVALID_TYPE
+
+    if amount_cents <= 0:
+        return TRANSFER_INVALID_AMOUNT
+
+    return TRANSFER_OK
+
+
+def check_transfer_batch(transfers, is_authenticated):
+    """
+    Checks (sender, receiver, amount, transaction_type) money transfers,
+    is_authenticated(sender) being called once per sender of the batch.
+    Returns the TransferResult of every transfer and the Ledger.transfer_batch
+    entries of the valid ones.
+    """
+    authenticated = {}
+    results = []
+    entries = []
+    for sender, receiver, amount, transaction_type in transfers:
+        amount_cents = to_cents(amount)
+        logged_in = authenticated.get(sender)
+        if logged_in is None:
+            logged_in = authenticated[sender] = is_authenticated(sender)
+        status = check_transfer(logged_in, amount_cents, transaction_type)
+        fee_cents = 0
+        if status == TRANSFER_OK:
+            entries.append(
+                transfer_entry(sender, receiver, amount_cents, transaction_type)
+            )
+            fee_cents = entries[-1][3]
+        results.append(
+            TransferResult(sender, receiver, amount_cents, fee_cents, status)
+        )
+
+    return results, entries
+
+
+def apply_transfer_batch(ledger, transfers, is_authenticated):
+    """
+    Checks and applies (sender, receiver, amount, transaction_type) money
+    transfers to a Ledger, all-or-nothing. is_authenticated(sender) is
+    called once per sender of the batch. Returns a TransferBatchResult with
+    one TransferResult per transfer.
+    """
+    results, entries = check_transfer_batch(transfers, is_authenticated)
+    overdrawn = set()
+    if len(entries) == len(results):
+        overdrawn = ledger.transfer_batch(entries)
+        if not overdrawn:
+            return TransferBatchResult(True, results)
+
+    for index, result in enumerate(results):
+        if result.status == TRANSFER_OK:
+            status = (
+                TRANSFER_INSUFFICIENT_FUNDS
+                if result.sender in overdrawn
+                else TRANSFER_NOT_APPLIED
+            )
+            results[index] = result._replace(status=status)
+
+    return TransferBatchResult(False, results)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""
+Opt-in memoization of the pure class exercises functions.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+from functools import update_wrapper
+
+import class_exercises
+
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "size", "maxsize", "hit_rate"]
+)
+
+DEFAULT_MAXSIZE = 1024
+
+# Registry of every memoized function, by name.
+CACHES = {}
+
+# Separates the positional arguments from the sorted keyword arguments in a
+# cache key.
+KWARGS_MARK = object()
+
+
+class LRUCache:
+    """
+    Bounded least recently used cache in front of a pure function.
+    Results are keyed by the positional arguments and the sorted keyword
+    arguments, so f(1, b=2) and f(1, 2) are cached separately. The cache is
+    thread-safe; the function is called without holding its lock.
+    """
+
+    def __init__(self, function, maxsize=DEFAULT_MAXSIZE):
+        """
+        Wrap the function with an empty cache of at most maxsize results.
+        """
+        if maxsize < 1:
+            raise ValueError("Cache size must be positive")
+
+        self.function = function
+        self.maxsize = maxsize
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        update_wrapper(self, function)
+
+    def __call__(self, *args, **kwargs):
+        """
+        Returns the cached result for the arguments, calling the function on
+        a miss.
+        """
+        key = args
+        if kwargs:
+            key += (KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+        results = self.results
+        with self.lock:
+            try:
+                results.move_to_end(key)
+            except KeyError:
+                pass
+            else:
+                self.hits += 1
+                return results[key]
+
+        result = self.function(*args, **kwargs)
+        with self.lock:
+            self.misses += 1
+            results[key] = result
+            self._evict(self.maxsize)
+        return result
+
+    def _evict(self, maxsize):
+        """
+        Evicts the least recently used results beyond maxsize, the lock
+        being held.
+        """
+        results = self.results
+        while len(results) > maxsize:
+            results.popitem(last=False)
+            self.evictions += 1
+
+    def cache_info(self):
+        """
+        Returns the cache counters.
+        """
+        calls = self.hits + self.misses
+        return CacheInfo(
+            self.hits,
+            self.misses,
+            self.evictions,
+            len(self.results),
+            self.maxsize,
+            self.hits / calls if calls else 0.0,
+        )
+
+    def cache_clear(self):
+        """
+        Empties the cache and resets its counters.
+        """
+        with self.lock:
+            self.results.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def resize(self, maxsize):
+        """
+        Changes the size of the cache, evicting the oldest results.
+        """
+        if maxsize < 1:
+            raise ValueError("Cache size must be positive")
+
+        with self.lock:
+            self.maxsize = maxsize
+            self._evict(maxsize)
+
+
+def memoize(function, maxsize=DEFAULT_MAXSIZE):
+    """
+    Wraps a pure function in an LRUCache registered under its name. Raises
+    a ValueError if a cache is already registered under that name.
+    """
+    name = function.__name__
+    if name in CACHES:
+        raise ValueError(f"A cache is already registered for {name}")
+
+    cache = CACHES[name] = LRUCache(function, maxsize)
+    return cache
+
+
+def cache_stats():
+    """
+    Returns the CacheInfo of every registered cache, by function name.
+    """
+    return {name: cache.cache_info() for name, cache in CACHES.items()}
+
+
+def clear_caches():
+    """
+    Empties every registered cache and resets its counters.
+    """
+    for cache in CACHES.values():
+        cache.cache_clear()
+
+
+def resize_cache(name, maxsize):
+    """
+    Changes the size of a registered cache, evicting the oldest results.
+    """
+    CACHES[name].resize(maxsize)
+
+
+categorize_product = memoize(class_exercises.categorize_product)
+calculate_quantity_discount = memoize(class_exercises.calculate_quantity_discount)
+check_loan_eligibility = memoize(class_exercises.check_loan_eligibility)
+is_triangle = memoize(class_exercises.is_triangle)
+validate_password = memoize(class_exercises.validate_password)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""
+Money amounts in integer cents.
+"""
+import numbers
+from decimal import ROUND_HALF_UP, Decimal
+from fractions import Fraction
+
+
+def to_cents(amount):
+    """
+    Converts a dollar amount (int, Decimal, Fraction, float or numeric
+    string) to integer cents, rounding half cents away from zero. Decimals
+    and fractions are converted exactly; floats are read from their shortest
+    repr, so 0.285 becomes 29 cents rather than 28.
+    """
+    if isinstance(amount, int):
+        return amount * 100
+
+    if isinstance(amount, numbers.Rational):
+        scaled = Fraction(amount) * 100
+        numerator, denominator = abs(scaled.numerator), scaled.denominator
+        cents = (2 * numerator + denominator) // (2 * denominator)
+        return -cents if scaled < 0 else cents
+
+    if isinstance(amount, Decimal):
+        return _decimal_cents(amount)
+
+    text = amount.strip() if isinstance(amount, str) else repr(amount)
+    digits = text[1:] if text[:1] in ("+", "-") else text
+    whole, _, fraction = digits.partition(".")
+    if not (whole or fraction) or not (whole + fraction).isdecimal():
+        # Exponent notation and other unusual forms take the slow path.
+        return _decimal_cents(text)
+
+    fraction = (fraction + "000")[:3]
+    cents = int(whole or "0") * 100 + int(fraction[:2]) + (fraction[2] >= "5")
+    return -cents if text.startswith("-") else cents
+
+
+def _decimal_cents(amount):
+    """
+    Converts a Decimal or numeric string dollar amount to integer cents,
+    rounding half cents away from zero.
+    """
+    try:
+        cents = Decimal(amount).scaleb(2).quantize(Decimal(1), ROUND_HALF_UP)
+        return int(cents)
+    except ArithmeticError:
+        raise ValueError(f"Invalid amount: {amount!r}") from None
+
+
+def from_cents(cents):
+    """
+    Converts cents back to dollars, as an int for whole amounts.
+    """
+    if cents % 100 == 0:
+        return cents // 100
+
+    return cents / 100
+
+
+def format_cents(cents):
+    """
+    Formats cents as a dollar amount with two decimals.
+    """
+    sign = "-" if cents < 0 else ""
+    dollars, cents = divmod(abs(cents), 100)
+    return f"{sign}{dollars}.{cents:02d}"
+
+
+def percent_of_cents(cents, basis_points):
+    """
+    Takes a percentage, in basis points (1% is 100), of an amount in cents,
+    rounding half cents away from zero with integer math only.
+    """
+    product = abs(cents) * basis_points
+    result = (product + 5000) // 10000
+    return -result if cents < 0 else result
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+"""
+Columnar account table for end-of-day settlement and fee accrual.
+"""
+import csv
+from array import array
+from collections import namedtuple
+from operator import add, sub
+
+from class_exercises import BankAccount
+from money import from_cents, percent_of_cents, to_cents
+
+# Fee of a tier: a flat fee plus basis points of the balance, both waived
+# from a balance of waiver_cents (never waived if None).
+FeeSchedule = namedtuple("FeeSchedule", ["flat_cents", "basis_points", "waiver_cents"])
+
+NO_FEES = FeeSchedule(0, 0, None)
+
+SettlementResult = namedtuple(
+    "SettlementResult", ["applied", "overdrawn", "transfers", "fees_cents"]
+)
+
+
+def net_deltas(journal, size, start=0):
+    """
+    Net change, in cents, of each of size accounts over the transfers of a
+    TransferJournal from start: receivers gain the amount, senders lose the
+    amount and the fee.
+    """
+    deltas = [0] * size
+    for sender, receiver, amount, fee in zip(
+        journal.senders[start:],
+        journal.receivers[start:],
+        journal.amounts[start:],
+        journal.fees[start:],
+    ):
+        deltas[sender] -= amount + fee
+        deltas[receiver] += amount
+
+    return array("q", deltas)
+
+
+def schedule_fee(balance_cents, schedule):
+    """
+    Fee, in cents, of a balance under a fee schedule. A fee never takes the
+    balance below zero.
+    """
+    flat_cents, basis_points, waiver_cents = schedule
+    if balance_cents <= 0 or (
+        waiver_cents is not None and balance_cents >= waiver_cents
+    ):
+        return 0
+
+    return min(
+        balance_cents, flat_cents + percent_of_cents(balance_cents, basis_points)
+    )
+
+
+class AccountTable:
+    """
+    Accounts stored as columns indexed by account id: account numbers, an
+    array of balances in cents and an array of fee tiers. Settlement works on
+    whole columns instead of one BankAccount object per account.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty table.
+        """
+        self.account_ids = {}
+        self.account_numbers = []
+        self.balances = array("q")
+        self.tiers = array("B")
+        self.journal_position = 0
+
+    @classmethod
+    def from_ledger(cls, ledger, tier=0):
+        """
+        Snapshot of the accounts of a Ledger, with the same account ids, in
+        the given fee tier. Transfers journaled after the snapshot are the
+        ones the next settle(ledger.journal) applies; accounts opened after
+        it are added by sync_accounts(ledger).
+        """
+        table = cls()
+        with ledger.accounts_lock, ledger.locked(range(len(ledger.locks))):
+            table.account_numbers = list(ledger.account_numbers)
+            table.balances = array("q", ledger.balances)
+            table.journal_position = len(ledger.journal)
+
+        table.account_ids = {
+            account_number: account_id
+            for account_id, account_number in enumerate(table.account_numbers)
+        }
+        table.tiers = array("B", [tier]) * len(table.account_numbers)
+        return table
+
+    def __contains__(self, account_number):
+        """
+        Checks if an account is in the table.
+        """
+        return account_number in self.account_ids
+
+    def __len__(self):
+        """
+        Number of accounts.
+        """
+        return len(self.account_numbers)
+
+    def open_account(self, account_number, balance_cents, tier=0):
+        """
+        Adds an account with a balance in cents. Returns the account id.
+        """
+        if account_number in self.account_ids:
+            raise ValueError(f"Account {account_number} already exists")
+
+        account_id = len(self.account_numbers)
+        self.account_ids[account_number] = account_id
+        self.account_numbers.append(account_number)
+        self.balances.append(balance_cents)
+        self.tiers.append(tier)
+        return account_id
+
+    def sync_accounts(self, ledger, tier=0):
+        """
+        Adds the accounts a Ledger opened since the table was taken from it,
+        with their opening balances, in the given fee tier, so that settle()
+        can apply their transfers. Returns the number of added accounts.
+        """
+        with ledger.accounts_lock:
+            count = len(ledger.account_numbers)
+            account_numbers = ledger.account_numbers[len(self) : count]
+            opening_balances = ledger.opening_balances[len(self) : count]
+            if len(self) > count or (
+                self.account_numbers
+                and ledger.account_numbers[len(self) - 1] != self.account_numbers[-1]
+            ):
+                raise ValueError("The table accounts are not the ledger ones")
+
+        for account_number, balance_cents in zip(account_numbers, opening_balances):
+            self.open_account(account_number, balance_cents, tier)
+
+        return len(account_numbers)
+
+    def set_tier(self, account_number, tier):
+        """
+        Moves an account to another fee tier.
+        """
+        self.tiers[self.account_ids[account_number]] = tier
+
+    def apply_deltas(self, deltas):
+        """
+        Adds a column of net changes to the balances, all-or-nothing.
+        Returns the set of account numbers that would be overdrawn, in which
+        case nothing is applied.
+        """
+        if len(deltas) != len(self.balances):
+            raise ValueError("One delta per account is required")
+
+        balances = array("q", map(add, self.balances, deltas))
+        if balances and min(balances) < 0:
+            return {
+                self.account_numbers[account_id]
+                for account_id, balance in enumerate(balances)
+                if balance < 0
+            }
+
+        self.balances = balances
+        return set()
+
+    def accrue_fees(self, schedules):
+        """
+        Charges every account the fee of its tier, schedules being indexed by
+        tier. Returns the column of charged fees.
+        """
+        fees = array(
+            "q",
+            [
+                schedule_fee(balance, schedules[tier])
+                for balance, tier in zip(self.balances, self.tiers)
+            ],
+        )
+        self.balances = array("q", map(sub, self.balances, fees))
+        return fees
+
+    def settle(self, journal, schedules=None):
+        """
+        End-of-day settlement: applies the net deltas of the journal
+        transfers since the last settlement, then accrues the fees of the
+        schedules, if any. Nothing is applied if an account would be
+        overdrawn. Accounts opened in a ledger after the table was taken
+        from it must be added with sync_accounts() first.
+        """
+        start = self.journal_position
+        end = len(journal)
+        if end > start and (
+            max(journal.senders[start:end]) >= len(self)
+            or max(journal.receivers[start:end]) >= len(self)
+        ):
+            raise ValueError(
+                "The journal has accounts missing from the table, see sync_accounts()"
+            )
+
+        overdrawn = self.apply_deltas(net_deltas(journal, len(self), start))
+        if overdrawn:
+            return SettlementResult(False, overdrawn, 0, 0)
+
+        self.journal_position = end
+        fees_cents = sum(self.accrue_fees(schedules)) if schedules else 0
+        return SettlementResult(True, overdrawn, end - start, fees_cents)
+
+    def get_account(self, account_number):
+        """
+        Returns a BankAccount view of an account, with its balance in dollars.
+        """
+        return BankAccount(
+            account_number, from_cents(self.balances[self.account_ids[account_number]])
+        )
+
+    def accounts(self):
+        """
+        Yields a BankAccount view of every account.
+        """
+        for account_number, balance in zip(self.account_numbers, self.balances):
+            yield BankAccount(account_number, from_cents(balance))
+
+    def export_csv(self, file):
+        """
+        Writes the account numbers and balances, in dollars as view_account
+        shows them, to a CSV file object.
+        """
+        writer = csv.writer(file)
+        writer.writerow(["account_number", "balance"])
+        writer.writerows(zip(self.account_numbers, map(from_cents, self.balances)))
+
+    def reconcile(self, accounts):
+        """
+        Compares BankAccount objects with the table. Returns the account
+        numbers that are missing from the table or have another balance.
+        """
+        mismatched = []
+        for account in accounts:
+            account_id = self.account_ids.get(account.account_number)
+            if (
+                account_id is None
+                or to_cents(account.balance) != self.balances[account_id]
+            ):
+                mismatched.append(account.account_number)
+
+        return mismatched
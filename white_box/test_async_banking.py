@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""
+Async transfer queue unit testing examples.
+"""
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+
+from async_banking import AsyncTransferQueue
+from class_exercises import BankingSystem
+from ledger import TRANSFER_INSUFFICIENT_FUNDS, TRANSFER_NOT_AUTHENTICATED, TRANSFER_OK
+
+
+class TestAsyncTransferQueue(unittest.TestCase):
+    """
+    Async transfer queue unittest class.
+    """
+
+    def setUp(self):
+        """
+        Set up an authenticated BankingSystem.
+        """
+        self.banking_system = BankingSystem()
+        with patch("builtins.print"):
+            self.banking_system.authenticate("user123", "pass123")
+
+    def test_submit_resolves_futures(self):
+        """
+        Resolves a future with the result of every request.
+        """
+
+        async def run():
+            async with AsyncTransferQueue(self.banking_system, consumers=2) as queue:
+                futures = [
+                    await queue.submit("user123", "receiver456", 400, "regular"),
+                    await queue.submit("user123", "receiver456", 400, "regular"),
+                    await queue.submit("user123", "receiver456", 400, "regular"),
+                    await queue.submit("unknown", "receiver456", 1, "regular"),
+                ]
+                return [(await future).status for future in futures], queue
+
+        with patch("builtins.print") as mock_print:
+            statuses, queue = asyncio.run(run())
+            mock_print.assert_not_called()
+
+        # Consumers run concurrently, so either 400 transfer may be the one
+        # to find insufficient funds.
+        self.assertCountEqual(
+            statuses,
+            [
+                TRANSFER_OK,
+                TRANSFER_OK,
+                TRANSFER_INSUFFICIENT_FUNDS,
+                TRANSFER_NOT_AUTHENTICATED,
+            ],
+        )
+        self.assertEqual(statuses[3], TRANSFER_NOT_AUTHENTICATED)
+        self.assertEqual(queue.processed, 4)
+        self.assertEqual(queue.depth(), 0)
+        self.assertGreater(queue.throughput(), 0)
+        self.assertEqual(set(queue.latency_percentiles()), {50, 90, 99})
+
+    def test_backpressure(self):
+        """
+        Makes submit wait while the queue is full.
+        """
+
+        async def run():
+            queue = AsyncTransferQueue(self.banking_system, maxsize=2)
+            await queue.submit("user123", "receiver456", 1, "regular")
+            await queue.submit("user123", "receiver456", 1, "regular")
+            blocked = asyncio.ensure_future(
+                queue.submit("user123", "receiver456", 1, "regular")
+            )
+            await asyncio.sleep(0.01)
+            depth_while_full = queue.depth()
+            done_while_full = blocked.done()
+            await queue.start()
+            await (await blocked)
+            await queue.stop()
+            return depth_while_full, done_while_full, queue.processed
+
+        self.assertEqual(asyncio.run(run()), (2, False, 3))
+
+    def test_transfers_run_off_the_event_loop(self):
+        """
+        Runs blocking transfers concurrently without blocking the event loop.
+        """
+        barrier = threading.Barrier(2, timeout=5)
+
+        class BlockingBankingSystem:  # pylint: disable=too-few-public-methods
+            """
+            Banking system whose transfers wait for each other.
+            """
+
+            def process_transfer(self, *request):
+                """
+                Returns the request once two transfers run at once.
+                """
+                barrier.wait()
+                return request
+
+        async def run():
+            async with AsyncTransferQueue(
+                BlockingBankingSystem(), consumers=2
+            ) as queue:
+                futures = [
+                    await queue.submit("a", "b", amount, "regular") for amount in (1, 2)
+                ]
+                return [(await future)[2] for future in futures]
+
+        self.assertEqual(asyncio.run(run()), [1, 2])
+
+    def test_failed_request(self):
+        """
+        Sets the exception of a request that raises, the consumer going on
+        with the next request.
+        """
+
+        async def run():
+            async with AsyncTransferQueue(self.banking_system, consumers=1) as queue:
+                future = await queue.submit("user123", "receiver456", "abc", "regular")
+                with self.assertRaisesRegex(ValueError, "Invalid amount: 'abc'"):
+                    await future
+                future = await queue.submit("user123", "receiver456", 100, "regular")
+                return (await future).status
+
+        self.assertEqual(asyncio.run(run()), TRANSFER_OK)
+
+    def test_metrics_before_start(self):
+        """
+        Reports empty metrics before any request.
+        """
+        queue = AsyncTransferQueue(self.banking_system)
+        self.assertEqual(queue.throughput(), 0.0)
+        self.assertEqual(queue.latency_percentiles((50,)), {50: 0.0})
+
+    def test_invalid_configuration(self):
+        """
+        Tries to create a queue without consumers.
+        """
+        with self.assertRaises(ValueError):
+            AsyncTransferQueue(self.banking_system, consumers=0)
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+"""
+Batch exercises unit testing examples.
+"""
+import unittest
+
+from batch_exercises import (
+    loan_categories,
+    luhn_check_packed,
+    pack_card_numbers,
+    score_loans,
+    score_loans_parallel,
+    validate_credit_cards,
+    validate_date_columns,
+    validate_iso_dates,
+)
+from class_exercises import check_loan_eligibility, validate_credit_card, validate_date
+
+CARD_NUMBERS = [
+    "4111111111111111",
+    "4111111111111112",
+    "378282246310005",
+    "4222222222222",
+    "123456789012",
+    "12345678901234567",
+    "41111111111a1111",
+    "",
+    "٣" * 13,
+    "٤١١١١١١١١١١١١١١١",
+]
+
+
+class TestLuhnBatch(unittest.TestCase):
+    """
+    Credit card batch validation unittest class.
+    """
+
+    def test_pack_card_numbers(self):
+        """
+        Packs the card numbers in zero-padded fixed-width rows.
+        """
+        self.assertEqual(pack_card_numbers(["12", "345"], width=4), b"00120345")
+
+    def test_luhn_check_packed(self):
+        """
+        Checks the Luhn checksum of every packed row.
+        """
+        buffer = pack_card_numbers(["4111111111111111", "4111111111111112", "0000"])
+        self.assertEqual(luhn_check_packed(buffer), b"\x01\x00\x01")
+
+    def test_luhn_check_packed_non_digits(self):
+        """
+        Flags the rows with non-digit characters as invalid.
+        """
+        buffer = pack_card_numbers(["4111111111111111", "0000000000000x00"])
+        self.assertEqual(luhn_check_packed(buffer), b"\x01\x00")
+
+    def test_luhn_check_packed_letters_do_not_carry(self):
+        """
+        Flags a row of letters as invalid without changing its neighbours.
+        """
+        cards = ["4111111111111111", "abcdabcdabcd", "4111111111111111", "٣" * 13]
+        expected = bytes(
+            validate_credit_card(number, luhn=True) == "Valid Card" for number in cards
+        )
+        self.assertEqual(expected, b"\x01\x00\x01\x00")
+        self.assertEqual(validate_credit_cards(cards, luhn=True), expected)
+
+    def test_luhn_check_packed_invalid_buffer(self):
+        """
+        Tries to check a buffer that is not made of whole rows.
+        """
+        with self.assertRaises(ValueError):
+            luhn_check_packed(b"123", width=2)
+
+        with self.assertRaises(ValueError):
+            luhn_check_packed(b"123", width=30)
+
+    def test_validate_credit_cards_matches_scalar(self):
+        """
+        Gets the same results as validate_credit_card, with and without Luhn.
+        """
+        for luhn in (False, True):
+            expected = bytes(
+                validate_credit_card(number, luhn) == "Valid Card"
+                for number in CARD_NUMBERS
+            )
+            self.assertEqual(validate_credit_cards(CARD_NUMBERS, luhn), expected)
+
+    def test_validate_credit_cards_empty(self):
+        """
+        Validates an empty batch.
+        """
+        self.assertEqual(validate_credit_cards([]), b"")
+
+
+class TestLoanBatch(unittest.TestCase):
+    """
+    Loan eligibility batch scoring unittest class.
+    """
+
+    incomes = [20000, 30000, 45000, 60000, 60000, 60001, 80000, 80000, 80000]
+    credit_scores = [800, 700, 701, 650, 750, 750, 751, 600, 760]
+
+    def expected(self):
+        """
+        Scores the customers with the scalar function.
+        """
+        return [
+            check_loan_eligibility(income, score)
+            for income, score in zip(self.incomes, self.credit_scores)
+        ]
+
+    def test_score_loans(self):
+        """
+        Gets the same categories as check_loan_eligibility.
+        """
+        codes = score_loans(self.incomes, self.credit_scores)
+        self.assertIsInstance(codes, bytes)
+        self.assertEqual(loan_categories(codes), self.expected())
+
+    def test_score_loans_parallel(self):
+        """
+        Gets the same categories when scoring in a process pool.
+        """
+        codes = score_loans_parallel(
+            self.incomes, self.credit_scores, workers=2, min_rows=0
+        )
+        self.assertEqual(loan_categories(codes), self.expected())
+
+    def test_score_loans_parallel_small_input(self):
+        """
+        Scores small inputs in-process.
+        """
+        codes = score_loans_parallel(self.incomes, self.credit_scores)
+        self.assertEqual(codes, score_loans(self.incomes, self.credit_scores))
+
+    def test_score_loans_parallel_length_mismatch(self):
+        """
+        Tries to score columns of different lengths.
+        """
+        with self.assertRaises(ValueError):
+            score_loans_parallel([40000], [])
+
+
+class TestDateBatch(unittest.TestCase):
+    """
+    Date batch validation unittest class.
+    """
+
+    dates = [
+        (2025, 10, 6),
+        (2024, 2, 29),
+        (2025, 2, 29),
+        (2025, 4, 31),
+        (1899, 12, 31),
+        (2025, 13, 1),
+        (2025, 1, 0),
+    ]
+
+    def test_validate_date_columns_matches_scalar(self):
+        """
+        Gets the same results as validate_date, with and without calendar checks.
+        """
+        years, months, days = zip(*self.dates)
+        for calendar in (False, True):
+            expected = bytes(
+                validate_date(*date, calendar=calendar) == "Valid Date"
+                for date in self.dates
+            )
+            self.assertEqual(
+                validate_date_columns(years, months, days, calendar), expected
+            )
+
+    def test_validate_iso_dates(self):
+        """
+        Validates ISO-8601 date strings.
+        """
+        date_strings = [
+            "2025-10-06",
+            "2024-02-29",
+            "2025-02-29",
+            "2025-2-28",
+            "20251006",
+            "2025-10-06T00:00",
+            "",
+        ]
+        self.assertEqual(
+            validate_iso_dates(date_strings, calendar=True),
+            b"\x01\x01\x00\x00\x00\x00\x00",
+        )
+        # Like validate_date, the bulk APIs skip the calendar checks by default.
+        self.assertEqual(validate_iso_dates(["2025-02-29"]), b"\x01")
+        self.assertEqual(validate_date_columns([2025], [2], [29]), b"\x01")
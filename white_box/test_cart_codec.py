@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cart encoding unit testing examples.
+"""
+import unittest
+from decimal import Decimal
+
+from cart_codec import decode_cart, encode_cart, encode_varint, iter_lines
+from class_exercises import Product, ProductCatalog, ShoppingCart
+
+
+class TestCartCodec(unittest.TestCase):
+    """
+    Cart encoding unittest class.
+    """
+
+    def setUp(self):
+        """
+        Set up a catalog of 300 products.
+        """
+        self.catalog = ProductCatalog()
+        self.products = [
+            self.catalog.intern(f"Product {index}", index + 0.5) for index in range(300)
+        ]
+
+    def test_varint(self):
+        """
+        Test varints use 7 bits per byte.
+        """
+        for value, expected in ((0, b"\x00"), (127, b"\x7f"), (300, b"\xac\x02")):
+            out = bytearray()
+            encode_varint(value, out)
+            self.assertEqual(bytes(out), expected)
+        with self.assertRaises(ValueError):
+            encode_varint(-1, bytearray())
+
+    def test_round_trip(self):
+        """
+        Test carts decode to the same lines, in order, and the same total.
+        """
+        small_cart = ShoppingCart(self.catalog)
+        small_cart.add_products([(self.products[5], 2), (self.products[1], 1)])
+        large_cart = ShoppingCart(self.catalog)
+        large_cart.add_products([(self.products[299], 200), (self.products[0], 1)])
+
+        self.assertEqual(
+            encode_cart(small_cart), b"\x03\x02\x09Product 5\x04\x09Product 1\x02"
+        )
+        self.assertEqual(encode_cart(ShoppingCart(self.catalog)), b"\x03\x00")
+        for cart in (small_cart, large_cart, ShoppingCart(self.catalog)):
+            decoded = decode_cart(encode_cart(cart), self.catalog)
+            self.assertEqual(
+                list(decoded.quantities.items()), list(cart.quantities.items())
+            )
+            self.assertEqual(decoded.total_cents(), cart.total_cents())
+
+    def test_memoryview_slices(self):
+        """
+        Test carts decode from slices of a larger buffer.
+        """
+        cart = ShoppingCart(self.catalog)
+        cart.add_product(self.products[200], 3)
+        encoded = encode_cart(cart)
+        buffer = bytearray(b"header" + encoded + b"footer")
+        view = memoryview(buffer)[6 : 6 + len(encoded)]
+        self.assertEqual(list(iter_lines(view)), [("Product 200", 3, None)])
+        decoded = decode_cart(view, self.catalog)
+        self.assertEqual(decoded.items[0]["product"], self.products[200])
+
+    def test_other_catalog(self):
+        """
+        Test carts decode to the products of the same names in a catalog
+        built in another order, as in another process.
+        """
+        cart = ShoppingCart(self.catalog)
+        cart.add_products([(self.products[7], 2), (self.products[3], 1)])
+        other_catalog = ProductCatalog()
+        for index in reversed(range(300)):
+            other_catalog.intern(f"Product {index}", index + 0.5)
+
+        decoded = decode_cart(encode_cart(cart), other_catalog)
+        self.assertEqual(
+            [(item["product"].name, item["quantity"]) for item in decoded.items],
+            [("Product 7", 2), ("Product 3", 1)],
+        )
+        with self.assertRaises(ValueError):
+            decode_cart(encode_cart(cart), ProductCatalog())
+
+    def test_products_not_interned(self):
+        """
+        Test products that are not interned in the cart catalog round trip
+        with their price, next to interned products of the same name.
+        """
+        cart = ShoppingCart(self.catalog)
+        cart.add_products(
+            [
+                (Product("Gift card", Decimal("19.99")), 2),
+                (self.products[7], 1),
+                (Product("Product 7", 1000), 3),
+            ]
+        )
+        encoded = encode_cart(cart)
+        self.assertEqual(
+            list(iter_lines(encoded)),
+            [("Gift card", 2, 1999), ("Product 7", 1, None), ("Product 7", 3, 100000)],
+        )
+
+        decoded = decode_cart(encoded, self.catalog)
+        self.assertEqual(decoded.total_cents(), cart.total_cents())
+        self.assertEqual(
+            [(item["product"].name, item["quantity"]) for item in decoded.items],
+            [("Gift card", 2), ("Product 7", 1), ("Product 7", 3)],
+        )
+        self.assertIs(decoded.items[1]["product"], self.products[7])
+        self.assertNotIn("Gift card", self.catalog.names)
+
+        other = ShoppingCart()
+        other.add_product(Product("Book", 10.99))
+        self.assertEqual(decode_cart(encode_cart(other)).total_cents(), 1099)
+
+    def test_invalid_data(self):
+        """
+        Test corrupt carts are refused.
+        """
+        for data in (
+            b"",
+            b"\x02\x00",
+            b"\x03\x01\x80",
+            b"\x03\x01\x09Product 1\x02\x00",
+            b"\x03\x01\x09Product 1",
+            b"\x03\x01\x09Product",
+            b"\x03\x01\x09Product 1\x00",
+            b"\x03\x01\x09Product X\x02",
+            b"\x03\x01\x01\xff\x02",
+            b"\x03\x02\x09Product 1\x02\x09Product 1\x02",
+            b"\x03\x01\x09Product X\x03",
+            b"\x03\x01\x09Product X\x01\x05",
+        ):
+            with self.assertRaises(ValueError):
+                decode_cart(data, self.catalog)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+"""
+Checkout pricing unit testing examples.
+"""
+import unittest
+
+from checkout_pricing import price_cart, price_carts, price_lines, shipping_cents
+from class_exercises import (
+    ProductCatalog,
+    ShoppingCart,
+    calculate_items_shipping_cost,
+    calculate_order_total_cents,
+    calculate_total_discount_cents,
+)
+
+
+class TestCheckoutPricing(unittest.TestCase):
+    """
+    Checkout pricing unittest class.
+    """
+
+    def setUp(self):
+        """
+        Set up a cart with lines in every quantity tier.
+        """
+        self.catalog = ProductCatalog()
+        self.pen = self.catalog.intern("Pen", 1.25)
+        self.book = self.catalog.intern("Book", 15.99)
+        self.lamp = self.catalog.intern("Lamp", 40)
+        self.weights = {self.pen: 0.02, self.book: 0.5, self.lamp: 2}
+        self.cart = ShoppingCart(self.catalog)
+        self.cart.add_products([(self.pen, 12), (self.book, 7), (self.lamp, 2)])
+
+    def test_breakdown_matches_step_functions(self):
+        """
+        Test the pipeline agrees with the step by step functions.
+        """
+        breakdown = price_cart(self.cart, self.weights)
+        order_total = calculate_order_total_cents(
+            [
+                {"price_cents": line.unit_cents, "quantity": line.quantity}
+                for line in breakdown.lines
+            ]
+        )
+        self.assertEqual(breakdown.subtotal_cents, 1500 + 11193 + 8000)
+        self.assertEqual(
+            breakdown.subtotal_cents - breakdown.line_discount_cents, order_total
+        )
+        self.assertEqual(
+            breakdown.order_discount_cents, calculate_total_discount_cents(order_total)
+        )
+        self.assertEqual(breakdown.total_cents, 17985)
+        self.assertAlmostEqual(breakdown.weight, 7.74)
+        for method in ("standard", "express"):
+            self.assertEqual(
+                breakdown.shipping_cents[method],
+                100
+                * calculate_items_shipping_cost([{"weight": breakdown.weight}], method),
+            )
+        self.assertEqual(breakdown.grand_total_cents("express"), 17985 + 3000)
+        with self.assertRaises(ValueError):
+            breakdown.grand_total_cents("overnight")
+
+    def test_lines(self):
+        """
+        Test every line gets its quantity tier discount.
+        """
+        lines = price_cart(self.cart).lines
+        self.assertEqual(
+            [line.product for line in lines], [self.pen, self.book, self.lamp]
+        )
+        self.assertEqual([line.discount_cents for line in lines], [150, 560, 0])
+        self.assertEqual(price_lines([]).total_cents, 0)
+        self.assertEqual(shipping_cents(0), {"standard": 1000, "express": 2000})
+        self.assertEqual(shipping_cents(10.5), {"standard": 2000, "express": 4000})
+
+    def test_price_carts(self):
+        """
+        Test carts are priced in batch, with simulated prices.
+        """
+        other_cart = ShoppingCart(self.catalog)
+        other_cart.add_product(self.lamp, 1)
+        carts = [self.cart, other_cart]
+        self.assertEqual(
+            [breakdown.total_cents for breakdown in price_carts(carts)],
+            [price_cart(self.cart).total_cents, 4000],
+        )
+        simulated = price_carts(carts, prices={self.lamp: 30})
+        self.assertEqual(simulated[1].total_cents, 3000)
+        self.assertEqual(self.lamp.price, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,6 +6,10 @@ White-box unit testing examples.
 import unittest
 
 from white_box.class_exercises import (
+    DocumentEditingSystem,
+    ElevatorSystem,
+    StateMachine,
+    TrafficLight,
     VendingMachine,
     divide,
     get_grade,
@@ -131,3 +135,74 @@ class TestWhiteBoxVendingMachine(unittest.TestCase):
 
         self.assertEqual(self.vending_machine.state, "Dispensing")
         self.assertEqual(output, "Coin Inserted. Select your drink.")
+
+
+class TestStateMachine(unittest.TestCase):
+    """
+    State machine engine unit tests.
+    """
+
+    def test_compiled_table(self):
+        """
+        Checks transitions are compiled to integer codes.
+        """
+        machine = VendingMachine.MACHINE
+        self.assertEqual(machine.state_codes, {"Ready": 0, "Dispensing": 1})
+        self.assertEqual(list(machine.table), [1, -1, -1, 0])
+        self.assertEqual(machine.results[1], "Invalid operation in current state.")
+        with self.assertRaises(ValueError):
+            StateMachine((), (), {})
+
+    def test_state_codes(self):
+        """
+        Checks the state name follows its integer code.
+        """
+        light = TrafficLight()
+        self.assertEqual((light.state_code, light.get_current_state()), (0, "Red"))
+        light.state = "Yellow"
+        light.change_state()
+        self.assertEqual((light.state_code, light.state), (0, "Red"))
+        with self.assertRaises(ValueError):
+            light.state = "Blue"
+
+    def test_document_editing(self):
+        """
+        Checks the document editing messages.
+        """
+        document = DocumentEditingSystem()
+        self.assertEqual(document.edit_document(), "Invalid operation in current state")
+        self.assertEqual(document.save_document(), "Document saved successfully")
+        self.assertEqual(document.save_document(), "Invalid operation in current state")
+        self.assertEqual(document.edit_document(), "Editing resumed")
+        self.assertEqual(document.state, "Editing")
+
+    def test_machines_are_independent(self):
+        """
+        Checks machines of the same class keep their own state.
+        """
+        first, second = ElevatorSystem(), ElevatorSystem()
+        first.move_down()
+        self.assertEqual((first.state, second.state), ("Moving Down", "Idle"))
+        self.assertEqual(second.stop(), "Invalid operation in current state")
+
+    def test_event_methods_match_table(self):
+        """
+        Checks the bound event methods follow the compiled table in every
+        state, as fire() does.
+        """
+        machine = ElevatorSystem.MACHINE
+        for state_code in range(len(machine.states)):
+            for event, code in machine.event_codes.items():
+                index = state_code * machine.event_count + code
+                expected = machine.table[index]
+                expected = state_code if expected < 0 else expected
+                for use_fire in (False, True):
+                    elevator = ElevatorSystem()
+                    elevator.state_code = state_code
+                    if use_fire:
+                        result = elevator.fire(code)
+                    else:
+                        result = getattr(elevator, event)()
+                    self.assertEqual(result, machine.results[index])
+                    self.assertEqual(elevator.state_code, expected)
+        self.assertEqual(ElevatorSystem.stop.__doc__, "Function to stop the elevator.")
@@ -4,13 +4,17 @@
 White-box unit testing examples.
 """
 import unittest
+from decimal import Decimal
+from fractions import Fraction
 
 from class_exercises import (
     TrafficLight,
     calculate_total_discount,
+    calculate_total_discount_cents,
     check_number_status,
     validate_password,
 )
+from money import format_cents, from_cents, percent_of_cents, to_cents
 
 
 class TestWhiteBox(unittest.TestCase):
@@ -84,6 +88,67 @@ class TestWhiteBox(unittest.TestCase):
         """
         self.assertEqual(calculate_total_discount(600), 120)
 
+    def test_calculate_total_discount_cents(self):
+        """
+        Checks total discount in cents on every discount range.
+        """
+        self.assertEqual(calculate_total_discount_cents(9999), 0)
+        self.assertEqual(calculate_total_discount_cents(10000), 1000)
+        self.assertEqual(calculate_total_discount_cents(15005), 1501)
+        self.assertEqual(calculate_total_discount_cents(50000), 5000)
+        self.assertEqual(calculate_total_discount_cents(50001), 10000)
+
+    def test_to_cents(self):
+        """
+        Checks dollar amounts are converted to cents rounding half up.
+        """
+        self.assertEqual(to_cents(12), 1200)
+        self.assertEqual(to_cents(10.5), 1050)
+        self.assertEqual(to_cents(0.285), 29)
+        self.assertEqual(to_cents(-1.005), -101)
+        self.assertEqual(to_cents(" 2.999 "), 300)
+        self.assertEqual(to_cents(".5"), 50)
+        self.assertEqual(to_cents(1e-7), 0)
+
+    def test_to_cents_exact_types(self):
+        """
+        Checks Decimal and Fraction amounts are converted exactly.
+        """
+        self.assertEqual(to_cents(Decimal("19.99")), 1999)
+        self.assertEqual(to_cents(Decimal("2.675")), 268)
+        self.assertEqual(to_cents(Decimal("-0.005")), -1)
+        self.assertEqual(to_cents(Fraction(1, 3)), 33)
+        self.assertEqual(to_cents(Fraction(1, 8)), 13)
+        self.assertEqual(to_cents(Fraction(-1, 200)), -1)
+
+    def test_to_cents_invalid(self):
+        """
+        Checks amounts with more than one sign or no digits are refused.
+        """
+        for amount in ("--5", "+-5", "-+5", "", "-", "abc", "1.2.3", Decimal("inf")):
+            with self.assertRaises(ValueError):
+                to_cents(amount)
+        self.assertEqual(to_cents("-5"), -500)
+        self.assertEqual(to_cents("+5"), 500)
+
+    def test_from_and_format_cents(self):
+        """
+        Checks cents are converted back to dollars.
+        """
+        self.assertEqual(from_cents(200000), 2000)
+        self.assertIsInstance(from_cents(200000), int)
+        self.assertEqual(from_cents(1050), 10.5)
+        self.assertEqual(format_cents(1050), "10.50")
+        self.assertEqual(format_cents(-5), "-0.05")
+
+    def test_percent_of_cents(self):
+        """
+        Checks percentages of cents round half cents away from zero.
+        """
+        self.assertEqual(percent_of_cents(105, 1000), 11)
+        self.assertEqual(percent_of_cents(104, 1000), 10)
+        self.assertEqual(percent_of_cents(-105, 1000), -11)
+
     def test_traffic_light_initial_state(self):
         """
         Checks the initial state of the traffic light.
@@ -8,6 +8,7 @@ import unittest
 from class_exercises import (
     calculate_items_shipping_cost,
     calculate_order_total,
+    calculate_order_total_cents,
     categorize_product,
     celsius_to_fahrenheit,
     validate_email,
@@ -54,6 +55,19 @@ class TestWhiteBox(unittest.TestCase):
         ]
         self.assertEqual(calculate_order_total(items), 200 + 332.5 + 108)
 
+    def test_calculate_order_total_cents(self):
+        """
+        Checks total price in cents is exact on every discount range.
+        """
+        items = [
+            {"quantity": 2, "price_cents": 10000},
+            {"quantity": 7, "price_cents": 5000},
+            {"quantity": 12, "price_cents": 1000},
+            {"quantity": 3, "price_cents": 10},
+            {"quantity": 7, "price_cents": 1},
+        ]
+        self.assertEqual(calculate_order_total_cents(items), 64087)
+
     def test_calculate_items_shipping_cost_standard_low_weight(self):
         """
         Checks shipping cost for standard shipping with total weight <= 5.
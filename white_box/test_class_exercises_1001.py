@@ -3,10 +3,33 @@
 """
 Mock up testing examples.
 """
+import asyncio
+import pickle
+import random
+import threading
 import unittest
+from decimal import Decimal
 from unittest.mock import patch
 
-from white_box.class_exercises import BankAccount, BankingSystem, Product, ShoppingCart
+from white_box.class_exercises import (
+    BankAccount,
+    BankingSystem,
+    CredentialStore,
+    Product,
+    ProductCatalog,
+    SessionStore,
+    ShoppingCart,
+    hash_password,
+)
+from white_box.ledger import (
+    TRANSFER_INSUFFICIENT_FUNDS,
+    TRANSFER_INVALID_AMOUNT,
+    TRANSFER_INVALID_TYPE,
+    TRANSFER_NOT_APPLIED,
+    TRANSFER_NOT_AUTHENTICATED,
+    TRANSFER_OK,
+    Ledger,
+)
 
 
 class TestBank(unittest.TestCase):
@@ -30,6 +53,16 @@ class TestBank(unittest.TestCase):
         )
         self.assertTrue(result)
 
+    def test_decimal_transfer(self):
+        """
+        Test a money transfer of a Decimal amount.
+        """
+        result = self.banking_system.transfer_money(
+            "user123", "receiver456", Decimal("100.25"), "regular"
+        )
+        self.assertTrue(result)
+        self.assertEqual(self.banking_system.ledger.balance_cents("user123"), 89774)
+
     def test_insufficient_funds(self):
         """
         Test a money transfer with insufficient funds.
@@ -57,6 +90,164 @@ class TestBank(unittest.TestCase):
         )
         self.assertFalse(result)
 
+    def test_transfer_updates_ledger(self):
+        """
+        Test a transfer debits the sender, credits the receiver and keeps the fee.
+        """
+        ledger = self.banking_system.ledger
+        self.assertTrue(
+            self.banking_system.transfer_money("user123", "receiver456", 100, "express")
+        )
+        self.assertEqual(ledger.balance_cents("user123"), 100000 - 10500)
+        self.assertEqual(ledger.balance_cents("receiver456"), 100000 + 10000)
+        self.assertEqual(ledger.fees_cents, 500)
+        self.assertEqual(len(ledger.journal), 1)
+        self.assertEqual(ledger.journal[0], (0, 1, 10000, 500, 1))
+
+    def test_transfer_until_insufficient_funds(self):
+        """
+        Test the balance carries over between transfers.
+        """
+        for _ in range(9):
+            self.assertTrue(
+                self.banking_system.transfer_money("user123", "other", 100, "regular")
+            )
+        self.assertFalse(
+            self.banking_system.transfer_money("user123", "other", 100, "regular")
+        )
+        self.assertEqual(len(self.banking_system.ledger.journal), 9)
+
+    def test_invalid_amount(self):
+        """
+        Test a money transfer with a negative amount.
+        """
+        result = self.banking_system.transfer_money(
+            "user123", "receiver456", -100, "regular"
+        )
+        self.assertFalse(result)
+
+    def test_ledger_accounts(self):
+        """
+        Test opening accounts and viewing them as a BankAccount.
+        """
+        ledger = Ledger(opening_balance=0)
+        ledger.open_account("acc1", 12.5)
+        self.assertIn("acc1", ledger)
+        with self.assertRaises(KeyError):
+            ledger.balance_cents("acc2")
+        with self.assertRaises(KeyError):
+            ledger.get_account("acc2")
+        self.assertNotIn("acc2", ledger)
+        self.assertEqual(len(ledger), 1)
+        self.assertEqual(len(ledger.journal), 0)
+        account = ledger.get_account("acc1")
+        self.assertEqual((account.account_number, account.balance), ("acc1", 12.5))
+
+        with self.assertRaises(ValueError):
+            ledger.open_account("acc1")
+
+    def test_transfer_batch(self):
+        """
+        Test a batch of transfers is applied at once.
+        """
+        with patch("builtins.print") as mock_print:
+            result = self.banking_system.transfer_batch(
+                [
+                    ("user123", "receiver456", 100, "regular"),
+                    ("user123", "receiver789", 50.5, "scheduled"),
+                ]
+            )
+            mock_print.assert_not_called()
+        self.assertTrue(result.applied)
+        self.assertEqual(
+            [(r.amount_cents, r.fee_cents, r.status) for r in result.results],
+            [(10000, 200, TRANSFER_OK), (5050, 51, TRANSFER_OK)],
+        )
+        ledger = self.banking_system.ledger
+        self.assertEqual(ledger.balance_cents("user123"), 100000 - 15301)
+        self.assertEqual(ledger.balance_cents("receiver789"), 100000 + 5050)
+        self.assertEqual(len(ledger.journal), 2)
+
+    def test_transfer_batch_checks_each_sender_once(self):
+        """
+        Test the login of each sender is checked once per batch.
+        """
+        self.banking_system.logged_in_users.add("receiver456")
+        with patch.object(
+            SessionStore,
+            "__contains__",
+            autospec=True,
+            side_effect=SessionStore.__contains__,
+        ) as mock_contains:
+            result = self.banking_system.transfer_batch(
+                [("user123", "receiver456", 10, "regular")] * 3
+                + [("receiver456", "user123", 5, "regular")] * 2
+            )
+        self.assertTrue(result.applied)
+        self.assertEqual(
+            sorted(call.args[1] for call in mock_contains.call_args_list),
+            ["receiver456", "user123"],
+        )
+
+    def test_transfer_batch_net_funds(self):
+        """
+        Test funds are checked against the net change of the batch.
+        """
+        self.banking_system.logged_in_users.add("receiver456")
+        result = self.banking_system.transfer_batch(
+            [
+                ("receiver456", "user123", 500, "regular"),
+                ("user123", "receiver456", 1200, "regular"),
+            ]
+        )
+        self.assertTrue(result.applied)
+        self.assertEqual(self.banking_system.ledger.balance_cents("user123"), 27600)
+
+    def test_transfer_batch_all_or_nothing(self):
+        """
+        Test nothing is applied when a transfer in the batch fails.
+        """
+        result = self.banking_system.transfer_batch(
+            [
+                ("user123", "receiver456", 100, "regular"),
+                ("user123", "receiver456", 100, "invalid_type"),
+                ("unknown_user", "receiver456", 100, "regular"),
+                ("user123", "receiver456", 0, "regular"),
+            ]
+        )
+        self.assertFalse(result.applied)
+        self.assertEqual(
+            [r.status for r in result.results],
+            [
+                TRANSFER_NOT_APPLIED,
+                TRANSFER_INVALID_TYPE,
+                TRANSFER_NOT_AUTHENTICATED,
+                TRANSFER_INVALID_AMOUNT,
+            ],
+        )
+        self.assertEqual(len(self.banking_system.ledger.journal), 0)
+
+    def test_transfer_batch_insufficient_funds(self):
+        """
+        Test nothing is applied when an account would be overdrawn.
+        """
+        result = self.banking_system.transfer_batch(
+            [
+                ("user123", "receiver456", 600, "regular"),
+                ("user123", "receiver456", 600, "regular"),
+            ]
+        )
+        self.assertFalse(result.applied)
+        self.assertEqual(
+            {r.status for r in result.results}, {TRANSFER_INSUFFICIENT_FUNDS}
+        )
+        # A refused batch opens none of its accounts.
+        self.assertEqual(len(self.banking_system.ledger), 0)
+        self.assertFalse(
+            self.banking_system.transfer_money("user123", "other", 1200, "regular")
+        )
+        self.assertEqual(len(self.banking_system.ledger), 0)
+
     def test_view_account(self):
         """
         Test viewing account details.
@@ -67,6 +258,257 @@ class TestBank(unittest.TestCase):
             mock_print.assert_called_with("The account user123 has a balance of 500")
 
 
+class TestSessionStore(unittest.TestCase):
+    """
+    Session store unittest class.
+    """
+
+    def setUp(self):
+        """
+        Set up a session store on a manual clock.
+        """
+        self.now = 0.0
+        self.sessions = SessionStore(ttl=10, clock=lambda: self.now)
+
+    def test_login_and_expiry(self):
+        """
+        Test a session is active until its TTL elapses.
+        """
+        self.assertTrue(self.sessions.login("user123"))
+        self.assertFalse(self.sessions.login("user123"))
+        self.now = 9.5
+        self.assertIn("user123", self.sessions)
+        self.assertEqual(self.sessions.expires_in("user123"), 0.5)
+        self.now = 10
+        self.assertNotIn("user123", self.sessions)
+        self.assertIsNone(self.sessions.expires_in("user123"))
+        self.assertEqual(len(self.sessions), 0)
+        self.assertTrue(self.sessions.login("user123"))
+
+    def test_refresh_and_logout(self):
+        """
+        Test refreshing extends a session and logout ends it.
+        """
+        self.sessions.login("user123")
+        self.now = 8
+        self.sessions.refresh("user123")
+        self.now = 15
+        self.assertIn("user123", self.sessions)
+        self.assertEqual(self.sessions.expire(), 0)
+        self.assertTrue(self.sessions.logout("user123"))
+        self.assertFalse(self.sessions.logout("user123"))
+        self.now = 30
+        self.assertEqual(self.sessions.expire(), 0)
+
+    def test_expire_many(self):
+        """
+        Test expired sessions are dropped and stale entries compacted.
+        """
+        for index in range(100):
+            self.sessions.login(f"user{index}", ttl=index + 1)
+        for _ in range(5):
+            for index in range(50, 100):
+                self.sessions.refresh(f"user{index}", ttl=100)
+        self.assertLessEqual(len(self.sessions.heap), 2 * 100 + 64)
+        self.now = 50.5
+        self.assertEqual(self.sessions.expire(), 50)
+        self.assertEqual(len(self.sessions), 50)
+
+    def test_banking_system_logout(self):
+        """
+        Test a logged out user cannot transfer money.
+        """
+        banking_system = BankingSystem()
+        with patch("builtins.print"):
+            self.assertTrue(banking_system.authenticate("user123", "pass123"))
+            self.assertTrue(banking_system.logout("user123"))
+            self.assertFalse(
+                banking_system.transfer_money("user123", "other", 1, "regular")
+            )
+            self.assertTrue(banking_system.authenticate("user123", "pass123"))
+
+
+class TestCredentialStore(unittest.TestCase):
+    """
+    Credential store unittest class.
+    """
+
+    def setUp(self):
+        """
+        Set up a credential store with cheap hashes on a manual clock.
+        """
+        self.now = 0.0
+        self.credentials = CredentialStore(
+            iterations=1000, cache_size=2, cache_ttl=10, clock=lambda: self.now
+        )
+        self.credentials.set_password("user123", "pass123")
+
+    def test_verify(self):
+        """
+        Test only the right password of a known user verifies.
+        """
+        self.assertTrue(self.credentials.verify("user123", "pass123"))
+        self.assertFalse(self.credentials.verify("user123", "pass124"))
+        self.assertFalse(self.credentials.verify("unknown", "pass123"))
+        self.assertIn("user123", self.credentials)
+        self.assertEqual(len(self.credentials), 1)
+        self.assertNotIn(b"pass123", self.credentials.records["user123"])
+
+    def test_salted_records(self):
+        """
+        Test the same password gets a different record for every user.
+        """
+        self.credentials.set_password("user456", "pass123")
+        self.assertNotEqual(
+            self.credentials.records["user123"], self.credentials.records["user456"]
+        )
+
+    def test_verification_cache(self):
+        """
+        Test verifications are cached, bounded and expire.
+        """
+        self.credentials.set_password("user456", "pass456")
+        self.credentials.set_password("user789", "pass789")
+        with patch(
+            "white_box.class_exercises.hash_password", wraps=hash_password
+        ) as mock_hash:
+            self.assertTrue(self.credentials.verify("user123", "pass123"))
+            mock_hash.assert_called_once()
+
+        with patch(
+            "white_box.class_exercises.hash_password", wraps=hash_password
+        ) as mock_hash:
+            self.assertTrue(self.credentials.verify("user123", "pass123"))
+            self.assertFalse(self.credentials.verify("user123", "wrong"))
+            mock_hash.assert_called_once()
+
+        self.credentials.verify("user456", "pass456")
+        self.credentials.verify("user789", "pass789")
+        self.assertEqual(list(self.credentials.cache), ["user456", "user789"])
+        self.now = 10
+        with patch(
+            "white_box.class_exercises.hash_password", wraps=hash_password
+        ) as mock_hash:
+            self.credentials.verify("user789", "pass789")
+            mock_hash.assert_called_once()
+
+    def test_password_change(self):
+        """
+        Test a changed password invalidates the cached verification.
+        """
+        self.assertTrue(self.credentials.verify("user123", "pass123"))
+        self.credentials.set_password("user123", "newpass")
+        self.assertFalse(self.credentials.verify("user123", "pass123"))
+        self.assertTrue(self.credentials.verify("user123", "newpass"))
+        self.assertTrue(self.credentials.remove_user("user123"))
+        self.assertFalse(self.credentials.verify("user123", "newpass"))
+
+    def test_averify(self):
+        """
+        Test passwords are verified on an executor.
+        """
+
+        async def run():
+            return await asyncio.gather(
+                self.credentials.averify("user123", "pass123"),
+                self.credentials.averify("user123", "wrong"),
+                self.credentials.averify("unknown", "pass123"),
+            )
+
+        self.assertEqual(asyncio.run(run()), [True, False, False])
+        self.assertIn("user123", self.credentials.cache)
+
+    def test_unknown_user_hashes(self):
+        """
+        Test an unknown user costs one hash, as a known one does.
+        """
+        for _ in range(2):
+            with patch(
+                "white_box.class_exercises.hash_password", wraps=hash_password
+            ) as mock_hash:
+                self.assertFalse(self.credentials.verify("unknown", "pass123"))
+                self.assertFalse(
+                    asyncio.run(self.credentials.averify("unknown", "pass123"))
+                )
+                self.assertEqual(mock_hash.call_count, 2)
+                self.assertEqual(mock_hash.call_args.args[2], 1000)
+        self.assertNotIn("unknown", self.credentials.cache)
+
+    def test_banking_system_users(self):
+        """
+        Test BankingSystem authenticates against a credential store.
+        """
+        self.credentials.set_password("user456", "pass456")
+        banking_system = BankingSystem(users=self.credentials)
+        with patch("builtins.print"):
+            self.assertTrue(banking_system.authenticate("user456", "pass456"))
+            self.assertFalse(banking_system.authenticate("user789", "pass456"))
+
+
+class TestLedgerConcurrency(unittest.TestCase):
+    """
+    Ledger concurrency unittest class.
+    """
+
+    def test_concurrent_transfers_conserve_money(self):
+        """
+        Test concurrent transfers and batches neither create nor lose money.
+        """
+        ledger = Ledger(opening_balance=100, stripes=4)
+        accounts = [f"acc{index}" for index in range(20)]
+        for account in accounts:
+            ledger.open_account(account)
+        successes = []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            applied = 0
+            for _ in range(2000):
+                sender, receiver = rng.sample(accounts, 2)
+                amount = rng.randrange(1, 2000)
+                if rng.random() < 0.1:
+                    entries = [
+                        (sender, receiver, amount, 1, 0),
+                        (receiver, sender, 1, 1, 0),
+                    ]
+                    if not ledger.transfer_batch(entries):
+                        applied += 2
+                elif ledger.transfer(sender, receiver, amount, amount // 100, 0):
+                    applied += 1
+            successes.append(applied)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(ledger.balances) + ledger.fees_cents, 20 * 10000)
+        self.assertEqual(len(ledger.journal), sum(successes))
+        self.assertEqual(ledger.fees_cents, sum(ledger.journal.fees))
+        self.assertTrue(all(balance >= 0 for balance in ledger.balances))
+
+    def test_concurrent_account_opening(self):
+        """
+        Test concurrent first uses of an account open it once.
+        """
+        ledger = Ledger()
+        threads = [
+            threading.Thread(
+                target=ledger.transfer, args=(f"sender{index}", "new", 100, 0, 0)
+            )
+            for index in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(ledger), 9)
+        self.assertEqual(ledger.account_numbers.count("new"), 1)
+        self.assertEqual(ledger.balance_cents("new"), 100000 + 800)
+
+
 class TestShoppingCart(unittest.TestCase):
     """
     Shopping cart unittest class.
@@ -122,6 +564,194 @@ class TestShoppingCart(unittest.TestCase):
             mock_print.assert_any_call("Total: $2000")
             mock_print.assert_any_call("Checkout completed. Thank you for shopping!")
 
+    def test_checkout_decimal_price(self):
+        """
+        Test checking out products with Decimal prices.
+        """
+        self.cart.add_product(Product("Book", Decimal("19.99")), 1)
+        with patch("builtins.print") as mock_print:
+            self.cart.checkout()
+            mock_print.assert_any_call("Total: $19.99")
+
+    def test_checkout_cents(self):
+        """
+        Test checking out float prices without float drift.
+        """
+        for index in range(3):
+            self.cart.add_product(Product(f"Gum {index}", 0.1), 1)
+        self.assertEqual(self.cart.total_cents(), 30)
+        with patch("builtins.print") as mock_print:
+            self.cart.checkout()
+            mock_print.assert_any_call("Total: $0.3")
+
+    def test_line_order(self):
+        """
+        Test lines keep the order their products were first added in.
+        """
+        self.cart.add_product(self.product1, 1)
+        self.cart.add_product(self.product2, 1)
+        self.cart.add_product(self.product1, 1)
+        self.assertEqual(
+            [item["product"] for item in self.cart.items],
+            [self.product1, self.product2],
+        )
+        self.cart.remove_product(self.product1, 2)
+        self.cart.add_product(self.product1, 1)
+        self.assertEqual(
+            [item["product"] for item in self.cart.items],
+            [self.product2, self.product1],
+        )
+
+    def test_running_subtotal(self):
+        """
+        Test the subtotal follows every change to the cart.
+        """
+        self.cart.add_product(self.product1, 2)
+        self.cart.add_product(self.product2, 3)
+        self.assertEqual(self.cart.total_cents(), 350000)
+        self.cart.remove_product(self.product2, 1)
+        self.assertEqual(self.cart.total_cents(), 300000)
+        self.cart.remove_product(self.product1, 5)
+        self.cart.remove_product(Product("Laptop", 1000), 1)
+        self.assertEqual(self.cart.total_cents(), 100000)
+
+        # A price change reprices the cart.
+        self.product2.price = 450.5
+        self.assertEqual(self.cart.total_cents(), 90100)
+        self.cart.add_product(self.product2, 1)
+        self.assertEqual(self.cart.total_cents(), 135150)
+
+    def test_bulk_add_and_remove(self):
+        """
+        Test adding and removing many lines at once.
+        """
+        self.cart.add_products([(self.product1, 2), (self.product2, 1)])
+        self.cart.add_products(iter([(self.product2, 2)]))
+        self.assertEqual(
+            [(item["product"], item["quantity"]) for item in self.cart.items],
+            [(self.product1, 2), (self.product2, 3)],
+        )
+        self.assertEqual(self.cart.total_cents(), 350000)
+        self.cart.remove_products([(self.product1, 5), (self.product2, 1)])
+        self.assertEqual(len(self.cart.items), 1)
+        self.assertEqual(self.cart.total_cents(), 100000)
+
+    def test_bulk_bad_line(self):
+        """
+        Test a bad line leaves the cart unchanged, the lines before it too.
+        """
+        self.cart.add_products([(self.product1, 1), (self.product2, 1)])
+        bad_lines = (
+            [(self.product2, 2), (Product("Broken", None), 1), (self.product1, 1)],
+            [(self.product2, 2), (self.product1, "1")],
+            [(self.product2, 2), (self.product1, 1.5)],
+            [(self.product2, 2), (self.product1, -1)],
+            [(self.product2, 2), (self.product1, 0)],
+        )
+        for lines in bad_lines:
+            for change in (self.cart.add_products, self.cart.remove_products):
+                with self.assertRaises((TypeError, ValueError)):
+                    change(lines)
+                self.assertEqual(
+                    self.cart.snapshot(), {self.product1: 1, self.product2: 1}
+                )
+                self.assertEqual(self.cart.subtotal_cents, 150000)
+        self.assertEqual(self.cart.total_cents(), 150000)
+
+    def test_merge(self):
+        """
+        Test merging a guest cart into this one.
+        """
+        guest_cart = ShoppingCart()
+        guest_cart.add_product(self.product2, 2)
+        guest_cart.add_product(Product("Mouse", 25.5), 1)
+        self.cart.add_product(self.product1, 1)
+        self.cart.add_product(self.product2, 1)
+        self.cart.merge(guest_cart)
+        self.assertEqual(
+            [(item["product"].name, item["quantity"]) for item in self.cart.items],
+            [("Laptop", 1), ("Phone", 3), ("Mouse", 1)],
+        )
+        self.assertEqual(self.cart.total_cents(), 252550)
+        self.assertEqual(guest_cart.total_cents(), 102550)
+
+    def test_shared_catalog(self):
+        """
+        Test carts share the interned products of a catalog.
+        """
+        catalog = ProductCatalog()
+        laptop = catalog.intern("Laptop", 1000)
+        self.assertIs(catalog.intern("Laptop", 900), laptop)
+        self.assertFalse(hasattr(laptop, "__dict__"))
+
+        carts = [ShoppingCart(catalog) for _ in range(3)]
+        for quantity, cart in enumerate(carts, 1):
+            cart.add_product(catalog.intern("Laptop", 1000), quantity)
+            cart.add_product(catalog.intern("Phone", 500), 1)
+        self.assertEqual(len(catalog), 2)
+        self.assertEqual(carts[2].quantities, {laptop: 3, catalog["Phone"]: 1})
+
+        catalog.set_price("Laptop", 800)
+        self.assertEqual(
+            [cart.total_cents() for cart in carts], [130000, 210000, 290000]
+        )
+        self.assertIs(carts[0].items[0]["product"], catalog["Laptop"])
+        copy = pickle.loads(pickle.dumps(laptop))
+        self.assertEqual((copy.name, copy.price, copy.catalog), ("Laptop", 800, None))
+
+    def test_price_versions(self):
+        """
+        Test only price changes of its catalog products reprice a cart, and
+        the catalog does not keep the products of its carts.
+        """
+        catalog = ProductCatalog()
+        cart = ShoppingCart(catalog)
+        cart.add_product(self.product1, 1)
+        Product("Unrelated", 5).price = 6
+        ProductCatalog().intern("Elsewhere", 1).price = 2
+        self.assertEqual(cart.priced_version, catalog.price_version)
+        self.assertEqual(len(catalog), 0)
+
+        self.product1.price = 900
+        self.assertNotEqual(cart.priced_version, catalog.price_version)
+        self.assertEqual(cart.total_cents(), 90000)
+        self.assertEqual(cart.priced_version, catalog.price_version)
+
+        # A product of another catalog reprices the cart on every total.
+        other = ProductCatalog().intern("Other", 10)
+        cart.add_product(other, 1)
+        other.price = 20
+        self.assertEqual(cart.total_cents(), 92000)
+
+    def test_concurrent_updates(self):
+        """
+        Test concurrent changes to one cart are not lost.
+        """
+        products = [Product(f"Item {index}", 0.25 * index) for index in range(4)]
+
+        def worker(product):
+            for _ in range(500):
+                self.cart.add_product(product, 3)
+                self.cart.add_products([(products[0], 1), (product, 1)])
+                self.cart.remove_product(product, 2)
+
+        threads = [
+            threading.Thread(target=worker, args=(products[index % 4],))
+            for index in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        quantities = {
+            item["product"].name: item["quantity"] for item in self.cart.items
+        }
+        self.assertEqual(
+            quantities, {"Item 0": 6000, "Item 1": 2000, "Item 2": 2000, "Item 3": 2000}
+        )
+        self.assertEqual(self.cart.total_cents(), 25 * (2000 + 4000 + 6000))
+
     def test_view_product(self):
         """
         Test viewing product details.
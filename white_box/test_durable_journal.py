@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""
+Durable journal unit testing examples.
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from class_exercises import BankingSystem
+from durable_journal import (
+    DURABILITY_FLUSH,
+    DURABILITY_NONE,
+    TRANSFER_RECORD,
+    DurableJournal,
+    iter_records,
+    replay,
+)
+from ledger import Ledger
+
+
+class TestDurableJournal(unittest.TestCase):
+    """
+    Durable journal unittest class.
+    """
+
+    def setUp(self):
+        """
+        Create a temporary journal path.
+        """
+        directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "journal.bin")
+
+    def test_replay_rebuilds_balances(self):
+        """
+        Rebuilds the ledger balances from the journal.
+        """
+        with DurableJournal(self.path, batch_size=3) as journal:
+            ledger = Ledger(log=journal)
+            banking_system = BankingSystem(ledger)
+            with patch("builtins.print"):
+                banking_system.authenticate("user123", "pass123")
+                banking_system.transfer_money("user123", "receiver456", 100, "regular")
+                banking_system.transfer_money("user123", "receiver456", 5000, "regular")
+                banking_system.transfer_money("user123", "other", 12.34, "express")
+            ledger.open_account("savings", 50)
+            ledger.transfer_batch([("savings", "other", 1000, 10, 0)])
+
+        restored = Ledger()
+        self.assertEqual(replay(self.path, restored), 7)
+        self.assertEqual(restored.account_numbers, ledger.account_numbers)
+        self.assertEqual(restored.balances, ledger.balances)
+        self.assertEqual(restored.fees_cents, ledger.fees_cents)
+        self.assertEqual(len(restored.journal), 3)
+
+    def test_replay_missing_file(self):
+        """
+        Replays nothing when there is no journal yet.
+        """
+        self.assertEqual(replay(self.path, Ledger()), 0)
+
+    def test_batches_are_group_committed(self):
+        """
+        Writes nothing until a batch is full or committed.
+        """
+        journal = DurableJournal(
+            self.path, batch_size=2, durability=DURABILITY_FLUSH, max_delay=None
+        )
+        journal.record_transfer(0, 1, 100, 2, 0)
+        self.assertEqual(os.path.getsize(self.path), 0)
+        journal.record_transfer(1, 0, 50, 1, 0)
+        self.assertGreater(os.path.getsize(self.path), 0)
+        journal.record_transfer(1, 0, 5, 0, 2)
+        journal.close()
+        journal.close()
+        self.assertEqual(
+            [record[0] for record in iter_records(self.path)], [TRANSFER_RECORD] * 3
+        )
+
+    def test_buffered_records_are_committed_in_time(self):
+        """
+        Commits a partial batch within the maximum delay.
+        """
+        journal = DurableJournal(self.path, durability=DURABILITY_FLUSH, max_delay=0.01)
+        with journal:
+            journal.record_transfer(0, 1, 100, 2, 0)
+            for _ in range(200):
+                if os.path.getsize(self.path):
+                    break
+                time.sleep(0.01)
+            self.assertGreater(os.path.getsize(self.path), 0)
+            self.assertFalse(journal.pending)
+
+    def test_account_number_types(self):
+        """
+        Replays integer account numbers as integers, and refuses to open
+        accounts whose number cannot be journaled.
+        """
+        with DurableJournal(self.path) as journal:
+            ledger = Ledger(log=journal)
+            ledger.open_account(111, 10)
+            ledger.open_account("111", 20)
+            with self.assertRaises(TypeError):
+                ledger.open_account(("tuple", 1), 30)
+            self.assertEqual(len(ledger), 2)
+            self.assertTrue(ledger.transfer(111, "111", 500, 0, 0))
+
+        restored = Ledger()
+        replay(self.path, restored)
+        self.assertIn(111, restored)
+        self.assertEqual(restored.account_numbers, [111, "111"])
+        self.assertEqual(list(restored.balances), [500, 2500])
+
+    def test_closed_journal_refuses_records(self):
+        """
+        Refuses records once closed, leaving the ledger balances unchanged.
+        """
+        journal = DurableJournal(self.path)
+        ledger = Ledger(log=journal)
+        ledger.open_account("user123", 1000)
+        ledger.open_account("receiver456", 0)
+        journal.close()
+        with self.assertRaises(ValueError):
+            ledger.transfer("user123", "receiver456", 100, 2, 0)
+        with self.assertRaises(ValueError):
+            ledger.transfer_batch([("user123", "receiver456", 100, 2, 0)])
+        with self.assertRaises(ValueError):
+            ledger.open_account("other")
+        self.assertEqual(list(ledger.balances), [100000, 0])
+        self.assertEqual((len(ledger.journal), ledger.fees_cents), (0, 0))
+
+        restored = Ledger()
+        replay(self.path, restored)
+        self.assertEqual(restored.balances, ledger.balances)
+
+    def test_records_are_buffered_during_fsync(self):
+        """
+        Buffers records while a batch is being synced, the buffer lock being
+        released before writing.
+        """
+        syncing = threading.Event()
+        release = threading.Event()
+
+        def slow_fsync(_):
+            syncing.set()
+            release.wait(5)
+
+        journal = DurableJournal(self.path, max_delay=None)
+        with patch("durable_journal.os.fsync", side_effect=slow_fsync):
+            journal.record_transfer(0, 1, 100, 2, 0)
+            committer = threading.Thread(target=journal.commit)
+            committer.start()
+            self.assertTrue(syncing.wait(5))
+            journal.record_transfer(1, 0, 50, 1, 0)
+            self.assertEqual(journal.pending_records, 1)
+            release.set()
+            committer.join()
+            journal.close()
+        self.assertEqual(len(list(iter_records(self.path))), 2)
+
+    def test_torn_frame_is_ignored_and_truncated(self):
+        """
+        Stops reading at a torn frame and cuts it off before appending.
+        """
+        with DurableJournal(self.path, durability=DURABILITY_NONE) as journal:
+            journal.record_transfer(0, 1, 100, 2, 0)
+        size = os.path.getsize(self.path)
+        with open(self.path, "ab") as file:
+            file.write(b"\x20\x00\x00\x00torn")
+        self.assertEqual(len(list(iter_records(self.path))), 1)
+
+        with DurableJournal(self.path) as journal:
+            journal.record_transfer(1, 0, 100, 2, 0)
+        self.assertEqual(len(list(iter_records(self.path))), 2)
+        self.assertEqual(os.path.getsize(self.path), 2 * size)
+
+    def test_invalid_configuration(self):
+        """
+        Tries to open a journal with invalid settings.
+        """
+        with self.assertRaises(ValueError):
+            DurableJournal(self.path, durability="sometimes")
+        with self.assertRaises(ValueError):
+            DurableJournal(self.path, batch_size=0)
+        with self.assertRaises(ValueError):
+            DurableJournal(self.path, max_delay=0)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""
+State machine fleet unit testing examples.
+"""
+import random
+import unittest
+
+from class_exercises import UserAuthentication, VendingMachine
+from fleet import MachineFleet
+
+
+class TestMachineFleet(unittest.TestCase):
+    """
+    Machine fleet unittest class.
+    """
+
+    def test_replay_matches_machine_objects(self):
+        """
+        Test replaying events on a fleet ends in the states of machine objects
+        receiving the same events.
+        """
+        rng = random.Random(0)
+        pairs = [(rng.randrange(50), rng.randrange(2)) for _ in range(2000)]
+        machines = [VendingMachine() for _ in range(50)]
+        for instance_id, event in pairs:
+            machines[instance_id].fire(event)
+
+        fleet = MachineFleet(VendingMachine, 50)
+        self.assertEqual(fleet.replay(iter(pairs)), 2000)
+        self.assertEqual(
+            [fleet.state(index) for index in range(50)],
+            [machine.state for machine in machines],
+        )
+        self.assertEqual(fleet.instance(7).state, machines[7].state)
+
+    def test_invalid_events_keep_state(self):
+        """
+        Test an invalid event leaves an instance in its state.
+        """
+        fleet = MachineFleet(UserAuthentication, 3)
+        logout = fleet.event_code("logout")
+        fleet.apply([0, 1, 1, 2], [UserAuthentication.LOGIN, logout, 0, 0])
+        self.assertEqual(
+            [fleet.state(index) for index in range(3)],
+            ["Logged In", "Logged In", "Logged In"],
+        )
+        with self.assertRaises(ValueError):
+            fleet.event_code("reboot")
+
+    def test_out_of_range_events(self):
+        """
+        Test out of range event codes are refused instead of reading the
+        next state's transitions.
+        """
+        fleet = MachineFleet(VendingMachine, 2)
+        for events in ([2], [0, -1]):
+            with self.assertRaises(ValueError):
+                fleet.apply([0] * len(events), events)
+        with self.assertRaises(ValueError):
+            fleet.replay([(1, 0), (0, 2)])
+        with self.assertRaises(ValueError):
+            fleet.broadcast(-1)
+        self.assertEqual(fleet.histogram(), {"Ready": 1, "Dispensing": 1})
+
+    def test_generator_arguments(self):
+        """
+        Test apply consumes generators of instance ids and events.
+        """
+        fleet = MachineFleet(VendingMachine, 3)
+        fleet.apply(
+            (index for index in (0, 2)), (VendingMachine.INSERT_COIN for _ in range(2))
+        )
+        self.assertEqual(
+            [fleet.state(index) for index in range(3)],
+            ["Dispensing", "Ready", "Dispensing"],
+        )
+
+    def test_out_of_range_instances(self):
+        """
+        Test out of range instance ids are refused instead of wrapping around
+        to the end of the array, with no state changed.
+        """
+        fleet = MachineFleet(VendingMachine, 2)
+        for instance_ids in ([0, -1], [2], [0, 1, 2]):
+            with self.assertRaises(ValueError):
+                fleet.apply(instance_ids, [0] * len(instance_ids))
+        with self.assertRaises(ValueError):
+            fleet.apply([0, 1], [0])
+        with self.assertRaises(ValueError):
+            fleet.replay([(-1, 0)])
+        for instance_id in (-1, 2):
+            with self.assertRaises(ValueError):
+                fleet.state(instance_id)
+            with self.assertRaises(ValueError):
+                fleet.set_state(instance_id, "Dispensing")
+            with self.assertRaises(ValueError):
+                fleet.instance(instance_id)
+        self.assertEqual(fleet.histogram(), {"Ready": 2, "Dispensing": 0})
+
+    def test_broadcast_and_histogram(self):
+        """
+        Test an event applied to every instance, and counting the states.
+        """
+        fleet = MachineFleet(VendingMachine, 10)
+        fleet.set_state(3, "Dispensing")
+        self.assertEqual(fleet.histogram(), {"Ready": 9, "Dispensing": 1})
+
+        fleet.broadcast(VendingMachine.INSERT_COIN)
+        self.assertEqual(fleet.histogram(), {"Ready": 0, "Dispensing": 10})
+        fleet.broadcast(VendingMachine.SELECT_DRINK)
+        self.assertEqual(fleet.histogram(), {"Ready": 10, "Dispensing": 0})
+        self.assertEqual(len(fleet), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,6 +6,7 @@ White-box unit testing examples.
 import unittest
 
 from class_exercises import (
+    CredentialStore,
     ElevatorSystem,
     UserAuthentication,
     authenticate_user,
@@ -56,6 +57,21 @@ class TestWhiteBox(unittest.TestCase):
         credit_card = "abcdefghijklmnopqrstuv"
         self.assertEqual(validate_credit_card(credit_card), "Invalid Card")
 
+    def test_validate_credit_card_luhn_valid(self):
+        """
+        Validates credit card when its Luhn checksum is valid
+        """
+        credit_card = "4111111111111111"
+        self.assertEqual(validate_credit_card(credit_card, luhn=True), "Valid Card")
+
+    def test_validate_credit_card_luhn_invalid(self):
+        """
+        Tries to validate credit card when its Luhn checksum is invalid
+        """
+        credit_card = "4111111111111112"
+        self.assertEqual(validate_credit_card(credit_card), "Valid Card")
+        self.assertEqual(validate_credit_card(credit_card, luhn=True), "Invalid Card")
+
     def test_validate_date(self):
         """
         Validates date
@@ -92,6 +108,33 @@ class TestWhiteBox(unittest.TestCase):
         day = 32
         self.assertEqual(validate_date(year, month, day), "Invalid Date")
 
+    def test_validate_date_calendar_month_length(self):
+        """
+        Tries to validate date when the day is past the end of the month
+        """
+        self.assertEqual(validate_date(2025, 4, 31), "Valid Date")
+        self.assertEqual(validate_date(2025, 4, 31, calendar=True), "Invalid Date")
+        self.assertEqual(validate_date(2025, 4, 30, calendar=True), "Valid Date")
+
+    def test_validate_date_calendar_leap_years(self):
+        """
+        Validates February 29th only on leap years
+        """
+        self.assertEqual(validate_date(2024, 2, 29, calendar=True), "Valid Date")
+        self.assertEqual(validate_date(2000, 2, 29, calendar=True), "Valid Date")
+        self.assertEqual(validate_date(2025, 2, 29, calendar=True), "Invalid Date")
+        self.assertEqual(validate_date(1900, 2, 29, calendar=True), "Invalid Date")
+        self.assertEqual(validate_date(2100, 2, 29, calendar=True), "Invalid Date")
+
+    def test_validate_date_calendar_floats(self):
+        """
+        Checks whole float parts are accepted and fractional ones are not.
+        """
+        self.assertEqual(validate_date(2024.0, 2, 29, calendar=True), "Valid Date")
+        self.assertEqual(validate_date(2024, 2.0, 29.0, calendar=True), "Valid Date")
+        self.assertEqual(validate_date(2024.5, 2, 1, calendar=True), "Invalid Date")
+        self.assertEqual(validate_date(2024, 2, 28.5, calendar=True), "Invalid Date")
+
     def test_check_flight_eligibility(self):
         """
         Validates flight elegibility
@@ -150,6 +193,20 @@ class TestWhiteBox(unittest.TestCase):
         url = "ftp://example.com"
         self.assertEqual(validate_url(url), "Invalid URL")
 
+    def test_validate_url_long_https_default(self):
+        """
+        Validates a too long https URL, the length check only applies to http
+        """
+        url = "https://" + "a" * 250 + ".com"
+        self.assertEqual(validate_url(url), "Valid URL")
+
+    def test_validate_url_long_https_strict(self):
+        """
+        Tries to validate a too long https URL in strict mode
+        """
+        url = "https://" + "a" * 250 + ".com"
+        self.assertEqual(validate_url(url, strict=True), "Invalid URL")
+
     def test_calculate_quantity_discount_no_discount(self):
         """
         Calculates quantity discount when there is no discount
@@ -296,6 +353,17 @@ class TestWhiteBox(unittest.TestCase):
         password = "admin123"
         self.assertEqual(authenticate_user(username, password), "Admin")
 
+    def test_authenticate_user_admin_credentials(self):
+        """
+        Authenticates an admin against a credential store
+        """
+        credentials = CredentialStore(iterations=1000)
+        credentials.set_password("admin", "s3cret-admin")
+        self.assertEqual(
+            authenticate_user("admin", "s3cret-admin", credentials), "Admin"
+        )
+        self.assertEqual(authenticate_user("admin", "admin123", credentials), "User")
+
     def test_authenticate_user_user(self):
         """
         Authenticates user when they are a regular user
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+Inventory reservation unit testing examples.
+"""
+import random
+import threading
+import unittest
+from unittest.mock import patch
+
+from book_store import Book, BookStore
+from class_exercises import ProductCatalog, ShoppingCart
+from inventory import StockTable
+
+
+class TestStockTable(unittest.TestCase):
+    """
+    Stock table unittest class.
+    """
+
+    def setUp(self):
+        """
+        Set up a book store and its stock table.
+        """
+        self.bookstore = BookStore()
+        with patch("builtins.print"):
+            self.bookstore.add_book(Book("Book One", "Author A", 10.99, 5))
+            self.bookstore.add_book(Book("Book Two", "Author B", 15.99, 3))
+        self.stock = StockTable(self.bookstore)
+        self.catalog = ProductCatalog()
+
+    def test_reserve_and_fulfill(self):
+        """
+        Test a fulfilled reservation takes the stock out of the books.
+        """
+        reservation = self.stock.reserve([("book one", 2), ("Book Two", 3)])
+        self.assertEqual(reservation.shortfall, frozenset())
+        self.assertEqual(self.stock.available_quantity("Book One"), 3)
+        self.assertEqual(self.bookstore.books[0].quantity, 5)
+
+        self.assertTrue(self.stock.fulfill(reservation))
+        self.assertFalse(self.stock.fulfill(reservation))
+        self.assertEqual([book.quantity for book in self.bookstore.books], [3, 0])
+
+    def test_release(self):
+        """
+        Test a released reservation makes the stock available again.
+        """
+        reservation = self.stock.reserve([("Book Two", 2)])
+        self.assertTrue(self.stock.release(reservation))
+        self.assertFalse(self.stock.fulfill(reservation))
+        self.assertEqual(self.stock.available_quantity("Book Two"), 3)
+        self.assertEqual(self.bookstore.books[1].quantity, 3)
+
+    def test_shortfall(self):
+        """
+        Test nothing is reserved when a line is missing or short.
+        """
+        reservation = self.stock.reserve(
+            [("Book One", 1), ("Book Two", 2), ("Book Two", 2)]
+        )
+        self.assertIsNone(reservation.reservation_id)
+        self.assertEqual(reservation.shortfall, {"Book Two"})
+        self.assertEqual(
+            self.stock.reserve([("Book One", 1), ("Book Three", 1)]).shortfall,
+            {"Book Three"},
+        )
+        self.assertEqual(self.stock.available_quantity("Book One"), 5)
+        self.assertEqual(self.stock.available_quantity("Book Three"), 0)
+
+    def test_invalid_quantities(self):
+        """
+        Test lines below one copy are refused with the stock unchanged.
+        """
+        for quantity in (-5, 0):
+            with self.assertRaises(ValueError):
+                self.stock.reserve([("Book One", 1), ("Book Two", quantity)])
+        self.assertEqual(self.stock.available_quantity("Book One"), 5)
+        self.assertEqual(self.stock.available_quantity("Book Two"), 3)
+        self.assertEqual(self.stock.reservations, {})
+
+        cart = ShoppingCart(self.catalog)
+        with self.assertRaises(ValueError):
+            cart.add_product(self.catalog.intern("Book Two", 15.99), -3)
+        with self.assertRaises(ValueError):
+            cart.add_products([(self.catalog.intern("Book One", 10.99), -3)])
+        self.assertEqual(self.stock.checkout(cart).lines, ())
+        self.assertEqual([book.quantity for book in self.bookstore.books], [5, 3])
+
+    def test_duplicate_titles(self):
+        """
+        Test books sharing a title are stocked and sold together.
+        """
+        with patch("builtins.print"):
+            self.bookstore.add_book(Book("BOOK ONE", "Author C", 1, 2))
+        stock = StockTable(self.bookstore)
+        self.assertEqual(stock.available_quantity("book one"), 7)
+
+        self.assertTrue(stock.fulfill(stock.reserve([("Book One", 6)])))
+        self.assertEqual([book.quantity for book in self.bookstore.books], [0, 3, 1])
+        self.assertEqual(stock.reserve([("Book One", 2)]).shortfall, {"Book One"})
+
+    def test_checkout_cart(self):
+        """
+        Test checking out a shopping cart against the stock.
+        """
+        cart = ShoppingCart(self.catalog)
+        cart.add_product(self.catalog.intern("Book One", 10.99), 4)
+        self.assertIsNotNone(self.stock.checkout(cart).reservation_id)
+        self.assertEqual(self.stock.checkout(cart).shortfall, {"Book One"})
+        self.assertEqual(self.bookstore.books[0].quantity, 1)
+
+    def test_concurrent_checkouts_do_not_oversell(self):
+        """
+        Test concurrent checkouts of hot books sell exactly the stock.
+        """
+        bookstore = BookStore()
+        with patch("builtins.print"):
+            for index in range(4):
+                bookstore.add_book(Book(f"Hot {index}", "Author", 5, 200))
+        stock = StockTable(bookstore, stripes=2)
+        sold = []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            for _ in range(300):
+                lines = [
+                    (f"Hot {rng.randrange(4)}", rng.randrange(1, 3)) for _ in range(2)
+                ]
+                reservation = stock.reserve(lines)
+                if reservation.reservation_id is not None:
+                    if rng.random() < 0.2:
+                        stock.release(reservation)
+                    else:
+                        stock.fulfill(reservation)
+                        sold.extend(reservation.lines)
+
+        threads = []
+        for seed in range(8):
+            threads.append(threading.Thread(target=worker, args=(seed,)))
+            threads[-1].start()
+        for thread in threads:
+            thread.join()
+
+        for stock_id, book in enumerate(bookstore.books):
+            sold_quantity = sum(
+                quantity for sold_id, quantity in sold if sold_id == stock_id
+            )
+            self.assertGreaterEqual(book.quantity, 0)
+            self.assertEqual(book.quantity, 200 - sold_quantity)
+            self.assertEqual(stock.available[stock_id], book.quantity)
+        self.assertEqual(stock.reservations, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
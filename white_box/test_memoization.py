@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""
+Memoization unit testing examples.
+"""
+import threading
+import unittest
+
+import class_exercises
+import memoization
+from memoization import LRUCache, cache_stats, clear_caches, memoize, resize_cache
+
+
+class TestLRUCache(unittest.TestCase):
+    """
+    LRU cache unittest class.
+    """
+
+    def setUp(self):
+        """
+        Wrap a function that records its calls.
+        """
+        self.calls = []
+
+        def square(number):
+            self.calls.append(number)
+            return number * number
+
+        self.cache = LRUCache(square, maxsize=2)
+
+    def test_hits_and_misses(self):
+        """
+        Calls the function only on cache misses.
+        """
+        self.assertEqual(self.cache(3), 9)
+        self.assertEqual(self.cache(3), 9)
+        self.assertEqual(self.calls, [3])
+        info = self.cache.cache_info()
+        self.assertEqual((info.hits, info.misses, info.size), (1, 1, 1))
+        self.assertEqual(info.hit_rate, 0.5)
+
+    def test_least_recently_used_eviction(self):
+        """
+        Evicts the least recently used result when the cache is full.
+        """
+        self.cache(1)
+        self.cache(2)
+        self.cache(1)
+        self.cache(3)
+        self.assertEqual(list(self.cache.results), [(1,), (3,)])
+        self.assertEqual(self.cache.cache_info().evictions, 1)
+
+    def test_cache_clear(self):
+        """
+        Empties the cache and resets its counters.
+        """
+        self.cache(1)
+        self.cache.cache_clear()
+        self.assertEqual(self.cache.cache_info(), (0, 0, 0, 0, 2, 0.0))
+
+    def test_keyword_arguments(self):
+        """
+        Caches calls with keyword arguments apart from positional ones.
+        """
+        self.assertEqual(self.cache(number=3), 9)
+        self.assertEqual(self.cache(number=3), 9)
+        self.assertEqual(self.cache(3), 9)
+        self.assertEqual(self.calls, [3, 3])
+        self.assertEqual(self.cache.cache_info().hits, 1)
+
+    def test_concurrent_calls(self):
+        """
+        Keeps the cache bounded and the counters exact under threads.
+        """
+
+        def call_many(offset):
+            for number in range(500):
+                self.cache((number + offset) % 7)
+
+        threads = [
+            threading.Thread(target=call_many, args=(offset,)) for offset in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        info = self.cache.cache_info()
+        self.assertEqual(info.hits + info.misses, 8 * 500)
+        self.assertEqual(info.misses - info.evictions, info.size)
+        self.assertLessEqual(info.size, 2)
+
+    def test_invalid_size(self):
+        """
+        Tries to create an empty cache.
+        """
+        with self.assertRaises(ValueError):
+            LRUCache(abs, maxsize=0)
+
+
+class TestMemoizedExercises(unittest.TestCase):
+    """
+    Memoized class exercises unittest class.
+    """
+
+    def setUp(self):
+        """
+        Start every test with empty caches.
+        """
+        clear_caches()
+
+    def test_memoized_results(self):
+        """
+        Gets the same results as the original functions.
+        """
+        self.assertEqual(memoization.categorize_product(75), "Category B")
+        self.assertEqual(memoization.calculate_quantity_discount(7), "5% Discount")
+        self.assertEqual(memoization.check_loan_eligibility(70000, 800), "Premium Loan")
+        self.assertEqual(memoization.is_triangle(3, 4, 5), "Yes, it's a triangle!")
+        self.assertEqual(
+            memoization.check_loan_eligibility(income=70000, credit_score=800),
+            "Premium Loan",
+        )
+        self.assertTrue(memoization.validate_password("Passw0rd!"))
+
+    def test_cache_stats(self):
+        """
+        Reports the counters of every registered cache.
+        """
+        memoization.categorize_product(20)
+        memoization.categorize_product(20)
+        stats = cache_stats()
+        self.assertEqual(stats["categorize_product"].hits, 1)
+        self.assertEqual(stats["categorize_product"].misses, 1)
+        self.assertEqual(stats["is_triangle"].misses, 0)
+
+    def test_resize_cache(self):
+        """
+        Shrinks a registered cache, evicting the oldest results.
+        """
+        for price in range(5):
+            memoization.categorize_product(price)
+        resize_cache("categorize_product", 2)
+        info = cache_stats()["categorize_product"]
+        self.assertEqual((info.size, info.maxsize, info.evictions), (2, 2, 3))
+        resize_cache("categorize_product", memoization.DEFAULT_MAXSIZE)
+
+        with self.assertRaises(ValueError):
+            resize_cache("categorize_product", 0)
+
+    def test_duplicate_name(self):
+        """
+        Refuses to register a second cache under the same name.
+        """
+        with self.assertRaises(ValueError):
+            memoize(class_exercises.is_triangle)
+        self.assertIs(memoization.CACHES["is_triangle"], memoization.is_triangle)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""
+Settlement unit testing examples.
+"""
+import io
+import unittest
+from unittest.mock import patch
+
+from ledger import Ledger, TransferJournal
+from settlement import NO_FEES, AccountTable, FeeSchedule, net_deltas, schedule_fee
+
+
+class TestAccountTable(unittest.TestCase):
+    """
+    Account table unittest class.
+    """
+
+    def setUp(self):
+        """
+        Set up a ledger with a few transfers after a table snapshot.
+        """
+        self.ledger = Ledger()
+        for account_number in ("alice", "bob", "carol"):
+            self.ledger.open_account(account_number)
+        self.table = AccountTable.from_ledger(self.ledger)
+        self.ledger.transfer("alice", "bob", 30000, 600, 0)
+        self.ledger.transfer("bob", "carol", 5000, 250, 1)
+        self.ledger.transfer("carol", "alice", 100, 1, 2)
+
+    def test_net_deltas(self):
+        """
+        Test transfers are netted per account.
+        """
+        self.assertEqual(
+            list(net_deltas(self.ledger.journal, 3)), [-30500, 24750, 4899]
+        )
+        self.assertEqual(list(net_deltas(self.ledger.journal, 3, 2)), [100, 0, -101])
+
+    def test_settle_reconciles_with_ledger(self):
+        """
+        Test settling the journal reproduces the ledger balances.
+        """
+        self.assertEqual(
+            self.table.reconcile(map(self.ledger.get_account, ("alice", "bob"))),
+            ["alice", "bob"],
+        )
+        result = self.table.settle(self.ledger.journal)
+        self.assertTrue(result.applied)
+        self.assertEqual(result.transfers, 3)
+        self.assertEqual(self.table.balances, self.ledger.balances)
+        accounts = [
+            self.ledger.get_account(number) for number in self.ledger.account_numbers
+        ]
+        self.assertEqual(self.table.reconcile(accounts), [])
+
+        # Already settled transfers are not applied again.
+        self.assertEqual(self.table.settle(self.ledger.journal).transfers, 0)
+        self.assertEqual(self.table.balances, self.ledger.balances)
+
+    def test_settle_overdrawn(self):
+        """
+        Test nothing is settled when an account would be overdrawn.
+        """
+        journal = TransferJournal()
+        journal.append(0, 1, 100_000, 1, 0)
+        result = self.table.settle(journal)
+        self.assertFalse(result.applied)
+        self.assertEqual(result.overdrawn, {"alice"})
+        self.assertEqual(list(self.table.balances), [100000] * 3)
+        self.assertEqual(self.table.journal_position, 0)
+
+    def test_settle_unknown_account(self):
+        """
+        Test a journal with accounts missing from the table is refused.
+        """
+        journal = TransferJournal()
+        journal.append(0, 7, 100, 0, 0)
+        with self.assertRaises(ValueError):
+            self.table.settle(journal)
+
+    def test_sync_accounts(self):
+        """
+        Test accounts the ledger opens after the snapshot are synced and
+        settled from their opening balance.
+        """
+        self.ledger.open_account("dave", 20)
+        self.ledger.transfer("alice", "dave", 100, 0, 0)
+        self.ledger.transfer("dave", "bob", 500, 10, 0)
+        with self.assertRaises(ValueError):
+            self.table.settle(self.ledger.journal)
+
+        self.assertEqual(self.table.sync_accounts(self.ledger, tier=1), 1)
+        self.assertEqual(self.table.sync_accounts(self.ledger), 0)
+        self.assertEqual(list(self.table.tiers), [0, 0, 0, 1])
+        self.assertEqual(self.table.get_account("dave").balance, 20)
+        self.assertTrue(self.table.settle(self.ledger.journal).applied)
+        self.assertEqual(self.table.balances, self.ledger.balances)
+
+        self.table.open_account("erin", 0)
+        with self.assertRaises(ValueError):
+            self.table.sync_accounts(self.ledger)
+
+    def test_fee_schedules(self):
+        """
+        Test fees are charged by tier, waived and capped at the balance.
+        """
+        self.assertEqual(schedule_fee(100000, FeeSchedule(500, 10, None)), 600)
+        self.assertEqual(schedule_fee(100000, FeeSchedule(500, 10, 100000)), 0)
+        self.assertEqual(schedule_fee(300, FeeSchedule(500, 0, None)), 300)
+        self.assertEqual(schedule_fee(-5, FeeSchedule(500, 0, None)), 0)
+
+        self.table.set_tier("bob", 1)
+        self.table.open_account("dave", 0, 1)
+        schedules = [NO_FEES, FeeSchedule(1000, 25, None)]
+        result = self.table.settle(self.ledger.journal, schedules)
+        self.assertEqual(result.fees_cents, 1000 + 312)
+        self.assertEqual(list(self.table.balances), [69500, 123438, 104899, 0])
+
+    def test_export_matches_view_account(self):
+        """
+        Test the export shows the balances the way view_account does.
+        """
+        self.table.settle(self.ledger.journal)
+        file = io.StringIO()
+        self.table.export_csv(file)
+        rows = file.getvalue().splitlines()
+        self.assertEqual(rows[0], "account_number,balance")
+        self.assertEqual(rows[1], "alice,695")
+        self.assertEqual(rows[3], "carol,1048.99")
+
+        with patch("builtins.print") as mock_print:
+            self.table.get_account("carol").view_account()
+            mock_print.assert_called_once_with(
+                "The account carol has a balance of 1048.99"
+            )
+        self.assertEqual(
+            [account.balance for account in self.table.accounts()],
+            [695, 1247.5, 1048.99],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""
+Traffic light simulation unit testing examples.
+"""
+import unittest
+
+from class_exercises import TrafficLight
+from traffic_simulation import TrafficSimulation
+
+
+class TestTrafficSimulation(unittest.TestCase):
+    """
+    Traffic simulation unittest class.
+    """
+
+    def test_green_wave(self):
+        """
+        Test every light of a corridor turns green one travel time after the
+        previous one.
+        """
+        simulation = TrafficSimulation()
+        lights = simulation.add_green_wave(3, 10)
+        self.assertEqual(simulation.next_change(), 30)
+
+        first_green = {}
+        for second in range(1, 61):
+            simulation.run(second)
+            for light_id in lights:
+                if simulation.lights[light_id].state == "Green":
+                    first_green.setdefault(light_id, second)
+        self.assertEqual(first_green, {0: 30, 1: 40, 2: 50})
+
+    def test_matches_ticking(self):
+        """
+        Test jumping between changes ends in the states of a light ticked
+        every second.
+        """
+        simulation = TrafficSimulation()
+        simulation.add_light(phase_seconds=(3, 2, 1))
+        simulation.add_light(TrafficLight(), (4, 4, 1), offset=2)
+        ticked = [TrafficLight(), TrafficLight()]
+        remaining = [3, 6]
+        changes = 0
+        for _ in range(100):
+            for index, light in enumerate(ticked):
+                remaining[index] -= 1
+                if remaining[index] == 0:
+                    light.change_state()
+                    changes += 1
+                    remaining[index] = ((3, 2, 1), (4, 4, 1))[index][light.state_code]
+
+        run = simulation.run(100)
+        self.assertEqual(
+            [light.state for light in simulation.lights],
+            [light.state for light in ticked],
+        )
+        self.assertEqual((run.start, run.end, run.events), (0, 100, changes))
+        self.assertGreaterEqual(run.events_per_second(), 0)
+        self.assertEqual(sum(simulation.histogram().values()), len(simulation))
+
+    def test_invalid(self):
+        """
+        Test invalid phases, offsets and times are rejected.
+        """
+        simulation = TrafficSimulation()
+        self.assertIsNone(simulation.next_change())
+        for phase_seconds, offset in (((30, 0, 5), 0), ((30, 5), 0), ((1, 1, 1), -1)):
+            with self.assertRaises(ValueError):
+                simulation.add_light(phase_seconds=phase_seconds, offset=offset)
+        simulation.run(10)
+        with self.assertRaises(ValueError):
+            simulation.run(5)
+
+
+if __name__ == "__main__":
+    unittest.main()
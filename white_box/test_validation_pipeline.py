@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""
+Validation pipeline unit testing examples.
+"""
+import csv
+import unittest
+from io import StringIO
+
+from validation_pipeline import iter_chunks, route_columns, run_pipeline
+
+LONG_HTTPS_URL = "https://" + "a" * 250 + ".com"
+
+SOURCE = (
+    "name,email,website,card\n"
+    "Ana,ana@example.com,http://example.com,1234567890123\n"
+    f"Luis,luis,{LONG_HTTPS_URL},12ab\n"
+    "Eva,eva@example.org,ftp://example.com,1234567890123456\n"
+)
+
+
+class TestValidationPipeline(unittest.TestCase):
+    """
+    Validation pipeline unittest class.
+    """
+
+    def run_source(self, **kwargs):
+        """
+        Runs the pipeline over SOURCE and returns the stats and output rows.
+        """
+        destination = StringIO()
+        stats = run_pipeline(StringIO(SOURCE), destination, **kwargs)
+        return stats, list(csv.reader(StringIO(destination.getvalue())))
+
+    def test_route_columns_by_keyword(self):
+        """
+        Routes the columns using the header names.
+        """
+        header = ["name", "Email", "url", "credit_card"]
+        self.assertEqual(
+            route_columns(header), ((1, "email"), (2, "url"), (3, "credit_card"))
+        )
+
+    def test_route_columns_explicit(self):
+        """
+        Routes the columns using an explicit mapping.
+        """
+        header = ["name", "contact", "website"]
+        self.assertEqual(route_columns(header, {"contact": "email"}), ((1, "email"),))
+
+    def test_route_columns_invalid_validator(self):
+        """
+        Tries to route a column to an unknown validator.
+        """
+        with self.assertRaises(ValueError):
+            route_columns(["phone"], {"phone": "phone"})
+
+    def test_iter_chunks(self):
+        """
+        Splits the rows in chunks of the given size.
+        """
+        self.assertEqual(list(iter_chunks(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+    def test_run_pipeline_in_process(self):
+        """
+        Validates every routed column in the current process.
+        """
+        stats, rows = self.run_source(chunk_size=2, workers=0)
+        self.assertEqual(stats.rows, 3)
+        self.assertEqual(rows[0][4:], ["email_result", "website_result", "card_result"])
+        self.assertEqual(rows[1][4:], ["Valid Email", "Valid URL", "Valid Card"])
+        self.assertEqual(rows[2][4:], ["Invalid Email", "Valid URL", "Invalid Card"])
+        self.assertEqual(rows[3][4:], ["Valid Email", "Invalid URL", "Valid Card"])
+
+    def test_run_pipeline_strict(self):
+        """
+        Applies the URL length check to https URLs in strict mode.
+        """
+        _, rows = self.run_source(workers=0, strict=True)
+        self.assertEqual(rows[2][5], "Invalid URL")
+
+    def test_run_pipeline_process_pool(self):
+        """
+        Gets the same results when validating in a process pool.
+        """
+        _, expected = self.run_source(workers=0)
+        stats, rows = self.run_source(chunk_size=1, workers=2)
+        self.assertEqual(rows, expected)
+        self.assertEqual(stats.rows, 3)
+
+    def test_run_pipeline_blank_and_short_rows(self):
+        """
+        Skips blank lines and validates the missing values of short rows.
+        """
+        destination = StringIO()
+        stats = run_pipeline(
+            StringIO("name,email\na,b@c.com\n\nx\n"), destination, workers=0
+        )
+        self.assertEqual(stats.rows, 2)
+        self.assertEqual(
+            destination.getvalue().splitlines(),
+            ["name,email,email_result", "a,b@c.com,Valid Email", "x,,Invalid Email"],
+        )
+
+    def test_run_pipeline_empty(self):
+        """
+        Runs the pipeline over an empty source.
+        """
+        destination = StringIO()
+        stats = run_pipeline(StringIO(""), destination, workers=0)
+        self.assertEqual(stats.rows, 0)
+        self.assertEqual(destination.getvalue(), "")
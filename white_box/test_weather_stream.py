@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""
+Weather advisory engine unit testing examples.
+"""
+import asyncio
+import random
+import unittest
+
+from weather_stream import SensorReading, WeatherAdvisoryEngine
+
+HOT = "High Temperature and Humidity. Stay Hydrated."
+COLD = "Low Temperature. Bundle Up!"
+NONE = "No Specific Advisory"
+
+
+class FakeClock:  # pylint: disable=too-few-public-methods
+    """
+    Clock that advances one second per call.
+    """
+
+    def __init__(self):
+        """
+        Start the clock at zero.
+        """
+        self.now = 0.0
+
+    def __call__(self):
+        """
+        Returns the current time and advances the clock.
+        """
+        self.now += 1.0
+        return self.now
+
+
+class TestWeatherAdvisoryEngine(unittest.TestCase):
+    """
+    Weather advisory engine unittest class.
+    """
+
+    def test_emits_only_state_changes(self):
+        """
+        Emits an advisory only when the advisory of a sensor changes.
+        """
+        engine = WeatherAdvisoryEngine(batch_size=2)
+        readings = [
+            SensorReading("a", 20, 50),
+            SensorReading("b", -5, 50),
+            SensorReading("a", 21, 50),
+            SensorReading("a", 35, 80),
+            SensorReading("b", -6, 50),
+            SensorReading("a", 36, 85),
+        ]
+        changes = [
+            (change.sensor_id, change.advisory) for change in engine.process(readings)
+        ]
+        self.assertEqual(changes, [("a", NONE), ("b", COLD), ("a", HOT)])
+        self.assertEqual(engine.metrics.readings, 6)
+        self.assertEqual(engine.metrics.batches, 3)
+        self.assertEqual(engine.metrics.emitted, 3)
+
+    def test_rolling_window(self):
+        """
+        Evaluates the advisory over the mean of the sensor window.
+        """
+        engine = WeatherAdvisoryEngine(window=2)
+        readings = [
+            SensorReading("a", 1, 50),
+            SensorReading("a", -3, 50),
+            SensorReading("a", -1, 50),
+            SensorReading("a", 5, 50),
+        ]
+        changes = [change.advisory for change in engine.process(readings)]
+        self.assertEqual(changes, [NONE, COLD, NONE])
+
+    def test_rolling_window_does_not_drift(self):
+        """
+        Evaluates a window of zeros as zero after many noisy readings.
+        """
+        engine = WeatherAdvisoryEngine(window=8)
+        rng = random.Random(0)
+        readings = [
+            SensorReading("a", rng.uniform(-40, 40) / 3, 50) for _ in range(100_000)
+        ]
+        readings += [SensorReading("a", 0.0, 50)] * 8
+        list(engine.process(readings))
+        self.assertEqual(engine.advisories["a"], NONE)
+
+    def test_metrics(self):
+        """
+        Reports throughput and latency from the engine clock.
+        """
+        engine = WeatherAdvisoryEngine(clock=FakeClock())
+        list(engine.process([SensorReading("a", 20, 50, timestamp=0.0)]))
+        self.assertEqual(engine.metrics.throughput(), 1.0)
+        self.assertEqual(engine.metrics.latency_percentile(50), 2.0)
+
+    def test_metrics_empty(self):
+        """
+        Reports zero metrics before any reading.
+        """
+        engine = WeatherAdvisoryEngine()
+        self.assertEqual(engine.metrics.throughput(), 0.0)
+        self.assertEqual(engine.metrics.latency_percentile(99), 0.0)
+
+    def test_invalid_window(self):
+        """
+        Tries to create an engine with an empty window.
+        """
+        with self.assertRaises(ValueError):
+            WeatherAdvisoryEngine(window=0)
+
+    def test_aprocess(self):
+        """
+        Consumes an async source in micro-batches.
+        """
+
+        async def source():
+            for temperature in (20, 35, 36, -1):
+                yield SensorReading("a", temperature, 80)
+
+        async def collect(engine):
+            return [change.advisory async for change in engine.aprocess(source())]
+
+        engine = WeatherAdvisoryEngine(batch_size=3, max_delay=float("inf"))
+        self.assertEqual(asyncio.run(collect(engine)), [NONE, HOT, COLD])
+        self.assertEqual(engine.metrics.batches, 2)
+
+    def test_aprocess_flushes_stalled_source(self):
+        """
+        Flushes a partial batch after max_delay while the source stalls, the
+        latency counting from the arrival of the readings.
+        """
+        resume = None
+
+        async def source():
+            yield SensorReading("a", 35, 80)
+            yield SensorReading("b", -1, 80)
+            await resume.wait()
+            yield SensorReading("a", 20, 80)
+
+        async def run():
+            nonlocal resume
+            resume = asyncio.Event()
+            changes = engine.aprocess(source())
+            first = await asyncio.wait_for(anext(changes), 5)
+            second = await asyncio.wait_for(anext(changes), 5)
+            resume.set()
+            rest = [change async for change in changes]
+            return [change.advisory for change in [first, second] + rest]
+
+        engine = WeatherAdvisoryEngine(batch_size=100, max_delay=0.05)
+        self.assertEqual(asyncio.run(run()), [HOT, COLD, NONE])
+        self.assertEqual(engine.metrics.batches, 2)
+        self.assertGreaterEqual(max(engine.metrics.latencies), 0.04)
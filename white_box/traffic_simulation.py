@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+Discrete-event simulation of TrafficLight networks on simulated time.
+"""
+import heapq
+import time
+from collections import namedtuple
+
+from class_exercises import TrafficLight
+
+# Seconds spent in every state, in TrafficLight state order: Red, Green, Yellow.
+DEFAULT_PHASE_SECONDS = (30, 25, 5)
+
+
+class SimulationRun(
+    namedtuple("SimulationRun", ["events", "start", "end", "wall_seconds"])
+):
+    """
+    Outcome of a run: the light changes processed, the simulated time span
+    and the wall clock time it took.
+    """
+
+    __slots__ = ()
+
+    def events_per_second(self):
+        """
+        Light changes processed per wall clock second.
+        """
+        return self.events / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+
+class TrafficSimulation:
+    """
+    Advances TrafficLight instances on simulated time. Every light changes
+    state when its current phase runs out. Lights are bucketed by the time of
+    their next change and those times kept in a heap, so a run jumps from
+    one change time to the next instead of ticking through idle time, and
+    lights changing together, as they do in coordinated networks, share one
+    heap entry.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        """
+        Start an empty network at simulated time 0.
+        """
+        self.lights = []
+        self.phase_seconds = []
+        self.buckets = {}
+        self.times = []
+        self.now = 0
+        self.clock = clock
+
+    def __len__(self):
+        """
+        Number of lights.
+        """
+        return len(self.lights)
+
+    def add_light(self, light=None, phase_seconds=DEFAULT_PHASE_SECONDS, offset=0):
+        """
+        Adds a light, a new red TrafficLight by default, with the seconds of
+        each of its phases. Its first change happens offset seconds after its
+        current phase, counted from now. Returns the light id.
+        """
+        light = TrafficLight() if light is None else light
+        phase_seconds = tuple(phase_seconds)
+        valid = len(phase_seconds) == len(TrafficLight.MACHINE.states)
+        if not valid or min(phase_seconds) <= 0:
+            raise ValueError("Every phase lasts a positive number of seconds")
+        if offset < 0:
+            raise ValueError("A light cannot change before now")
+
+        light_id = len(self.lights)
+        self.lights.append(light)
+        self.phase_seconds.append(phase_seconds)
+        self.schedule(self.now + offset + phase_seconds[light.state_code], light_id)
+        return light_id
+
+    def schedule(self, change_time, light_id):
+        """
+        Queues the next change of a light.
+        """
+        bucket = self.buckets.get(change_time)
+        if bucket is None:
+            self.buckets[change_time] = [light_id]
+            heapq.heappush(self.times, change_time)
+        else:
+            bucket.append(light_id)
+
+    def add_green_wave(
+        self, count, travel_seconds, phase_seconds=DEFAULT_PHASE_SECONDS
+    ):
+        """
+        Adds a corridor of count new red lights, each turning green
+        travel_seconds after the previous one, so that traffic moving at that
+        pace meets green lights. Returns the light ids.
+        """
+        return [
+            self.add_light(phase_seconds=phase_seconds, offset=index * travel_seconds)
+            for index in range(count)
+        ]
+
+    def next_change(self):
+        """
+        Simulated time of the next light change, None without lights.
+        """
+        return self.times[0] if self.times else None
+
+    def run(self, until):
+        """
+        Processes every light change up to the until simulated time, which
+        becomes now. Returns the SimulationRun.
+        """
+        if until < self.now:
+            raise ValueError("The simulation cannot go back in time")
+
+        times = self.times
+        buckets = self.buckets
+        lights = self.lights
+        phase_seconds = self.phase_seconds
+        schedule = self.schedule
+        events = 0
+        start, started = self.now, self.clock()
+        while times and times[0] <= until:
+            change_time = heapq.heappop(times)
+            light_ids = buckets.pop(change_time)
+            for light_id in light_ids:
+                light = lights[light_id]
+                light.change_state()
+                schedule(
+                    change_time + phase_seconds[light_id][light.state_code], light_id
+                )
+            events += len(light_ids)
+
+        self.now = until
+        return SimulationRun(events, start, until, self.clock() - started)
+
+    def histogram(self):
+        """
+        Number of lights in every state, by state name.
+        """
+        counts = dict.fromkeys(TrafficLight.MACHINE.states, 0)
+        for light in self.lights:
+            counts[light.state] += 1
+
+        return counts
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+"""
+Streaming validation pipeline for CSV exports.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from class_exercises import validate_credit_card, validate_email, validate_url
+
+VALIDATORS = {
+    "email": validate_email,
+    "url": validate_url,
+    "credit_card": validate_credit_card,
+}
+
+# Header keywords used to route a column when no explicit route is given.
+COLUMN_KEYWORDS = (
+    ("email", "email"),
+    ("url", "url"),
+    ("website", "url"),
+    ("card", "credit_card"),
+)
+
+
+class PipelineStats:  # pylint: disable=too-few-public-methods
+    """
+    Counters reported at the end of a pipeline run.
+    """
+
+    def __init__(self, rows, seconds):
+        """
+        Set the run counters.
+        """
+        self.rows = rows
+        self.seconds = seconds
+        self.rows_per_second = rows / seconds if seconds > 0 else 0.0
+
+
+def route_columns(header, columns=None):
+    """
+    Maps the header to (column index, validator name) routes.
+    Explicit routes are given as a {column name: validator name} dict,
+    otherwise the columns are routed by keyword in their names.
+    """
+    routes = []
+    for index, name in enumerate(header):
+        if columns is not None:
+            kind = columns.get(name)
+        else:
+            lowered = name.lower()
+            kind = next(
+                (kind for keyword, kind in COLUMN_KEYWORDS if keyword in lowered),
+                None,
+            )
+
+        if kind is None:
+            continue
+
+        if kind not in VALIDATORS:
+            raise ValueError(f"Invalid validator: {kind}")
+
+        routes.append((index, kind))
+
+    return tuple(routes)
+
+
+def validate_rows(rows, routes, strict=False, width=0):
+    """
+    Validates a chunk of rows, appending one result column per route.
+    Blank rows are skipped, and rows shorter than width columns are padded
+    with empty values, so their results stay under their headers.
+    """
+    checks = []
+    for index, kind in routes:
+        if kind == "url":
+            checks.append((index, lambda value: validate_url(value, strict)))
+        else:
+            checks.append((index, VALIDATORS[kind]))
+
+    width = max(width, max((index + 1 for index, _ in routes), default=0))
+    return [
+        (row if len(row) >= width else row + [""] * (width - len(row)))
+        + [check(row[index] if index < len(row) else "") for index, check in checks]
+        for row in rows
+        if row
+    ]
+
+
+def _validate_chunk(args):
+    """
+    Process pool entry point, arguments come packed to keep the call picklable.
+    """
+    return validate_rows(*args)
+
+
+def iter_chunks(rows, chunk_size):
+    """
+    Lazily splits an iterable of rows into lists of at most chunk_size rows.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_results(
+    chunks, routes, workers=None, strict=False, width=0
+):  # pylint: disable=too-many-arguments
+    """
+    Validates the chunks in order, yielding one result chunk at a time.
+    With workers=0 the chunks are validated in the current process, otherwise
+    at most two chunks per worker are in flight, so memory stays constant.
+    """
+    if workers == 0:
+        for chunk in chunks:
+            yield validate_rows(chunk, routes, strict, width)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(
+                executor.submit(_validate_chunk, (chunk, routes, strict, width))
+            )
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def run_pipeline(
+    source, destination, columns=None, chunk_size=10000, workers=None, strict=False
+):  # pylint: disable=too-many-arguments
+    """
+    Reads CSV rows from source, validates the routed columns and writes the
+    rows plus their results to destination as they are produced. Blank lines
+    are skipped and short rows get empty values, found invalid.
+    """
+    start = time.perf_counter()
+    reader = csv.reader(source)
+    writer = csv.writer(destination)
+
+    header = next(reader, None)
+    if header is None:
+        return PipelineStats(0, time.perf_counter() - start)
+
+    routes = route_columns(header, columns)
+    writer.writerow(header + [f"{header[index]}_result" for index, _ in routes])
+
+    rows = 0
+    chunks = iter_chunks(reader, chunk_size)
+    for result in iter_results(chunks, routes, workers, strict, len(header)):
+        writer.writerows(result)
+        rows += len(result)
+
+    return PipelineStats(rows, time.perf_counter() - start)
+
+
+def parse_column(value):
+    """
+    Parses a NAME=VALIDATOR command line route.
+    """
+    name, _, kind = value.partition("=")
+    if not name or kind not in VALIDATORS:
+        raise argparse.ArgumentTypeError(f"Invalid column route: {value}")
+
+    return name, kind
+
+
+def main(argv=None):
+    """
+    Application entrypoint.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("input", help="CSV file to validate")
+    parser.add_argument("output", help="CSV file to write the results to")
+    parser.add_argument(
+        "--column",
+        action="append",
+        type=parse_column,
+        help="route a column to a validator, e.g. contact=email (repeatable)",
+    )
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument(
+        "--workers", type=int, help="process pool size, 0 validates in-process"
+    )
+    parser.add_argument("--strict", action="store_true", help="strict URL checks")
+    args = parser.parse_args(argv)
+
+    columns = dict(args.column) if args.column else None
+    with open(args.input, newline="", encoding="utf-8") as source, open(
+        args.output, "w", newline="", encoding="utf-8"
+    ) as destination:
+        stats = run_pipeline(
+            source, destination, columns, args.chunk_size, args.workers, args.strict
+        )
+
+    print(
+        f"Processed {stats.rows} rows in {stats.seconds:.2f}s"
+        f" ({stats.rows_per_second:.0f} rows/s)",
+        file=sys.stderr,
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    main()
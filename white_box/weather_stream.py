@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+"""
+Streaming weather advisory engine over sensor feeds.
+"""
+import asyncio
+import time
+from collections import deque, namedtuple
+from itertools import islice
+from math import fsum, isinf
+
+from class_exercises import get_weather_advisory
+
+
+class SensorReading(
+    namedtuple("SensorReading", ["sensor_id", "temperature", "humidity", "timestamp"])
+):
+    """
+    Sensor reading, the timestamp (engine clock) is used to measure latency.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, sensor_id, temperature, humidity, timestamp=None):
+        """
+        Readings without a timestamp are stamped when aprocess() receives
+        them, and timed from the start of their batch by process().
+        """
+        return super().__new__(cls, sensor_id, temperature, humidity, timestamp)
+
+
+class AdvisoryChange(
+    namedtuple("AdvisoryChange", ["sensor_id", "advisory", "timestamp"])
+):
+    """
+    Advisory emitted when the advisory of a sensor changes.
+    """
+
+    __slots__ = ()
+
+
+class StreamMetrics:
+    """
+    Throughput and end-to-end latency counters of a weather advisory engine.
+    """
+
+    def __init__(self, max_latency_samples=10000):
+        """
+        Initialize the counters.
+        """
+        self.readings = 0
+        self.batches = 0
+        self.emitted = 0
+        self.busy_seconds = 0.0
+        self.latencies = deque(maxlen=max_latency_samples)
+
+    def throughput(self):
+        """
+        Readings processed per second of engine time.
+        """
+        if self.busy_seconds <= 0:
+            return 0.0
+
+        return self.readings / self.busy_seconds
+
+    def latency_percentile(self, percentile):
+        """
+        Latency percentile, in seconds, of the most recent emitted advisories.
+        """
+        if not self.latencies:
+            return 0.0
+
+        latencies = sorted(self.latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        return latencies[index]
+
+
+class WeatherAdvisoryEngine:
+    """
+    Evaluates advisories in micro-batches over per-sensor rolling windows and
+    emits an AdvisoryChange only when the advisory of a sensor changes.
+    """
+
+    def __init__(self, window=1, batch_size=1000, max_delay=0.05, clock=None):
+        """
+        Set the window length (readings averaged per sensor), the micro-batch
+        size and the maximum time a reading waits for its batch to fill.
+        """
+        if window < 1 or batch_size < 1:
+            raise ValueError("Window and batch size must be positive")
+
+        self.window = window
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.clock = clock or time.monotonic
+        self.windows = {}
+        self.advisories = {}
+        self.metrics = StreamMetrics()
+
+    def _window_means(self, sensor_id, temperature, humidity):
+        """
+        Adds a reading to the sensor window and returns the window means.
+        A window is a pair of temperature and humidity deques, summed with
+        fsum on every reading: running sums would drift as readings are
+        added and removed, and a window is short.
+        """
+        window = self.windows.get(sensor_id)
+        if window is None:
+            window = self.windows[sensor_id] = (
+                deque(maxlen=self.window),
+                deque(maxlen=self.window),
+            )
+
+        temperatures, humidities = window
+        temperatures.append(temperature)
+        humidities.append(humidity)
+        count = len(temperatures)
+        return fsum(temperatures) / count, fsum(humidities) / count
+
+    def process_batch(self, readings):
+        """
+        Processes one micro-batch and returns the advisory changes.
+        """
+        start = self.clock()
+        advisories = self.advisories
+        changes = []
+        for reading in readings:
+            sensor_id, temperature, humidity, timestamp = reading
+            if self.window == 1:
+                advisory = get_weather_advisory(temperature, humidity)
+            else:
+                advisory = get_weather_advisory(
+                    *self._window_means(sensor_id, temperature, humidity)
+                )
+
+            if advisories.get(sensor_id) != advisory:
+                advisories[sensor_id] = advisory
+                changes.append(
+                    AdvisoryChange(
+                        sensor_id, advisory, start if timestamp is None else timestamp
+                    )
+                )
+
+        end = self.clock()
+        metrics = self.metrics
+        metrics.readings += len(readings)
+        metrics.batches += 1
+        metrics.emitted += len(changes)
+        metrics.busy_seconds += end - start
+        metrics.latencies.extend(end - change.timestamp for change in changes)
+        return changes
+
+    def process(self, readings):
+        """
+        Consumes an iterator of readings, yielding the advisory changes.
+        """
+        readings = iter(readings)
+        while True:
+            batch = list(islice(readings, self.batch_size))
+            if not batch:
+                return
+            yield from self.process_batch(batch)
+
+    async def aprocess(self, readings):
+        """
+        Consumes an async iterator of readings, yielding the advisory changes.
+        A batch is flushed when it is full, or by a timer max_delay seconds
+        after its first reading arrived, even if the source stalls. Readings
+        without a timestamp are stamped on arrival, so their latency includes
+        the wait for their batch.
+        """
+        iterator = aiter(readings)
+        batch = []
+        deadline = None
+        pending = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(anext(iterator))
+                timeout = (
+                    None if deadline is None else max(0.0, deadline - self.clock())
+                )
+                # The next reading is waited for without being cancelled, so
+                # a flush does not lose it.
+                done, _ = await asyncio.wait((pending,), timeout=timeout)
+                if done:
+                    try:
+                        reading = pending.result()
+                    except StopAsyncIteration:
+                        pending = None
+                        break
+
+                    pending = None
+                    if reading.timestamp is None:
+                        reading = reading._replace(timestamp=self.clock())
+                    if not batch and not isinf(self.max_delay):
+                        deadline = self.clock() + self.max_delay
+                    batch.append(reading)
+                    if len(batch) < self.batch_size:
+                        continue
+
+                for change in self.process_batch(batch):
+                    yield change
+                batch = []
+                deadline = None
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+        if batch:
+            for change in self.process_batch(batch):
+                yield change